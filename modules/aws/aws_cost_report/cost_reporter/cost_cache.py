@@ -0,0 +1,94 @@
+"""
+Content-addressed cache of raw Cost Explorer pages in the report bucket.
+
+Each get_cost_and_usage query (time period, granularity, metrics, group-by —
+which carries the report tag key) is hashed into an object key under
+COST_CACHE_PREFIX, and the list of response pages is stored there as gzipped
+JSON. Cost Explorer bills every request, so re-runs and backfills of closed
+periods are served from S3 instead.
+
+A query whose period ended at least COST_CACHE_SETTLE_DAYS ago is treated as
+finalized and its entry never expires. Queries that touch the open (or just
+closed) month are refreshed once the entry is older than COST_CACHE_TTL_SECONDS.
+
+Environment variables (optional):
+- COST_CACHE_ENABLED: "false" disables the cache (default "true")
+- COST_CACHE_PREFIX: key prefix for cache objects (default "cost-explorer-cache/")
+- COST_CACHE_TTL_SECONDS: lifetime of non-finalized entries (default 21600)
+- COST_CACHE_SETTLE_DAYS: days after a period ends before it is final (default 3)
+"""
+
+import datetime
+import gzip
+import hashlib
+import json
+import os
+
+from botocore.exceptions import ClientError
+
+COST_CACHE_ENABLED = os.environ.get("COST_CACHE_ENABLED", "true").lower() == "true"
+COST_CACHE_PREFIX = os.environ.get("COST_CACHE_PREFIX", "cost-explorer-cache/")
+COST_CACHE_TTL_SECONDS = int(os.environ.get("COST_CACHE_TTL_SECONDS", "21600"))
+COST_CACHE_SETTLE_DAYS = int(os.environ.get("COST_CACHE_SETTLE_DAYS", "3"))
+
+
+def cache_key(params):
+    """Return the S3 key for a get_cost_and_usage query (pagination excluded)."""
+    identity = {
+        k: params[k] for k in ("TimePeriod", "Granularity", "Metrics", "GroupBy")
+    }
+    canonical = json.dumps(identity, sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    return f"{COST_CACHE_PREFIX}{digest}.json.gz"
+
+
+def is_finalized(end, today=None):
+    """True when the (exclusive) period end is far enough in the past to be final."""
+    today = today or datetime.date.today()
+    settled = datetime.date.fromisoformat(end) + datetime.timedelta(
+        days=COST_CACHE_SETTLE_DAYS
+    )
+    return settled <= today
+
+
+def get_cached_pages(s3, bucket, params):
+    """
+    Return cached response pages for the query, or None on a miss or when a
+    non-finalized entry is older than COST_CACHE_TTL_SECONDS.
+    """
+    if not COST_CACHE_ENABLED:
+        return None
+    try:
+        obj = s3.get_object(Bucket=bucket, Key=cache_key(params))
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404"):
+            print(f"ERROR: Failed to read Cost Explorer cache: {e}")
+        return None
+    if not is_finalized(params["TimePeriod"]["End"]):
+        age = datetime.datetime.now(datetime.timezone.utc) - obj["LastModified"]
+        if age.total_seconds() > COST_CACHE_TTL_SECONDS:
+            return None
+    try:
+        return json.loads(gzip.decompress(obj["Body"].read()))
+    except (OSError, ValueError) as e:
+        print(f"ERROR: Ignoring unreadable Cost Explorer cache entry: {e}")
+        return None
+
+
+def put_cached_pages(s3, bucket, params, pages):
+    """Store response pages for the query (ResponseMetadata is dropped)."""
+    if not COST_CACHE_ENABLED:
+        return
+    body = json.dumps(
+        [{k: v for k, v in page.items() if k != "ResponseMetadata"} for page in pages],
+        separators=(",", ":"),
+    )
+    try:
+        s3.put_object(
+            Bucket=bucket,
+            Key=cache_key(params),
+            Body=gzip.compress(body.encode("utf-8")),
+            ContentType="application/gzip",
+        )
+    except ClientError as e:
+        print(f"ERROR: Failed to write Cost Explorer cache: {e}")
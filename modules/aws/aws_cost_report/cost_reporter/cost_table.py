@@ -0,0 +1,121 @@
+"""
+Columnar cost data model for the cost report.
+
+Cost Explorer groups are accumulated by CostTableBuilder into interned string
+tables (tag values and usage types) plus parallel typed arrays, instead of a
+dict of dicts. build() sorts the rows once — tags case-insensitively, usage
+types lexically within a tag — and records each tag's contiguous row range,
+so the PDF stage (and any export) can threshold and total every tag in a
+single pass over the cost column.
+"""
+
+from array import array
+
+
+class CostTable:
+    """
+    Immutable, sorted cost rows.
+
+    Attributes:
+        tags (list[str]): Tag values in report order.
+        usage_types (list[str]): Interned usage-type strings.
+        usage_ids (array[int]): Per row, index into usage_types.
+        costs (array[float]): Per row, total cost.
+        offsets (array[int]): Rows of tags[i] are offsets[i]:offsets[i + 1].
+    """
+
+    def __init__(self, tags, usage_types, usage_ids, costs, offsets):
+        self.tags = tags
+        self.usage_types = usage_types
+        self.usage_ids = usage_ids
+        self.costs = costs
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.costs)
+
+    def iter_rows(self):
+        """Yield (tag, usage_type, cost) for every row in report order."""
+        usage_types, usage_ids, costs = self.usage_types, self.usage_ids, self.costs
+        for t, tag in enumerate(self.tags):
+            for row in range(self.offsets[t], self.offsets[t + 1]):
+                yield tag, usage_types[usage_ids[row]], costs[row]
+
+    def summarize(self, min_cost):
+        """
+        Threshold and total every tag in one pass over the cost column.
+
+        Yields:
+            (tag, rows, total): rows is [(usage_type, cost), ...] for costs
+            >= min_cost, in usage-type order; total is their sum.
+        """
+        usage_types, usage_ids, costs = self.usage_types, self.usage_ids, self.costs
+        offsets = self.offsets
+        for t, tag in enumerate(self.tags):
+            rows = []
+            total = 0.0
+            for row in range(offsets[t], offsets[t + 1]):
+                cost = costs[row]
+                if cost < min_cost:
+                    continue
+                rows.append((usage_types[usage_ids[row]], cost))
+                total += cost
+            yield tag, rows, total
+
+
+class CostTableBuilder:
+    """Accumulate (tag, usage_type, cost) amounts, summing duplicates."""
+
+    def __init__(self):
+        self._tag_index = {}
+        self._usage_index = {}
+        self._row_index = {}
+        self._tag_ids = array("I")
+        self._usage_ids = array("I")
+        self._costs = array("d")
+
+    def add(self, tag, usage_type, cost):
+        t = self._tag_index.setdefault(tag, len(self._tag_index))
+        u = self._usage_index.setdefault(usage_type, len(self._usage_index))
+        row = self._row_index.get((t, u))
+        if row is None:
+            self._row_index[(t, u)] = len(self._costs)
+            self._tag_ids.append(t)
+            self._usage_ids.append(u)
+            self._costs.append(cost)
+        else:
+            self._costs[row] += cost
+
+    def build(self):
+        """Sort rows into report order and return a CostTable."""
+        tags = list(self._tag_index)
+        usage_types = list(self._usage_index)
+        # Tags case-insensitively (stable, so ties keep first-seen order);
+        # usage types by their exact string, as the report lists them.
+        tag_order = sorted(range(len(tags)), key=lambda t: tags[t].lower())
+        tag_rank = array("I", [0]) * len(tags)
+        for rank, t in enumerate(tag_order):
+            tag_rank[t] = rank
+        usage_rank = array("I", [0]) * len(usage_types)
+        usage_order = sorted(range(len(usage_types)), key=usage_types.__getitem__)
+        for rank, u in enumerate(usage_order):
+            usage_rank[u] = rank
+
+        tag_ids, usage_ids, costs = self._tag_ids, self._usage_ids, self._costs
+        width = len(usage_types)
+        order = sorted(
+            range(len(costs)),
+            key=lambda row: tag_rank[tag_ids[row]] * width + usage_rank[usage_ids[row]],
+        )
+        offsets = array("I", [0]) * (len(tags) + 1)
+        for t in tag_ids:
+            offsets[tag_rank[t] + 1] += 1
+        for i in range(len(tags)):
+            offsets[i + 1] += offsets[i]
+        return CostTable(
+            [tags[t] for t in tag_order],
+            usage_types,
+            array("I", (usage_ids[row] for row in order)),
+            array("d", (costs[row] for row in order)),
+            offsets,
+        )
@@ -1,8 +1,14 @@
 import datetime
+import json
 import os
+import re
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
+from botocore.config import Config
+from cost_cache import get_cached_pages, put_cached_pages
+from cost_table import CostTableBuilder
 from fpdf import FPDF
 
 # ENV VARS
@@ -13,10 +19,22 @@ REPORT_TIME_PERIOD_END = os.environ.get("REPORT_TIME_PERIOD_END")
 CUSTOMER_IDENTIFIER = os.environ.get("CUSTOMER_IDENTIFIER", "")
 # minimum cost threshold (e.g. "0.003" or "0.0000005")
 MIN_ITEM_COST = float(os.environ.get("MIN_ITEM_COST", "0.01"))
-
-ce = boto3.client("ce")
-s3 = boto3.client("s3")
-sts = boto3.client("sts")
+# Cost Explorer queries are split into MONTHLY or DAILY slices fetched in parallel
+COST_SLICE_GRANULARITY = os.environ.get("COST_SLICE_GRANULARITY", "MONTHLY").upper()
+COST_FETCH_MAX_WORKERS = int(os.environ.get("COST_FETCH_MAX_WORKERS", "4"))
+
+# Clients live as long as the execution environment, so warm invocations reuse
+# them. The Cost Explorer slice workers share ce: its connection pool covers
+# COST_FETCH_MAX_WORKERS and adaptive retries absorb CE throttling.
+CLIENT_CONFIG = Config(
+    max_pool_connections=max(10, COST_FETCH_MAX_WORKERS),
+    retries={"max_attempts": 10, "mode": "adaptive"},
+    connect_timeout=5,
+    read_timeout=60,
+)
+ce = boto3.client("ce", config=CLIENT_CONFIG)
+s3 = boto3.client("s3", config=CLIENT_CONFIG)
+sts = boto3.client("sts", config=CLIENT_CONFIG)
 
 
 def get_time_period():
@@ -29,51 +47,91 @@ def get_time_period():
     return str(first_prev), str(last_prev)
 
 
-def fetch_detailed_costs(start, end):
+def split_time_period(start, end, granularity=COST_SLICE_GRANULARITY):
     """
+    Split the Cost Explorer period [start, end) into consecutive slices that
+    end on month boundaries (MONTHLY) or cover single days (DAILY).
+
     Returns:
-      {
-        tag_value: {
-          usage_type: total_cost,
-          ...
-        },
-        ...
-      }
-    Skips any entries with no tag.
+      [(slice_start, slice_end), ...] as ISO date strings, End exclusive.
     """
-    group_by = [
-        {"Type": "TAG", "Key": REPORT_TAG_KEY},
-        {"Type": "DIMENSION", "Key": "USAGE_TYPE"},
-    ]
-
-    results = {}
-    next_token = None
-
+    cur = datetime.date.fromisoformat(start)
+    stop = datetime.date.fromisoformat(end)
+    slices = []
+    while cur < stop:
+        if granularity == "DAILY":
+            nxt = cur + datetime.timedelta(days=1)
+        else:
+            nxt = (cur.replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+        nxt = min(nxt, stop)
+        slices.append((str(cur), str(nxt)))
+        cur = nxt
+    return slices
+
+
+def fetch_cost_pages(start, end, granularity=COST_SLICE_GRANULARITY):
+    """
+    Run one get_cost_and_usage query for a single slice and return every
+    response page. Pages of one query are fetched in order because each
+    NextPageToken is only known once the previous page arrives. Pages are
+    served from and stored in the Cost Explorer cache in REPORT_BUCKET.
+    """
+    params = {
+        "TimePeriod": {"Start": start, "End": end},
+        "Granularity": "DAILY" if granularity == "DAILY" else "MONTHLY",
+        "Metrics": ["UnblendedCost"],
+        "GroupBy": [
+            {"Type": "TAG", "Key": REPORT_TAG_KEY},
+            {"Type": "DIMENSION", "Key": "USAGE_TYPE"},
+        ],
+    }
+    pages = get_cached_pages(s3, REPORT_BUCKET, params)
+    if pages is not None:
+        return pages
+    pages = []
+    query = dict(params)
     while True:
-        params = {
-            "TimePeriod": {"Start": start, "End": end},
-            "Granularity": "MONTHLY",
-            "Metrics": ["UnblendedCost"],
-            "GroupBy": group_by,
-        }
-        if next_token:
-            params["NextPageToken"] = next_token
-
-        resp = ce.get_cost_and_usage(**params)
-        for g in resp["ResultsByTime"][0]["Groups"]:
-            raw_tag, usage = g["Keys"]
-            if not raw_tag or not raw_tag.strip():
-                continue
-            tag = raw_tag.split("$")[-1]
-            cost = float(g["Metrics"]["UnblendedCost"]["Amount"])
-            results.setdefault(tag, {})
-            results[tag][usage] = results[tag].get(usage, 0.0) + cost
-
+        resp = ce.get_cost_and_usage(**query)
+        pages.append(resp)
         next_token = resp.get("NextPageToken")
         if not next_token:
             break
+        query["NextPageToken"] = next_token
+    put_cached_pages(s3, REPORT_BUCKET, params, pages)
+    return pages
+
+
+def merge_cost_pages(pages, builder):
+    """Add every group of every ResultsByTime entry in pages to the builder."""
+    for resp in pages:
+        for period in resp["ResultsByTime"]:
+            for g in period["Groups"]:
+                raw_tag, usage = g["Keys"]
+                if not raw_tag or not raw_tag.strip():
+                    continue
+                tag = raw_tag.split("$")[-1]
+                cost = float(g["Metrics"]["UnblendedCost"]["Amount"])
+                builder.add(tag, usage, cost)
+
+
+def fetch_detailed_costs(start, end):
+    """
+    Returns:
+      CostTable with one row per (tag_value, usage_type) and its total cost,
+      sorted for the report. Skips any entries with no tag.
 
-    return results
+    The period is split into COST_SLICE_GRANULARITY slices which are queried
+    concurrently (at most COST_FETCH_MAX_WORKERS at a time) and merged in
+    slice order. A single-month report is still exactly one query.
+    """
+    slices = split_time_period(start, end)
+    builder = CostTableBuilder()
+    if slices:
+        workers = max(1, min(COST_FETCH_MAX_WORKERS, len(slices)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for pages in pool.map(lambda period: fetch_cost_pages(*period), slices):
+                merge_cost_pages(pages, builder)
+    return builder.build()
 
 
 # Usage-type → resource-type mapping
@@ -97,11 +155,69 @@ USAGE_TYPE_TO_RESOURCE_TYPE = {
 }
 
 
+def load_usage_type_mapping():
+    """
+    Return the ordered usage-type fragment -> resource-type mapping.
+
+    Entries from the USAGE_TYPE_MAPPING_FILE (path to a JSON object) and
+    USAGE_TYPE_MAPPING (inline JSON object) environment variables come first,
+    in that order, so they take precedence over USAGE_TYPE_TO_RESOURCE_TYPE.
+    """
+    mapping = {}
+    path = os.environ.get("USAGE_TYPE_MAPPING_FILE")
+    if path:
+        with open(path, encoding="utf-8") as f:
+            mapping.update(json.load(f))
+    inline = os.environ.get("USAGE_TYPE_MAPPING")
+    if inline:
+        mapping.update(json.loads(inline))
+    for fragment, resource in USAGE_TYPE_TO_RESOURCE_TYPE.items():
+        mapping.setdefault(fragment, resource)
+    return mapping
+
+
+class UsageTypeClassifier:
+    """
+    Classify usage types against an ordered fragment mapping with one
+    compiled regex and a memo of results.
+
+    Semantics match a linear scan: the first fragment (in mapping order) that
+    occurs anywhere in the usage type wins. The regex is a zero-width
+    lookahead over an ordered alternation, so at every position it reports
+    the highest-priority fragment starting there; the best of those is the
+    overall winner.
+    """
+
+    def __init__(self, mapping, default="Other"):
+        self._entries = [(f, r) for f, r in mapping.items() if f]
+        self._default = default
+        self._memo = {}
+        alternation = "|".join(f"({re.escape(f)})" for f, _ in self._entries)
+        self._regex = re.compile(f"(?=(?:{alternation}))") if self._entries else None
+
+    def classify(self, usage_type):
+        try:
+            return self._memo[usage_type]
+        except KeyError:
+            pass
+        best = None
+        if self._regex is not None:
+            for m in self._regex.finditer(usage_type):
+                index = m.lastindex - 1
+                if best is None or index < best:
+                    best = index
+                    if best == 0:
+                        break
+        result = self._default if best is None else self._entries[best][1]
+        self._memo[usage_type] = result
+        return result
+
+
+USAGE_TYPE_CLASSIFIER = UsageTypeClassifier(load_usage_type_mapping())
+
+
 def get_resource_type(usage_type):
-    for prefix, resource in USAGE_TYPE_TO_RESOURCE_TYPE.items():
-        if usage_type.startswith(prefix) or prefix in usage_type:
-            return resource
-    return "Other"
+    return USAGE_TYPE_CLASSIFIER.classify(usage_type)
 
 
 def generate_pdf(cost_data, start, end, outfile):
@@ -127,12 +243,11 @@ def generate_pdf(cost_data, start, end, outfile):
     pdf.ln(6)
 
     # For each tag
-    # Sort Name tags alphabetically (case-insensitive)
-    for tag_val in sorted(cost_data, key=lambda x: str(x).lower()):
-        tag = tag_val
+    # Tags are already sorted alphabetically (case-insensitive); each tag's
+    # rows are thresholded and totalled in one pass over the cost column
+    for tag, rows, tag_total in cost_data.summarize(MIN_ITEM_COST):
         if not tag.strip():
             continue
-        usages = cost_data[tag_val]
 
         # Tag header
         pdf.set_font("Arial", "B", 14)
@@ -141,12 +256,7 @@ def generate_pdf(cost_data, start, end, outfile):
         pdf.ln(1)
 
         # Resource type(s) for this tag
-        resource_types = set()
-        for usage_type, amount in usages.items():
-            amt = float(amount)
-            if amt < MIN_ITEM_COST:
-                continue
-            resource_types.add(get_resource_type(usage_type))
+        resource_types = {get_resource_type(usage_type) for usage_type, _ in rows}
         types_str = ", ".join(sorted(resource_types)) if resource_types else "Unknown"
 
         pdf.set_font("Arial", "B", 12)
@@ -166,12 +276,7 @@ def generate_pdf(cost_data, start, end, outfile):
 
         # Rows (skip below MIN_ITEM_COST)
         pdf.set_font("Arial", size=10)
-        tag_total = 0.0
-        for usage_type, amount in sorted(usages.items()):
-            amt = float(amount)
-            if amt < MIN_ITEM_COST:
-                continue
-            tag_total += amt
+        for usage_type, amt in rows:
             pdf.cell(col1, h, usage_type[:60], border=1)
             fmt = f"{amt:,.6f}" if amt < 1 else f"{amt:,.2f}"
             pdf.cell(col2, h, fmt, border=1, align="R")
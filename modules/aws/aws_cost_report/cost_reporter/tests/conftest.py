@@ -0,0 +1,57 @@
+"""
+Offline test setup for the cost reporter Lambda.
+
+Run from the repository root with:
+
+    python -m pytest modules/aws/aws_cost_report/cost_reporter/tests
+
+The handler modules are importable as they are at the root of the deployment
+package; fpdf must be installed locally. No test talks to AWS: the handler
+builds its clients at import, so botocore still needs a region and
+credentials, and REPORT_BUCKET must be set.
+"""
+
+import datetime
+import io
+import os
+import sys
+
+import pytest
+from botocore.exceptions import ClientError
+
+LAMBDA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, LAMBDA_DIR)
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("REPORT_BUCKET", "cost-reports")
+
+
+class MemoryS3:
+    """S3 client stand-in keeping put_object bodies and their write times."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, ContentType):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        self.objects[(Bucket, Key)] = (Body, now)
+
+    def get_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        body, last_modified = self.objects[(Bucket, Key)]
+        return {"Body": io.BytesIO(body), "LastModified": last_modified}
+
+    def age(self, seconds):
+        """Make every stored object seconds older."""
+        delta = datetime.timedelta(seconds=seconds)
+        for key, (body, last_modified) in self.objects.items():
+            self.objects[key] = (body, last_modified - delta)
+
+
+@pytest.fixture
+def memory_s3():
+    return MemoryS3()
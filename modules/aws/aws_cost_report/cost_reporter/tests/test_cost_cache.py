@@ -0,0 +1,107 @@
+import datetime
+
+import cost_cache
+import pytest
+from cost_cache import cache_key, get_cached_pages, is_finalized, put_cached_pages
+
+BUCKET = "cost-reports"
+PAGES = [{"ResultsByTime": [], "NextPageToken": "2"}, {"ResultsByTime": []}]
+
+
+def query(start, end, granularity="MONTHLY", tag_key="Name"):
+    return {
+        "TimePeriod": {"Start": start, "End": end},
+        "Granularity": granularity,
+        "Metrics": ["UnblendedCost"],
+        "GroupBy": [
+            {"Type": "TAG", "Key": tag_key},
+            {"Type": "DIMENSION", "Key": "USAGE_TYPE"},
+        ],
+    }
+
+
+def days_ago(days):
+    return str(datetime.date.today() - datetime.timedelta(days=days))
+
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch):
+    monkeypatch.setattr(cost_cache, "COST_CACHE_ENABLED", True)
+    monkeypatch.setattr(cost_cache, "COST_CACHE_TTL_SECONDS", 3600)
+    monkeypatch.setattr(cost_cache, "COST_CACHE_SETTLE_DAYS", 3)
+
+
+def test_key_identifies_the_query_but_not_the_page():
+    base = query("2025-01-01", "2025-02-01")
+
+    assert cache_key(base) == cache_key({**base, "NextPageToken": "abc"})
+    assert cache_key(base).startswith(cost_cache.COST_CACHE_PREFIX)
+    for other in (
+        query("2025-01-01", "2025-01-31"),
+        query("2025-01-01", "2025-02-01", granularity="DAILY"),
+        query("2025-01-01", "2025-02-01", tag_key="Project"),
+    ):
+        assert cache_key(other) != cache_key(base)
+
+
+def test_a_period_is_final_only_once_it_has_settled():
+    today = datetime.date(2025, 6, 4)
+
+    # May, with End exclusive, settles three days after June 1
+    assert is_finalized("2025-06-01", today)
+    assert not is_finalized("2025-06-02", today)
+    # The open month never is
+    assert not is_finalized("2025-07-01", today)
+    assert not is_finalized("2025-06-05", today)
+
+
+def test_the_current_month_is_refreshed_after_the_ttl(memory_s3):
+    params = query(days_ago(10), days_ago(-20))
+    put_cached_pages(memory_s3, BUCKET, params, PAGES)
+
+    assert get_cached_pages(memory_s3, BUCKET, params) == PAGES
+    memory_s3.age(3601)
+    assert get_cached_pages(memory_s3, BUCKET, params) is None
+
+
+def test_a_just_closed_month_is_not_final_before_it_settles(memory_s3):
+    params = query(days_ago(32), days_ago(2))
+    put_cached_pages(memory_s3, BUCKET, params, PAGES)
+    memory_s3.age(3601)
+
+    assert get_cached_pages(memory_s3, BUCKET, params) is None
+
+
+def test_a_finalized_period_never_expires(memory_s3):
+    params = query(days_ago(40), days_ago(3))
+    put_cached_pages(memory_s3, BUCKET, params, PAGES)
+    memory_s3.age(365 * 86400)
+
+    assert get_cached_pages(memory_s3, BUCKET, params) == PAGES
+
+
+def test_response_metadata_is_not_cached(memory_s3):
+    params = query(days_ago(40), days_ago(10))
+    put_cached_pages(
+        memory_s3, BUCKET, params, [{"ResultsByTime": [], "ResponseMetadata": {}}]
+    )
+
+    assert get_cached_pages(memory_s3, BUCKET, params) == [{"ResultsByTime": []}]
+
+
+def test_missing_or_unreadable_entries_are_misses(memory_s3):
+    params = query(days_ago(40), days_ago(10))
+
+    assert get_cached_pages(memory_s3, BUCKET, params) is None
+    memory_s3.put_object(BUCKET, cache_key(params), b"not gzip", "application/gzip")
+    assert get_cached_pages(memory_s3, BUCKET, params) is None
+
+
+def test_disabled_cache_neither_reads_nor_writes(memory_s3, monkeypatch):
+    params = query(days_ago(40), days_ago(10))
+    put_cached_pages(memory_s3, BUCKET, params, PAGES)
+    monkeypatch.setattr(cost_cache, "COST_CACHE_ENABLED", False)
+
+    assert get_cached_pages(memory_s3, BUCKET, params) is None
+    put_cached_pages(memory_s3, BUCKET, query("2024-01-01", "2024-02-01"), PAGES)
+    assert len(memory_s3.objects) == 1
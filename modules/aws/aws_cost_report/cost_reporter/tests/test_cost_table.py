@@ -0,0 +1,67 @@
+from cost_table import CostTableBuilder
+
+
+def build(*rows):
+    builder = CostTableBuilder()
+    for tag, usage_type, cost in rows:
+        builder.add(tag, usage_type, cost)
+    return builder.build()
+
+
+def test_duplicate_tag_and_usage_pairs_are_summed():
+    table = build(("web", "a", 1.0), ("web", "b", 2.0), ("web", "a", 0.5))
+
+    assert len(table) == 2
+    assert list(table.iter_rows()) == [("web", "a", 1.5), ("web", "b", 2.0)]
+
+
+def test_rows_are_ordered_by_tag_case_insensitively_then_usage_type():
+    table = build(
+        ("beta", "z-usage", 1.0),
+        ("Alpha", "b-usage", 2.0),
+        ("beta", "a-usage", 3.0),
+        ("alpha", "a-usage", 4.0),
+        ("Alpha", "a-usage", 5.0),
+    )
+
+    # "Alpha" and "alpha" tie case-insensitively and keep first-seen order
+    assert table.tags == ["Alpha", "alpha", "beta"]
+    assert list(table.iter_rows()) == [
+        ("Alpha", "a-usage", 5.0),
+        ("Alpha", "b-usage", 2.0),
+        ("alpha", "a-usage", 4.0),
+        ("beta", "a-usage", 3.0),
+        ("beta", "z-usage", 1.0),
+    ]
+    assert list(table.offsets) == [0, 2, 3, 5]
+
+
+def test_usage_types_are_interned_across_tags():
+    table = build(("a", "BoxUsage", 1.0), ("b", "BoxUsage", 2.0))
+
+    assert table.usage_types == ["BoxUsage"]
+    assert list(table.usage_ids) == [0, 0]
+
+
+def test_summarize_thresholds_and_totals_each_tag():
+    table = build(
+        ("db", "storage", 0.004),
+        ("db", "io", 0.02),
+        ("web", "box", 10.0),
+        ("web", "transfer", 2.5),
+        ("idle", "ip", 0.001),
+    )
+
+    assert list(table.summarize(0.01)) == [
+        ("db", [("io", 0.02)], 0.02),
+        ("idle", [], 0.0),
+        ("web", [("box", 10.0), ("transfer", 2.5)], 12.5),
+    ]
+
+
+def test_empty_table():
+    table = CostTableBuilder().build()
+
+    assert len(table) == 0
+    assert list(table.iter_rows()) == []
+    assert list(table.summarize(0.0)) == []
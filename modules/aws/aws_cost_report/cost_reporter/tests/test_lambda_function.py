@@ -0,0 +1,216 @@
+import json
+import random
+import threading
+
+import boto3
+import cost_cache
+import lambda_function
+import pytest
+from botocore.stub import Stubber
+from lambda_function import (
+    UsageTypeClassifier,
+    load_usage_type_mapping,
+    merge_cost_pages,
+    split_time_period,
+)
+
+
+def group(tag, usage_type, amount):
+    return {
+        "Keys": [tag, usage_type],
+        "Metrics": {"UnblendedCost": {"Amount": str(amount), "Unit": "USD"}},
+    }
+
+
+def page(*groups):
+    return {"ResultsByTime": [{"Groups": list(groups)}]}
+
+
+def test_monthly_slices_end_on_month_boundaries():
+    assert split_time_period("2024-11-15", "2025-02-10", "MONTHLY") == [
+        ("2024-11-15", "2024-12-01"),
+        ("2024-12-01", "2025-01-01"),
+        ("2025-01-01", "2025-02-01"),
+        ("2025-02-01", "2025-02-10"),
+    ]
+
+
+def test_a_single_month_is_one_slice():
+    assert split_time_period("2025-01-01", "2025-02-01", "MONTHLY") == [
+        ("2025-01-01", "2025-02-01")
+    ]
+
+
+def test_daily_slices_cover_one_day_each():
+    assert split_time_period("2024-02-28", "2024-03-02", "DAILY") == [
+        ("2024-02-28", "2024-02-29"),
+        ("2024-02-29", "2024-03-01"),
+        ("2024-03-01", "2024-03-02"),
+    ]
+
+
+@pytest.mark.parametrize("granularity", ["MONTHLY", "DAILY"])
+def test_an_empty_period_has_no_slices(granularity):
+    assert split_time_period("2025-01-01", "2025-01-01", granularity) == []
+
+
+def test_merge_sums_groups_strips_the_tag_key_and_skips_blank_keys():
+    builder = lambda_function.CostTableBuilder()
+
+    merge_cost_pages(
+        [
+            page(
+                group("Name$web", "BoxUsage:t3.micro", 1.5),
+                group("", "BoxUsage:t3.micro", 9),  # no tag key at all
+                group(" ", "BoxUsage:t3.micro", 9),
+            ),
+            page(group("Name$web", "BoxUsage:t3.micro", 2.25)),
+        ],
+        builder,
+    )
+
+    assert list(builder.build().iter_rows()) == [("web", "BoxUsage:t3.micro", 3.75)]
+
+
+def test_slices_are_fetched_concurrently_and_merged_in_order(monkeypatch):
+    periods = split_time_period("2025-01-01", "2025-04-01", "MONTHLY")
+    # Every slice must be in flight at once to get past the barrier
+    barrier = threading.Barrier(len(periods), timeout=5)
+
+    def fetch_cost_pages(start, end):
+        barrier.wait()
+        return [page(group("Name$web", f"usage-{start}", 1.0))]
+
+    monkeypatch.setattr(lambda_function, "COST_SLICE_GRANULARITY", "MONTHLY")
+    monkeypatch.setattr(lambda_function, "COST_FETCH_MAX_WORKERS", len(periods))
+    monkeypatch.setattr(lambda_function, "fetch_cost_pages", fetch_cost_pages)
+    monkeypatch.setattr(
+        lambda_function,
+        "split_time_period",
+        lambda start, end: split_time_period(start, end, "MONTHLY"),
+    )
+
+    table = lambda_function.fetch_detailed_costs("2025-01-01", "2025-04-01")
+
+    assert [usage for _, usage, _ in table.iter_rows()] == [
+        f"usage-{start}" for start, _ in periods
+    ]
+
+
+def test_slice_pages_are_fetched_once_then_served_from_the_cache(
+    monkeypatch, memory_s3
+):
+    ce = boto3.client("ce", region_name="us-east-1")
+    monkeypatch.setattr(lambda_function, "ce", ce)
+    monkeypatch.setattr(lambda_function, "s3", memory_s3)
+    monkeypatch.setattr(cost_cache, "COST_CACHE_ENABLED", True)
+    expected = {
+        "TimePeriod": {"Start": "2024-01-01", "End": "2024-02-01"},
+        "Granularity": "MONTHLY",
+        "Metrics": ["UnblendedCost"],
+        "GroupBy": [
+            {"Type": "TAG", "Key": lambda_function.REPORT_TAG_KEY},
+            {"Type": "DIMENSION", "Key": "USAGE_TYPE"},
+        ],
+    }
+    first = {**page(group("Name$web", "a", 1)), "NextPageToken": "2"}
+    second = page(group("Name$web", "b", 2))
+
+    with Stubber(ce) as stubber:
+        stubber.add_response("get_cost_and_usage", first, expected)
+        stubber.add_response(
+            "get_cost_and_usage", second, {**expected, "NextPageToken": "2"}
+        )
+        assert lambda_function.fetch_cost_pages(
+            "2024-01-01", "2024-02-01", "MONTHLY"
+        ) == [first, second]
+        stubber.assert_no_pending_responses()
+
+        # No responses are queued: a Cost Explorer call would fail
+        assert lambda_function.fetch_cost_pages(
+            "2024-01-01", "2024-02-01", "MONTHLY"
+        ) == [first, second]
+
+
+def linear_classify(mapping, usage_type, default="Other"):
+    """The original scan: the first fragment in mapping order wins."""
+    for fragment, resource in mapping.items():
+        if fragment and fragment in usage_type:
+            return resource
+    return default
+
+
+def test_the_first_fragment_in_mapping_order_wins_not_the_leftmost():
+    classifier = UsageTypeClassifier(
+        {"VolumeUsage": "late match", "EBS:": "early match", "EBS:Vol": "longer"}
+    )
+
+    # "EBS:" starts earlier in the string, but "VolumeUsage" comes first
+    assert classifier.classify("USE1-EBS:VolumeUsage.gp3") == "late match"
+    assert classifier.classify("USE1-EBS:SnapshotUsage") == "early match"
+    assert classifier.classify("USE1-BoxUsage:t3.micro") == "Other"
+
+
+def test_overlapping_fragments_at_one_position_respect_mapping_order():
+    classifier = UsageTypeClassifier({"EC2-Other": "specific", "EC2": "generic"})
+
+    assert classifier.classify("EC2-Other:Usage") == "specific"
+    assert (
+        UsageTypeClassifier({"EC2": "generic", "EC2-Other": "specific"}).classify(
+            "EC2-Other:Usage"
+        )
+        == "generic"
+    )
+
+
+def test_classifier_matches_a_linear_scan_of_the_default_mapping():
+    mapping = load_usage_type_mapping()
+    classifier = UsageTypeClassifier(mapping)
+    fragments = list(mapping) + ["USE1-", "APS2-", ":t3.micro", "Other", "-Out-Bytes"]
+    rng = random.Random(0)
+
+    for _ in range(2000):
+        usage_type = "".join(rng.choice(fragments) for _ in range(rng.randint(0, 4)))
+        assert classifier.classify(usage_type) == linear_classify(mapping, usage_type)
+        # Memoized results are the same on a second look
+        assert classifier.classify(usage_type) == linear_classify(mapping, usage_type)
+
+
+def test_empty_mapping_classifies_everything_as_the_default():
+    assert UsageTypeClassifier({}, default="Unknown").classify("EC2") == "Unknown"
+
+
+def test_configured_mappings_take_precedence_over_the_builtin_ones(
+    monkeypatch, tmp_path
+):
+    mapping_file = tmp_path / "mapping.json"
+    mapping_file.write_text(json.dumps({"EC2": "From file", "Lambda": "Lambda"}))
+    monkeypatch.setenv("USAGE_TYPE_MAPPING_FILE", str(mapping_file))
+    monkeypatch.setenv("USAGE_TYPE_MAPPING", json.dumps({"Lambda": "Inline"}))
+
+    mapping = load_usage_type_mapping()
+
+    assert list(mapping)[:2] == ["EC2", "Lambda"]
+    assert mapping["EC2"] == "From file"
+    assert mapping["Lambda"] == "Inline"
+    assert mapping["NatGateway"] == "VPC / NAT Gateway"
+    assert UsageTypeClassifier(mapping).classify("USE1-EC2:BoxUsage") == "From file"
+
+
+class FakeSts:
+    def get_caller_identity(self):
+        return {"Account": "111111111111"}
+
+
+def test_pdf_lists_every_tag_above_the_threshold(monkeypatch, tmp_path):
+    builder = lambda_function.CostTableBuilder()
+    builder.add("web", "USE1-BoxUsage:t3.micro", 12.5)
+    builder.add("web", "USE1-DataTransfer-Out-Bytes", 0.001)
+    builder.add("db", "USE1-EBS:VolumeUsage.gp3", 3.0)
+    monkeypatch.setattr(lambda_function, "sts", FakeSts())
+    monkeypatch.setattr(lambda_function, "MIN_ITEM_COST", 0.01)
+    outfile = tmp_path / "report.pdf"
+
+    lambda_function.generate_pdf(builder.build(), "2025-01-01", "2025-02-01", outfile)
+
+    assert outfile.read_bytes().startswith(b"%PDF")
@@ -109,6 +109,15 @@ resource "aws_iam_role_policy" "cost_reporter_policy" {
           "${aws_s3_bucket.cost_report.arn}/*"
         ]
       },
+      {
+        Effect = "Allow",
+        Action = [
+          "s3:GetObject"
+        ],
+        Resource = [
+          "${aws_s3_bucket.cost_report.arn}/${var.cost_cache_prefix}*"
+        ]
+      },
       {
         Effect   = "Allow",
         Action   = ["logs:CreateLogGroup", "logs:CreateLogStream", "logs:PutLogEvents"],
@@ -132,10 +141,16 @@ resource "aws_lambda_function" "cost_reporter" {
   memory_size      = var.lambda_memory_size
   environment {
     variables = {
-      REPORT_BUCKET       = aws_s3_bucket.cost_report.id
-      REPORT_TAG_KEY      = var.report_tag_key
-      SCHEDULE_EXPRESSION = var.schedule_expression
-      CUSTOMER_IDENTIFIER = local.customer_identifier
+      REPORT_BUCKET          = aws_s3_bucket.cost_report.id
+      REPORT_TAG_KEY         = var.report_tag_key
+      SCHEDULE_EXPRESSION    = var.schedule_expression
+      CUSTOMER_IDENTIFIER    = local.customer_identifier
+      COST_SLICE_GRANULARITY = var.cost_slice_granularity
+      COST_FETCH_MAX_WORKERS = tostring(var.cost_fetch_max_workers)
+      COST_CACHE_ENABLED     = tostring(var.enable_cost_cache)
+      COST_CACHE_PREFIX      = var.cost_cache_prefix
+      COST_CACHE_TTL_SECONDS = tostring(var.cost_cache_ttl_seconds)
+      USAGE_TYPE_MAPPING     = jsonencode(var.usage_type_mapping)
     }
   }
   tags = merge(var.tags, { Customer = local.customer_identifier })
@@ -85,6 +85,47 @@ variable "lambda_timeout" {
   default     = 180
 }
 
+variable "cost_slice_granularity" {
+  description = "How the report period is split into Cost Explorer queries that run in parallel: MONTHLY (one query per calendar month) or DAILY (one query per day)."
+  type        = string
+  default     = "MONTHLY"
+
+  validation {
+    condition     = contains(["MONTHLY", "DAILY"], var.cost_slice_granularity)
+    error_message = "The cost_slice_granularity must be either MONTHLY or DAILY."
+  }
+}
+
+variable "cost_fetch_max_workers" {
+  description = "Maximum number of Cost Explorer slice queries run concurrently."
+  type        = number
+  default     = 4
+}
+
+variable "enable_cost_cache" {
+  description = "Cache raw Cost Explorer responses in the report bucket so re-runs and backfills of closed periods are not re-queried (and re-billed)."
+  type        = bool
+  default     = true
+}
+
+variable "cost_cache_prefix" {
+  description = "S3 key prefix for cached Cost Explorer responses."
+  type        = string
+  default     = "cost-explorer-cache/"
+}
+
+variable "cost_cache_ttl_seconds" {
+  description = "Lifetime (seconds) of cached responses for periods that are not yet finalized (the open month). Finalized periods never expire."
+  type        = number
+  default     = 21600
+}
+
+variable "usage_type_mapping" {
+  description = "Additional usage-type fragment to resource-type mappings (e.g. { \"Lambda-GB-Second\" = \"Lambda\" }). These take precedence over the built-in mappings; Terraform orders map keys lexically, so among custom entries the lexically first matching fragment wins."
+  type        = map(string)
+  default     = {}
+}
+
 variable "tags" {
   description = "A map of tags to apply to all resources."
   type        = map(string)
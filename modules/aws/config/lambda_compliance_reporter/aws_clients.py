@@ -0,0 +1,131 @@
+"""
+Shared boto3 session and client pool for the compliance reporter.
+
+Clients are created once per execution environment and reused across warm
+invocations and worker threads (boto3 clients are thread-safe, sessions are
+not, so construction is serialized behind a lock). Every client shares one
+botocore Config with a connection pool sized for the concurrent fetch stages,
+adaptive retries for throttling, and bounded connect/read timeouts.
+
+Clients for another account are built on a session whose credentials come
+from sts:AssumeRole and refresh themselves before they expire, so they can be
+cached across warm invocations like the default ones. Each (service, role)
+gets its own client and therefore its own adaptive-retry rate limiter,
+so throttling in one account does not slow down another.
+
+Environment variables (all optional):
+- AWS_CLIENT_MAX_POOL_CONNECTIONS: HTTP connections per client (default 32)
+- AWS_CLIENT_MAX_ATTEMPTS: total attempts including retries (default 10)
+- AWS_CLIENT_CONNECT_TIMEOUT: connect timeout in seconds (default 5)
+- AWS_CLIENT_READ_TIMEOUT: read timeout in seconds (default 60)
+"""
+
+import os
+import threading
+
+import boto3
+import botocore.session
+from botocore.config import Config
+from botocore.credentials import (
+    AssumeRoleCredentialFetcher,
+    CredentialProvider,
+    DeferredRefreshableCredentials,
+)
+
+CLIENT_CONFIG = Config(
+    max_pool_connections=int(os.environ.get("AWS_CLIENT_MAX_POOL_CONNECTIONS", "32")),
+    retries={
+        "max_attempts": int(os.environ.get("AWS_CLIENT_MAX_ATTEMPTS", "10")),
+        "mode": "adaptive",
+    },
+    connect_timeout=float(os.environ.get("AWS_CLIENT_CONNECT_TIMEOUT", "5")),
+    read_timeout=float(os.environ.get("AWS_CLIENT_READ_TIMEOUT", "60")),
+)
+
+_lock = threading.Lock()
+_session = None
+_role_sessions = {}
+_clients = {}
+
+
+def get_session():
+    """Return the module-level boto3 session, creating it on first use."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = boto3.session.Session()
+        return _session
+
+
+class RoleCredentialProvider(CredentialProvider):
+    """
+    Credential provider that assumes one IAM role.
+
+    botocore's AssumeRoleCredentialFetcher calls sts:AssumeRole with the
+    execution role's credentials, and DeferredRefreshableCredentials calls it
+    on first use and again shortly before the credentials expire.
+    """
+
+    METHOD = "report-assume-role"
+
+    def __init__(self, role_arn, session_name):
+        super().__init__()
+        # A private botocore session, so this role's refreshes build their STS
+        # client without touching sessions shared with other threads
+        source = botocore.session.Session()
+        self._fetcher = AssumeRoleCredentialFetcher(
+            client_creator=source.create_client,
+            source_credentials=source.get_credentials(),
+            role_arn=role_arn,
+            extra_args={"RoleSessionName": session_name},
+        )
+
+    def load(self):
+        return DeferredRefreshableCredentials(
+            refresh_using=self._fetcher.fetch_credentials, method=self.METHOD
+        )
+
+
+def get_role_session(role_arn, session_name="report-lambda"):
+    """
+    Return a boto3 session acting as role_arn, creating it on first use.
+
+    The session's credential resolver tries RoleCredentialProvider first, so
+    its clients sign with the assumed role's credentials.
+    """
+    session = _role_sessions.get(role_arn)
+    if session is not None:
+        return session
+    core = botocore.session.Session()
+    core.get_component("credential_provider").insert_before(
+        "env", RoleCredentialProvider(role_arn, session_name)
+    )
+    with _lock:  # built outside the lock; first session wins
+        return _role_sessions.setdefault(
+            role_arn, boto3.session.Session(botocore_session=core)
+        )
+
+
+def get_client(service_name, role_arn=None):
+    """
+    Return a pooled client for (service_name, role_arn) in the Lambda's region.
+
+    Parameters:
+        service_name (str): boto3 service name, e.g. "config" or "s3".
+        role_arn (str | None): IAM role to act as (see get_role_session); None
+            uses the execution role.
+
+    Returns:
+        botocore.client.BaseClient: Cached client configured with CLIENT_CONFIG.
+    """
+    key = (service_name, role_arn)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+    session = get_role_session(role_arn) if role_arn else get_session()
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = session.client(service_name, config=CLIENT_CONFIG)
+            _clients[key] = client
+        return client
@@ -0,0 +1,110 @@
+"""
+AWS Config advanced-query engine for non-compliant resource details.
+
+The default ("api") engine calls get_compliance_details_by_config_rule once
+per NON_COMPLIANT rule, so a report costs 2+N paginated API streams. The
+"query" engine instead reads every NON_COMPLIANT AWS::Config::ResourceCompliance
+configuration item with one select_resource_config stream (or
+select_aggregate_resource_config against an aggregator, filtered to one
+account and region), at up to 100 items per request, and groups the items by
+rule. Each item's configRuleList says which rules flagged the resource.
+
+Rule descriptions and the per-rule INSUFFICIENT_DATA status are not part of
+ResourceCompliance items, so describe_config_rules and
+describe_compliance_by_config_rule still run; only the per-rule detail
+streams are replaced.
+"""
+
+import json
+import re
+
+QUERY_PAGE_SIZE = 100  # Maximum Limit accepted by the select_* APIs
+
+RESOURCE_COMPLIANCE_QUERY = (
+    "SELECT configuration.targetResourceId, configuration.targetResourceType, "
+    "configuration.configRuleList "
+    "WHERE resourceType = 'AWS::Config::ResourceCompliance' "
+    "AND configuration.complianceType = 'NON_COMPLIANT'"
+)
+
+# Values interpolated into aggregator queries must match these exactly
+ACCOUNT_ID_PATTERN = re.compile(r"[0-9]{12}")
+REGION_PATTERN = re.compile(r"[a-z]{2}(-[a-z]+)+-[0-9]+")
+
+
+def aggregate_query(account_id, region):
+    """
+    RESOURCE_COMPLIANCE_QUERY restricted to one account and region.
+
+    Raises:
+        ValueError: account_id is not 12 digits or region is not a region
+            name, so neither can change the meaning of the query.
+    """
+    if not isinstance(account_id, str) or not ACCOUNT_ID_PATTERN.fullmatch(account_id):
+        raise ValueError(f"invalid AWS account ID for aggregator query: {account_id!r}")
+    if not isinstance(region, str) or not REGION_PATTERN.fullmatch(region):
+        raise ValueError(f"invalid AWS region for aggregator query: {region!r}")
+    return (
+        f"{RESOURCE_COMPLIANCE_QUERY} "
+        f"AND accountId = '{account_id}' AND awsRegion = '{region}'"
+    )
+
+
+def select_resource_compliance(config, aggregator_name=None, account_id=None):
+    """
+    Yield the configuration of every NON_COMPLIANT ResourceCompliance item.
+
+    Parameters:
+        config: boto3 Config client (its region scopes aggregator queries).
+        aggregator_name (str | None): Query this configuration aggregator
+            instead of the client's own account.
+        account_id (str | None): Account to select from the aggregator.
+
+    Yields:
+        dict: {"targetResourceId", "targetResourceType", "configRuleList"}.
+    """
+    if aggregator_name:
+        paginator = config.get_paginator("select_aggregate_resource_config")
+        pages = paginator.paginate(
+            Expression=aggregate_query(account_id, config.meta.region_name),
+            ConfigurationAggregatorName=aggregator_name,
+            PaginationConfig={"PageSize": QUERY_PAGE_SIZE},
+        )
+    else:
+        paginator = config.get_paginator("select_resource_config")
+        pages = paginator.paginate(
+            Expression=RESOURCE_COMPLIANCE_QUERY,
+            PaginationConfig={"PageSize": QUERY_PAGE_SIZE},
+        )
+    for page in pages:
+        for result in page["Results"]:
+            yield json.loads(result)["configuration"]
+
+
+def query_non_compliant_resources(config, rule_names, to_row, **query):
+    """
+    Group NON_COMPLIANT resources by rule from one advanced-query stream.
+
+    Parameters:
+        config: boto3 Config client.
+        rule_names (list[str]): Rules to report, in report order.
+        to_row (callable): (resource_type, resource_id) -> row dict, the same
+            mapping the per-rule API engine applies.
+        **query: aggregator_name / account_id for select_resource_compliance.
+
+    Returns:
+        list[tuple[str, list[dict]]]: (rule_name, rows) in rule_names order,
+        rows sorted by resource type and ID.
+    """
+    wanted = set(rule_names)
+    flagged = {name: set() for name in rule_names}
+    for item in select_resource_compliance(config, **query):
+        resource = (item["targetResourceType"], item["targetResourceId"])
+        for rule in item.get("configRuleList", []):
+            name = rule.get("configRuleName")
+            if name in wanted and rule.get("complianceType") == "NON_COMPLIANT":
+                flagged[name].add(resource)
+    return [
+        (name, [to_row(*resource) for resource in sorted(flagged[name])])
+        for name in rule_names
+    ]
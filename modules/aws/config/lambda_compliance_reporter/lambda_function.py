@@ -1,35 +1,120 @@
 import io
 import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
-import boto3
+from aws_clients import get_client
+from config_query import query_non_compliant_resources
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
-
-
-def lookup_iam_username_by_id(user_id):
+from reportlab.platypus import (
+    PageBreak,
+    Paragraph,
+    SimpleDocTemplate,
+    Spacer,
+    Table,
+    TableStyle,
+)
+from s3_stream import S3MultipartWriter
+from snapshot import (
+    load_snapshot,
+    rule_fingerprint,
+    save_snapshot,
+    split_cached_rules,
+)
+
+# Upper bound on concurrent get_compliance_details_by_config_rule streams
+RULE_FETCH_MAX_WORKERS = int(os.environ.get("RULE_FETCH_MAX_WORKERS", "8"))
+# "stream" uploads the PDF via S3 multipart as it is written; "buffer" builds
+# the whole document in memory first
+REPORT_OUTPUT_MODE = os.environ.get("REPORT_OUTPUT_MODE", "stream").lower()
+# Reuse cached rows for rules whose evaluation has not changed since last run
+INCREMENTAL_SNAPSHOTS = (
+    os.environ.get("REPORTER_INCREMENTAL_SNAPSHOTS", "true").lower() == "true"
+)
+SNAPSHOT_KEY_NAME = "state/compliance-snapshot.jsonl.gz"
+# "account" reports on the account the Lambda runs in; "organization" lists
+# the Organization's active accounts and reports on each via an assumed role
+REPORT_SCOPE = os.environ.get("REPORT_SCOPE", "account").lower()
+ORG_MEMBER_ROLE_NAME = os.environ.get(
+    "ORG_MEMBER_ROLE_NAME", "OrganizationAccountAccessRole"
+)
+# Optional comma-separated allow-list of account IDs for organization scope
+ORG_ACCOUNT_IDS = [
+    a.strip() for a in os.environ.get("ORG_ACCOUNT_IDS", "").split(",") if a.strip()
+]
+# Accounts collected concurrently; each also runs up to RULE_FETCH_MAX_WORKERS
+ORG_MAX_CONCURRENT_ACCOUNTS = int(os.environ.get("ORG_MAX_CONCURRENT_ACCOUNTS", "4"))
+# "per_account" writes one PDF per account; "combined" writes one for all
+ORG_REPORT_LAYOUT = os.environ.get("ORG_REPORT_LAYOUT", "per_account").lower()
+# "api" fetches non-compliant resources per rule; "query" uses one AWS Config
+# advanced query (see config_query.py), against CONFIG_AGGREGATOR_NAME if set
+COMPLIANCE_ENGINE = os.environ.get("COMPLIANCE_ENGINE", "api").lower()
+CONFIG_AGGREGATOR_NAME = os.environ.get("CONFIG_AGGREGATOR_NAME") or None
+# Rules-table status cell colours
+STATUS_COLORS = {
+    "COMPLIANT": colors.lightgreen,
+    "NON_COMPLIANT": colors.lightpink,
+    "N/A": colors.lightgrey,
+}
+# The vendored reportlab (package/) understands CELLBACKGROUNDS; a stock one
+# silently ignores it, so status_backgrounds falls back to per-cell commands
+CELLBACKGROUNDS_SUPPORTED = hasattr(Table, "_drawCellBackgrounds")
+
+
+class IamUserDirectory:
     """
-    Given the internal IAM UserId (AIDA…), return the console username
-    by paging through IAM ListUsers.
+    Per-invocation index of IAM users keyed by internal UserId (AIDA…).
+
+    ListUsers is paged through once, on first use, and every later lookup is
+    served from the in-memory maps instead of re-listing users (and calling
+    GetUser / GetCallerIdentity) for each non-compliant resource.
     """
-    iam = boto3.client("iam")
-    paginator = iam.get_paginator("list_users")
-    for page in paginator.paginate():
-        for u in page.get("Users", []):
-            if u.get("UserId") == user_id:
-                return u.get("UserName")
-    # if we didn’t find it, just return the ID
-    return user_id
+
+    def __init__(self, iam=None, account_id=None):
+        self._iam = iam or get_client("iam")
+        self._account_id = account_id
+        self._by_id = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        by_id = {}
+        paginator = self._iam.get_paginator("list_users")
+        for page in paginator.paginate():
+            for u in page.get("Users", []):
+                by_id[u["UserId"]] = (u["UserName"], u["Arn"])
+        self._by_id = by_id
+
+    def _fallback_arn(self, user_name):
+        with self._lock:
+            if self._account_id is None:
+                sts = get_client("sts")
+                self._account_id = sts.get_caller_identity()["Account"]
+        return f"arn:aws:iam::{self._account_id}:user/{user_name}"
+
+    def lookup(self, user_id):
+        """
+        Return (UserName, Arn) for the given UserId. Users that no longer
+        exist in IAM fall back to the ID as the name and a constructed ARN.
+        """
+        with self._lock:
+            if self._by_id is None:
+                self._load()
+        found = self._by_id.get(user_id)
+        if found:
+            return found
+        return user_id, self._fallback_arn(user_id)
 
 
 def get_account_info():
     import os
 
-    sts = boto3.client("sts")
-    org = boto3.client("organizations")
+    sts = get_client("sts")
+    org = get_client("organizations")
     account_id = sts.get_caller_identity()["Account"]
     # 1. Try Organizations API
     try:
@@ -43,7 +128,7 @@ def get_account_info():
     if account_env:
         return account_env, account_id
     # 3. Fallback to IAM alias
-    iam = boto3.client("iam")
+    iam = get_client("iam")
     try:
         aliases = iam.list_account_aliases().get("AccountAliases", [])
         alias = aliases[0] if aliases else "N/A"
@@ -52,8 +137,8 @@ def get_account_info():
     return alias, account_id
 
 
-def get_config_rules():
-    config = boto3.client("config")
+def get_config_rules(role_arn=None):
+    config = get_client("config", role_arn=role_arn)
     rules = []
     paginator = config.get_paginator("describe_config_rules")
     for page in paginator.paginate():
@@ -61,8 +146,8 @@ def get_config_rules():
     return rules
 
 
-def get_compliance_status():
-    config = boto3.client("config")
+def get_compliance_status(role_arn=None):
+    config = get_client("config", role_arn=role_arn)
     status = {}
     paginator = config.get_paginator("describe_compliance_by_config_rule")
     for page in paginator.paginate():
@@ -71,8 +156,64 @@ def get_compliance_status():
     return status
 
 
-def get_non_compliant_resources(rule_name):
-    config = boto3.client("config")
+# ConfigRuleNames accepts at most 25 names per DescribeConfigRuleEvaluationStatus
+EVALUATION_STATUS_MAX_RULES = 25
+
+
+def get_rule_evaluation_times(rule_names, role_arn=None):
+    """
+    Return {rule name: LastSuccessfulEvaluationTime} for the given Config rules.
+
+    Without ConfigRuleNames the API only reports AWS managed rules, so the
+    names are always passed, EVALUATION_STATUS_MAX_RULES at a time, to cover
+    custom Lambda and Guard rules too. Rules that have never been evaluated
+    successfully are omitted.
+    """
+    times = {}
+    if not rule_names:
+        return times
+    config = get_client("config", role_arn=role_arn)
+    paginator = config.get_paginator("describe_config_rule_evaluation_status")
+    for i in range(0, len(rule_names), EVALUATION_STATUS_MAX_RULES):
+        batch = rule_names[i : i + EVALUATION_STATUS_MAX_RULES]
+        for page in paginator.paginate(ConfigRuleNames=batch):
+            for status in page["ConfigRulesEvaluationStatus"]:
+                last = status.get("LastSuccessfulEvaluationTime")
+                if last is not None:
+                    times[status["ConfigRuleName"]] = last
+    return times
+
+
+def resource_row(res, users):
+    """
+    Map an evaluated resource (ResourceType, ResourceId and optionally
+    ResourceName / ResourceArn) to the row dict the report is built from.
+    """
+    if res["ResourceType"] == "AWS::IAM::User":
+        user_id = res["ResourceId"]
+        # Turn the internal ID into the login name and real ARN
+        user_name, arn = users.lookup(user_id)
+
+        return {
+            "ResourceType": "AWS::IAM::User",
+            "ResourceId": user_id,
+            "ResourceName": user_name,
+            "ResourceArn": arn,
+        }
+
+    return {
+        "ResourceType": res["ResourceType"],
+        "ResourceId": res["ResourceId"],
+        "ResourceName": res.get("ResourceName", res["ResourceId"]),
+        "ResourceArn": res.get("ResourceArn", res["ResourceId"]),
+    }
+
+
+def get_non_compliant_resources(rule_name, users=None, config=None):
+    if config is None:
+        config = get_client("config")
+    if users is None:
+        users = IamUserDirectory()
     resources = []
     paginator = config.get_paginator("get_compliance_details_by_config_rule")
 
@@ -81,58 +222,121 @@ def get_non_compliant_resources(rule_name):
     ):
         for result in page["EvaluationResults"]:
             res = result["EvaluationResultIdentifier"]["EvaluationResultQualifier"]
+            resources.append(resource_row(res, users))
 
-            if res["ResourceType"] == "AWS::IAM::User":
-                user_id = res["ResourceId"]
-                # Turn the internal ID into the login name
-                user_name = lookup_iam_username_by_id(user_id)
-
-                # Fetch the real ARN
-                iam = boto3.client("iam")
-                try:
-                    arn = iam.get_user(UserName=user_name)["User"]["Arn"]
-                except iam.exceptions.NoSuchEntityException:
-                    # Fallback if the user no longer exists in IAM
-                    account_id = boto3.client("sts").get_caller_identity()["Account"]
-                    arn = f"arn:aws:iam::{account_id}:user/{user_name}"
-
-                resources.append(
-                    {
-                        "ResourceType": "AWS::IAM::User",
-                        "ResourceId": user_id,
-                        "ResourceName": user_name,
-                        "ResourceArn": arn,
-                    }
-                )
+    return resources
 
-            else:
-                resources.append(
-                    {
-                        "ResourceType": res["ResourceType"],
-                        "ResourceId": res["ResourceId"],
-                        "ResourceName": res.get("ResourceName", res["ResourceId"]),
-                        "ResourceArn": res.get("ResourceArn", res["ResourceId"]),
-                    }
-                )
 
-    return resources
+def query_rule_resources(rule_names, users, account_id, role_arn=None):
+    """
+    Fetch non-compliant resources for many rules with one advanced query.
 
+    Returns the same (rule_name, resources) pairs, in rule_names order, as
+    fetch_non_compliant_resources. With CONFIG_AGGREGATOR_NAME set, the query
+    runs against that aggregator in the reporter's own account (so member
+    accounts need no query access); otherwise against the account itself.
+    """
+    if not rule_names:
+        return []
+    if CONFIG_AGGREGATOR_NAME:
+        config = get_client("config")
+    else:
+        config = get_client("config", role_arn=role_arn)
+    return query_non_compliant_resources(
+        config,
+        rule_names,
+        lambda resource_type, resource_id: resource_row(
+            {"ResourceType": resource_type, "ResourceId": resource_id}, users
+        ),
+        aggregator_name=CONFIG_AGGREGATOR_NAME,
+        account_id=account_id,
+    )
+
+
+def fetch_non_compliant_resources(rule_names, users, max_workers=None, role_arn=None):
+    """
+    Fetch non-compliant resources for many rules in parallel.
+
+    Every worker shares the pooled Config client, whose adaptive retries back
+    off client-side on throttling instead of failing the report. Results are
+    returned as (rule_name, resources) pairs in the same order as rule_names,
+    keeping the PDF deterministic.
+    """
+    if not rule_names:
+        return []
+    workers = min(max_workers or RULE_FETCH_MAX_WORKERS, len(rule_names))
+    config = get_client("config", role_arn=role_arn)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(
+            lambda name: get_non_compliant_resources(name, users, config),
+            rule_names,
+        )
+        return list(zip(rule_names, results))
+
+
+# Config resource type -> Resource Groups Tagging API type filter. Other types
+# are swept by service ("AWS::Lambda::Function" -> "lambda").
+TAGGING_RESOURCE_TYPES = {
+    "AWS::EC2::Volume": "ec2:volume",
+    "AWS::EC2::EIP": "ec2:elastic-ip",
+    "AWS::EC2::Instance": "ec2:instance",
+    "AWS::S3::Bucket": "s3",
+    "AWS::RDS::DBInstance": "rds:db",
+}
+TAGGING_API_PAGE_SIZE = 100  # Maximum ResourcesPerPage for GetResources
+
+
+def tagging_resource_type(resource_type):
+    """Return the GetResources ResourceTypeFilters entry for a Config type."""
+    if resource_type in TAGGING_RESOURCE_TYPES:
+        return TAGGING_RESOURCE_TYPES[resource_type]
+    return resource_type.split("::")[1].lower()
 
-def get_resource_name_from_tag(arn_or_id):
-    client = boto3.client("resourcegroupstaggingapi")
-    try:
-        response = client.get_resources(ResourceARNList=[arn_or_id])
-        for resource in response.get("ResourceTagMappingList", []):
-            for tag in resource.get("Tags", []):
-                if tag["Key"] == "Name":
-                    return tag["Value"]
-    except Exception:
-        pass
-    return arn_or_id
+
+def arn_resource_id(arn):
+    """Return the resource ID an ARN ends with ("vol-1", a bucket name...)."""
+    return re.split(r"[/:]", arn.split(":", 5)[-1])[-1]
+
+
+def get_resource_names_from_tags(resources, role_arn=None):
+    """
+    Build a (resource type, resource ID) -> Name tag index for many resources.
+
+    Config evaluation results carry resource IDs, not ARNs, so the tagging API
+    is swept once per resource type in the report (GetResources filtered by
+    type and by the Name tag key, paginated) instead of once per resource.
+    Tagged resources are indexed by the ID their ARN ends with. Resources
+    without a Name tag are absent from the result.
+    """
+    wanted = {}
+    for res in resources:
+        wanted.setdefault(res["ResourceType"], set()).add(res["ResourceId"])
+    names = {}
+    if not wanted:
+        return names
+    client = get_client("resourcegroupstaggingapi", role_arn=role_arn)
+    paginator = client.get_paginator("get_resources")
+    for resource_type, resource_ids in sorted(wanted.items()):
+        try:
+            for page in paginator.paginate(
+                ResourceTypeFilters=[tagging_resource_type(resource_type)],
+                TagFilters=[{"Key": "Name"}],
+                PaginationConfig={"PageSize": TAGGING_API_PAGE_SIZE},
+            ):
+                for resource in page.get("ResourceTagMappingList", []):
+                    resource_id = arn_resource_id(resource["ResourceARN"])
+                    if resource_id not in resource_ids:
+                        continue
+                    for tag in resource.get("Tags", []):
+                        if tag["Key"] == "Name":
+                            names[(resource_type, resource_id)] = tag["Value"]
+        except Exception as e:
+            print(f"ERROR: Failed to fetch Name tags for {resource_type}: {e}")
+    return names
 
 
 def get_iam_user_name(user_id):
-    iam = boto3.client("iam")
+    iam = get_client("iam")
     try:
         response = iam.get_user(UserName=user_id)
         return response["User"]["UserName"]
@@ -140,55 +344,44 @@ def get_iam_user_name(user_id):
         return user_id
 
 
-def lambda_handler(event, context):
+def list_organization_accounts():
     """
-    AWS Lambda entry point to generate a compliance report for AWS Config rules
-    and upload the report as a PDF to S3.
-
-    Steps performed:
-    1. Fetch AWS account info (name and ID).
-    2. Get the current UTC timestamp for the report.
-    3. Retrieve all AWS Config rules and their compliance status.
-    4. Count compliant, non-compliant, and insufficient data rules for summary.
-    5. Build a table summarizing compliance status for each rule.
-    6. For each non-compliant rule, gather details of non-compliant resources,
-       including IAM usernames and resource names/tags.
-    7. Build a detailed section listing all non-compliant resources.
-    8. Create a PDF report using ReportLab, including:
-       - Title and account info
-       - Compliance summary table
-       - Rule-by-rule compliance status
-       - Non-compliant resources
-    9. Upload the generated PDF to an S3 bucket, using environment variables
-       for bucket and prefix if set.
-    10. Return a status message with the S3 location of the uploaded report.
+    Return [(account name, account ID)] for every ACTIVE account in the
+    Organization, restricted to ORG_ACCOUNT_IDS when set.
+    """
+    org = get_client("organizations")
+    accounts = []
+    paginator = org.get_paginator("list_accounts")
+    for page in paginator.paginate():
+        for account in page["Accounts"]:
+            if account["Status"] != "ACTIVE":
+                continue
+            if ORG_ACCOUNT_IDS and account["Id"] not in ORG_ACCOUNT_IDS:
+                continue
+            accounts.append((account["Name"], account["Id"]))
+    return accounts
+
+
+def collect_account_report(
+    account_name, account_id, s3, bucket, snapshot_key, role_arn=None
+):
+    """
+    Gather everything one account's report section shows.
 
-    Args:
-        event (dict): Lambda event input (not used).
-        context (LambdaContext): Lambda context object (not used).
+    All Config, IAM and tagging calls go through clients acting as role_arn
+    (the execution role when None). With incremental snapshots enabled, rules
+    whose compliance and last evaluation time are unchanged since the previous
+    run reuse the rows stored at snapshot_key. With COMPLIANCE_ENGINE=query,
+    non-compliant resources for all rules come from a single advanced query
+    instead (no snapshot is needed).
 
     Returns:
-        dict: Status code and S3 path of the uploaded compliance report PDF.
+        dict: account_name, account_id, rules, compliance (INSUFFICIENT_DATA
+        shown as N/A), compliant/non_compliant/insufficient_data counts, and
+        non_compliant_section rows of [display name, resource type, ARN].
     """
-    account_name, account_id = get_account_info()
-    now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
-    rules = get_config_rules()
-    compliance = get_compliance_status()
-
-    # Define styles for PDF
-    styles = getSampleStyleSheet()
-    title_style = styles["Heading1"]
-    subtitle_style = styles["Heading2"]
-    subtitle_style.alignment = TA_CENTER
-    normal_style = styles["Normal"]
-    small_style = ParagraphStyle("small", fontSize=9, leading=12)
-    table_header_style = ParagraphStyle(
-        "table_header",
-        fontSize=11,
-        leading=14,
-        alignment=TA_CENTER,
-        fontName="Helvetica-Bold",
-    )
+    rules = get_config_rules(role_arn)
+    compliance = get_compliance_status(role_arn)
 
     # Prepare data for tables
     compliant_count = sum(1 for v in compliance.values() if v == "COMPLIANT")
@@ -203,57 +396,264 @@ def lambda_handler(event, context):
             compliance[rule_name] = "N/A"
 
     # Non-compliant resources section
+    # One IAM user directory per account: ListUsers is paged once and
+    # shared by every rule that reports AWS::IAM::User resources.
+    users = IamUserDirectory(get_client("iam", role_arn=role_arn), account_id)
+    non_compliant_rules = [
+        rule["ConfigRuleName"]
+        for rule in rules
+        if compliance.get(rule["ConfigRuleName"]) == "NON_COMPLIANT"
+    ]
+
+    if COMPLIANCE_ENGINE == "query":
+        # One bulk advanced-query stream instead of one stream per rule
+        fetched = query_rule_resources(non_compliant_rules, users, account_id, role_arn)
+    elif INCREMENTAL_SNAPSHOTS:
+        # Only re-fetch rules whose compliance or last evaluation changed
+        previous = load_snapshot(s3, bucket, snapshot_key)
+        evaluated = get_rule_evaluation_times(non_compliant_rules, role_arn)
+        fingerprints = {
+            name: rule_fingerprint(compliance[name], evaluated.get(name))
+            for name in non_compliant_rules
+        }
+        cached, stale = split_cached_rules(previous, fingerprints)
+        print(
+            f"Snapshot ({account_id}): reusing {len(cached)} rules, "
+            f"fetching {len(stale)}"
+        )
+        refreshed = dict(fetch_non_compliant_resources(stale, users, role_arn=role_arn))
+        fetched = [
+            (name, cached[name] if name in cached else refreshed[name])
+            for name in non_compliant_rules
+        ]
+        save_snapshot(
+            s3,
+            bucket,
+            snapshot_key,
+            (
+                {
+                    "rule": name,
+                    "fingerprint": fingerprints[name],
+                    "resources": resources,
+                }
+                for name, resources in fetched
+            ),
+        )
+    else:
+        fetched = fetch_non_compliant_resources(
+            non_compliant_rules, users, role_arn=role_arn
+        )
+
+    # Resolve Name tags for every resource in the report in bulk
+    name_tags = get_resource_names_from_tags(
+        (
+            res
+            for _, resources in fetched
+            for res in resources
+            if res["ResourceType"] != "AWS::IAM::User"
+        ),
+        role_arn,
+    )
+
     non_compliant_section = []
-    for rule in rules:
-        name = rule["ConfigRuleName"]
-        if compliance.get(name) == "NON_COMPLIANT":
-            non_compliant_resources = get_non_compliant_resources(name)
-            if non_compliant_resources:
-                non_compliant_section.append([f"Rule: {name}", "", ""])
-                for res in non_compliant_resources:
-                    arn = res["ResourceArn"]
-
-                    if res["ResourceType"] == "AWS::IAM::User":
-                        # Use the console username we looked up earlier
-                        display_name = f"{res['ResourceName']} (IAM Username)"
-                    else:
-                        # For other resources, try to use the Name tag if present
-                        display_name = get_resource_name_from_tag(arn)
-
-                    non_compliant_section.append(
-                        [display_name, res["ResourceType"], arn]
+    for name, non_compliant_resources in fetched:
+        if non_compliant_resources:
+            non_compliant_section.append([f"Rule: {name}", "", ""])
+            for res in non_compliant_resources:
+                arn = res["ResourceArn"]
+
+                if res["ResourceType"] == "AWS::IAM::User":
+                    # Use the console username we looked up earlier
+                    display_name = f"{res['ResourceName']} (IAM Username)"
+                else:
+                    # For other resources, use the Name tag if present
+                    display_name = name_tags.get(
+                        (res["ResourceType"], res["ResourceId"]), arn
                     )
 
+                non_compliant_section.append([display_name, res["ResourceType"], arn])
+
     # ── DEBUG FINAL ROWS ──
     print("DEBUG final non_compliant_section:", non_compliant_section)
     # ── END DEBUG FINAL ROWS ──
 
-    # Build PDF (unchanged) …
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=letter,
-        rightMargin=40,
-        leftMargin=40,
-        topMargin=40,
-        bottomMargin=40,
+    return {
+        "account_name": account_name,
+        "account_id": account_id,
+        "rules": rules,
+        "compliance": compliance,
+        "compliant_count": compliant_count,
+        "non_compliant_count": non_compliant_count,
+        "insufficient_data_count": insufficient_data_count,
+        "non_compliant_section": non_compliant_section,
+    }
+
+
+def collect_organization_reports(s3, bucket, prefix):
+    """
+    Collect a report for every Organization account concurrently.
+
+    Up to ORG_MAX_CONCURRENT_ACCOUNTS accounts are collected at once. Each
+    account is read through ORG_MEMBER_ROLE_NAME (the account the Lambda runs
+    in uses its own role). Every account gets its own clients, and so its own
+    adaptive-retry rate limiter, plus its own pool of at most
+    RULE_FETCH_MAX_WORKERS rule fetches, so throttling stays per account.
+    Snapshots are kept per account under "<prefix>state/<account id>/".
+
+    Returns:
+        tuple[list, list]: (reports in account order, [(name, id)] of accounts
+        that could not be collected).
+    """
+    caller = get_client("sts").get_caller_identity()
+    partition = caller["Arn"].split(":")[1]
+    accounts = list_organization_accounts()
+    print(f"Collecting compliance for {len(accounts)} accounts")
+
+    def collect(account):
+        account_name, account_id = account
+        role_arn = None
+        if account_id != caller["Account"]:
+            role_arn = f"arn:{partition}:iam::{account_id}:role/{ORG_MEMBER_ROLE_NAME}"
+        snapshot_key = f"{prefix}{account_snapshot_key_name(account_id)}"
+        try:
+            return collect_account_report(
+                account_name, account_id, s3, bucket, snapshot_key, role_arn
+            )
+        except Exception as e:
+            print(f"ERROR: Failed to collect compliance for account {account_id}: {e}")
+            return None
+
+    if not accounts:
+        return [], []
+    workers = max(1, min(ORG_MAX_CONCURRENT_ACCOUNTS, len(accounts)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(collect, accounts))
+    reports = [report for report in results if report is not None]
+    failed = [a for a, report in zip(accounts, results) if report is None]
+    return reports, failed
+
+
+def account_snapshot_key_name(account_id):
+    """Per-account variant of SNAPSHOT_KEY_NAME used in organization scope."""
+    directory, file_name = SNAPSHOT_KEY_NAME.rsplit("/", 1)
+    return f"{directory}/{account_id}/{file_name}"
+
+
+def report_styles():
+    """Return the paragraph styles used throughout the PDF."""
+    styles = getSampleStyleSheet()
+    subtitle_style = styles["Heading2"]
+    subtitle_style.alignment = TA_CENTER
+    return {
+        "title": styles["Heading1"],
+        "subtitle": subtitle_style,
+        "normal": styles["Normal"],
+        "small": ParagraphStyle("small", fontSize=9, leading=12),
+        "table_header": ParagraphStyle(
+            "table_header",
+            fontSize=11,
+            leading=14,
+            alignment=TA_CENTER,
+            fontName="Helvetica-Bold",
+        ),
+    }
+
+
+def report_header(styles, now, account_name, account_id):
+    """Title block of a single-account report."""
+    return [
+        Paragraph("AWS Config Compliance Report", styles["title"]),
+        Spacer(1, 12),
+        Paragraph(f"Account Name: <b>{account_name}</b>", styles["normal"]),
+        Paragraph(f"Account Number: <b>{account_id}</b>", styles["normal"]),
+        Paragraph(f"Generated: <b>{now}</b>", styles["small"]),
+        Spacer(1, 18),
+    ]
+
+
+def organization_summary(styles, now, reports, failed):
+    """Title block and per-account summary table of a combined report."""
+    elements = [
+        Paragraph("AWS Config Compliance Report", styles["title"]),
+        Spacer(1, 12),
+        Paragraph(f"Accounts: <b>{len(reports)}</b>", styles["normal"]),
+        Paragraph(f"Generated: <b>{now}</b>", styles["small"]),
+        Spacer(1, 18),
+        Paragraph("Organization Compliance Summary", styles["subtitle"]),
+    ]
+    summary_data = [["Account", "Account Number", "Compliant", "Non-Compliant", "N/A"]]
+    for report in reports:
+        summary_data.append(
+            [
+                Paragraph(report["account_name"], styles["small"]),
+                report["account_id"],
+                f"{report['compliant_count']}",
+                f"{report['non_compliant_count']}",
+                f"{report['insufficient_data_count']}",
+            ]
+        )
+    summary_table = Table(summary_data, colWidths=[150, 100, 70, 90, 50])
+    summary_table.setStyle(
+        TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#4a5568")),
+                ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                ("FONTSIZE", (0, 0), (-1, -1), 10),
+                ("ALIGN", (1, 0), (-1, -1), "CENTER"),
+                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                ("BACKGROUND", (0, 1), (-1, -1), colors.whitesmoke),
+                ("GRID", (0, 0), (-1, -1), 0.5, colors.lightgrey),
+            ]
+        )
     )
-    elements = []
-    elements.append(Paragraph("AWS Config Compliance Report", title_style))
-    elements.append(Spacer(1, 12))
-    elements.append(Paragraph(f"Account Name: <b>{account_name}</b>", normal_style))
-    elements.append(Paragraph(f"Account Number: <b>{account_id}</b>", normal_style))
-    elements.append(Paragraph(f"Generated: <b>{now}</b>", small_style))
-    elements.append(Spacer(1, 18))
+    elements.append(summary_table)
+    if failed:
+        elements.append(Spacer(1, 12))
+        names = ", ".join(f"{name} ({account_id})" for name, account_id in failed)
+        elements.append(
+            Paragraph(f"<i>Could not be collected: {names}</i>", styles["small"])
+        )
+    return elements
+
+
+def status_backgrounds(table_data, col):
+    """
+    TableStyle commands colouring column col's status cells by STATUS_COLORS.
+
+    With CELLBACKGROUNDS support this is one command resolved in a single pass
+    while drawing; otherwise one BACKGROUND command per coloured body row.
+    """
+    if CELLBACKGROUNDS_SUPPORTED:
+        return [("CELLBACKGROUNDS", (col, 1), (col, -1), STATUS_COLORS)]
+    return [
+        ("BACKGROUND", (col, i), (col, i), STATUS_COLORS[row[col].text])
+        for i, row in enumerate(table_data[1:], 1)
+        if row[col].text in STATUS_COLORS
+    ]
+
+
+def account_section(report, styles):
+    """
+    Summary, rules and non-compliant resources tables for one account.
+    """
+    subtitle_style = styles["subtitle"]
+    normal_style = styles["normal"]
+    small_style = styles["small"]
+    table_header_style = styles["table_header"]
+    rules = report["rules"]
+    compliance = report["compliance"]
+    non_compliant_section = report["non_compliant_section"]
 
+    elements = []
     # Overall Compliance Summary - Moved to the top of the report
     elements.append(Paragraph("Overall Compliance Summary", subtitle_style))
 
     # Create the summary table
     summary_data = [
-        ["Compliant", f"{compliant_count}"],
-        ["Non-Compliant", f"{non_compliant_count}"],
-        ["Insufficient Data", f"{insufficient_data_count}"],
+        ["Compliant", f"{report['compliant_count']}"],
+        ["Non-Compliant", f"{report['non_compliant_count']}"],
+        ["Insufficient Data", f"{report['insufficient_data_count']}"],
         ["Total Rules", f"{len(rules)}"],
     ]
 
@@ -326,22 +726,7 @@ def lambda_handler(event, context):
                     ),
                     ("ALIGN", (0, 1), (1, -1), "LEFT"),
                     ("ALIGN", (2, 1), (2, -1), "CENTER"),  # Center-align status column
-                    # Add special styling for status cells
-                    *[
-                        ("BACKGROUND", (2, i + 1), (2, i + 1), colors.lightgreen)
-                        for i, row in enumerate(rules_summary_data[1:])
-                        if row[2].text == "COMPLIANT"
-                    ],
-                    *[
-                        ("BACKGROUND", (2, i + 1), (2, i + 1), colors.lightpink)
-                        for i, row in enumerate(rules_summary_data[1:])
-                        if row[2].text == "NON_COMPLIANT"
-                    ],
-                    *[
-                        ("BACKGROUND", (2, i + 1), (2, i + 1), colors.lightgrey)
-                        for i, row in enumerate(rules_summary_data[1:])
-                        if row[2].text == "N/A"
-                    ],
+                    *status_backgrounds(rules_summary_data, 2),
                     ("VALIGN", (0, 0), (-1, -1), "TOP"),
                     ("BOX", (0, 0), (-1, -1), 1, colors.gray),
                     ("GRID", (0, 0), (-1, -1), 0.5, colors.lightgrey),
@@ -400,27 +785,132 @@ def lambda_handler(event, context):
         elements.append(
             Paragraph("<i>No non-compliant resources found.</i>", normal_style)
         )
+    return elements
 
-    doc.build(elements)
-    buffer.seek(0)
 
-    s3 = boto3.client("s3")
-    now_dt = datetime.now(timezone.utc)
-    bucket = os.environ.get("CONFIG_REPORT_BUCKET")
-    if not bucket:
-        raise ValueError("CONFIG_REPORT_BUCKET environment variable not set")
-    prefix = os.environ.get("REPORTER_OUTPUT_S3_PREFIX", "compliance-reports/weekly/")
-    key = (
+def report_key(prefix, now_dt, label=None):
+    """S3 key of a report PDF; label (account ID, "organization") is optional."""
+    stem = f"compliance-report-{label}" if label else "compliance-report"
+    return (
         f"{prefix}{now_dt.year}/"
         f"{now_dt.strftime('%m')}/"
         f"{now_dt.strftime('%d')}/"
-        f"compliance-report-{now_dt.strftime('%Y%m%d-%H%M%S')}.pdf"
+        f"{stem}-{now_dt.strftime('%Y%m%d-%H%M%S')}.pdf"
     )
-    s3.put_object(
-        Bucket=bucket, Key=key, Body=buffer.getvalue(), ContentType="application/pdf"
+
+
+def write_pdf(s3, bucket, key, elements):
+    """Build the PDF from elements and upload it to s3://bucket/key."""
+    page_layout = dict(
+        pagesize=letter,
+        rightMargin=40,
+        leftMargin=40,
+        topMargin=40,
+        bottomMargin=40,
     )
+    if REPORT_OUTPUT_MODE == "buffer":
+        buffer = io.BytesIO()
+        SimpleDocTemplate(buffer, **page_layout).build(elements)
+        buffer.seek(0)
+        s3.put_object(
+            Bucket=bucket, Key=key, Body=buffer, ContentType="application/pdf"
+        )
+    else:
+        # Stream the PDF straight to S3, one multipart part at a time. Memory
+        # stays flat only because the vendored reportlab (package/) writes
+        # each PDF object as it is formatted (rl_config.pdfStreamingSave); a
+        # stock reportlab assembles the whole file before its single write.
+        with S3MultipartWriter(s3, bucket, key, "application/pdf") as out:
+            SimpleDocTemplate(out, **page_layout).build(elements)
+
+
+def lambda_handler(event, context):
+    """
+    AWS Lambda entry point to generate a compliance report for AWS Config rules
+    and upload the report as a PDF to S3.
+
+    Steps performed:
+    1. Fetch AWS account info (name and ID). With REPORT_SCOPE=organization,
+       list the Organization's active accounts instead and collect steps 3-7
+       for each of them concurrently through an assumed role.
+    2. Get the current UTC timestamp for the report.
+    3. Retrieve all AWS Config rules and their compliance status.
+    4. Count compliant, non-compliant, and insufficient data rules for summary.
+    5. Build a table summarizing compliance status for each rule.
+    6. For each non-compliant rule, gather details of non-compliant resources,
+       including IAM usernames and resource names/tags. With incremental
+       snapshots enabled, rules whose compliance and last evaluation time are
+       unchanged since the previous run reuse the rows stored in S3.
+    7. Build a detailed section listing all non-compliant resources.
+    8. Create a PDF report using ReportLab, including:
+       - Title and account info
+       - Compliance summary table
+       - Rule-by-rule compliance status
+       - Non-compliant resources
+       In organization scope, write one PDF per account
+       (ORG_REPORT_LAYOUT=per_account) or one combined PDF with an
+       Organization summary followed by a section per account.
+    9. Upload the generated PDF to an S3 bucket, using environment variables
+       for bucket and prefix if set. By default the PDF is streamed to S3 via
+       multipart upload as it is written (REPORT_OUTPUT_MODE=stream).
+    10. Return a status message with the S3 location of the uploaded report.
+
+    Args:
+        event (dict): Lambda event input (not used).
+        context (LambdaContext): Lambda context object (not used).
+
+    Returns:
+        dict: Status code and S3 path of the uploaded compliance report PDF.
+    """
+    bucket = os.environ.get("CONFIG_REPORT_BUCKET")
+    if not bucket:
+        raise ValueError("CONFIG_REPORT_BUCKET environment variable not set")
+    prefix = os.environ.get("REPORTER_OUTPUT_S3_PREFIX", "compliance-reports/weekly/")
+    s3 = get_client("s3")
+    now_dt = datetime.now(timezone.utc)
+    now = now_dt.strftime("%Y-%m-%d %H:%M:%S UTC")
+    styles = report_styles()
+
+    if REPORT_SCOPE != "organization":
+        account_name, account_id = get_account_info()
+        report = collect_account_report(
+            account_name, account_id, s3, bucket, f"{prefix}{SNAPSHOT_KEY_NAME}"
+        )
+        key = report_key(prefix, now_dt)
+        elements = report_header(styles, now, account_name, account_id)
+        write_pdf(s3, bucket, key, elements + account_section(report, styles))
+        return {
+            "statusCode": 200,
+            "body": f"Successfully uploaded PDF to s3://{bucket}/{key}",
+        }
+
+    reports, failed = collect_organization_reports(s3, bucket, prefix)
+    keys = []
+    if ORG_REPORT_LAYOUT == "combined":
+        elements = organization_summary(styles, now, reports, failed)
+        for report in reports:
+            elements.append(PageBreak())
+            elements.append(
+                Paragraph(
+                    f"Account: {report['account_name']} ({report['account_id']})",
+                    styles["title"],
+                )
+            )
+            elements.extend(account_section(report, styles))
+        keys.append(report_key(prefix, now_dt, "organization"))
+        write_pdf(s3, bucket, keys[0], elements)
+    else:
+        for report in reports:
+            key = report_key(prefix, now_dt, report["account_id"])
+            elements = report_header(
+                styles, now, report["account_name"], report["account_id"]
+            )
+            write_pdf(s3, bucket, key, elements + account_section(report, styles))
+            keys.append(key)
 
     return {
         "statusCode": 200,
-        "body": f"Successfully uploaded PDF to s3://{bucket}/{key}",
+        "body": f"Successfully uploaded {len(keys)} PDF(s) to s3://{bucket}/{prefix}",
+        "reports": [f"s3://{bucket}/{key}" for key in keys],
+        "failed_accounts": [account_id for _, account_id in failed],
     }
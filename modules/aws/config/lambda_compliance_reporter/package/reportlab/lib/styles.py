@@ -23,6 +23,8 @@ __all__ = (
     "StyleSheet1",
     "getSampleStyleSheet",
 )
+from itertools import count
+
 from reportlab.lib.colors import black
 from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT, TA_RIGHT
 from reportlab.lib.fonts import tt2ps
@@ -44,6 +46,10 @@ _baseFontNameB = tt2ps(_baseFontName, 1, 0)
 _baseFontNameI = tt2ps(_baseFontName, 0, 1)
 _baseFontNameBI = tt2ps(_baseFontName, 1, 1)
 
+# every change to a PropertySet takes a fresh number from here so that
+# caches keyed on a style (eg Paragraph line breaks) can tell it changed
+_generations = count(1)
+
 
 ###########################################################
 # This class provides an 'instance inheritance'
@@ -82,6 +88,11 @@ class PropertySet:
         # step three - copy keywords if any
         for key, value in kw.items():
             self.__dict__[key] = value
+        self.__dict__["_generation"] = next(_generations)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        self.__dict__["_generation"] = next(_generations)
 
     def __repr__(self):
         return "<%s '%s'>" % (self.__class__.__name__, self.name)
@@ -94,6 +105,7 @@ class PropertySet:
             for key, value in self.parent.__dict__.items():
                 if key not in ["name", "parent"]:
                     self.__dict__[key] = value
+            self.__dict__["_generation"] = next(_generations)
 
     def listAttrs(self, indent=""):
         print(indent + "name =", self.name)
@@ -102,6 +114,7 @@ class PropertySet:
         keylist.sort()
         keylist.remove("name")
         keylist.remove("parent")
+        keylist.remove("_generation")
         for key in keylist:
             value = self.__dict__.get(key, None)
             print(indent + "%s = %s" % (key, value))
@@ -18,6 +18,7 @@ import binascii
 import codecs
 import zlib
 from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from hashlib import md5
 from sys import stderr
 
@@ -237,10 +238,14 @@ class PDFDocument(PDFObject):
         else:
             raise TypeError("Cannot use %s as a filename or file" % repr(filename))
 
-        data = self.GetPDFData(canvas)
-        if isUnicode(data):
-            data = data.encode("latin1")
-        f.write(data)
+        if rl_config.pdfStreamingSave and not getattr(self, "_digiSigs", None):
+            # write each object as it is formatted rather than the whole file at once
+            self.GetPDFData(canvas, out=f)
+        else:
+            data = self.GetPDFData(canvas)
+            if isUnicode(data):
+                data = data.encode("latin1")
+            f.write(data)
         if myfile:
             f.close()
             import os
@@ -252,7 +257,8 @@ class PDFDocument(PDFObject):
         if getattr(canvas, "_verbosity", None):
             print("saved %s" % (filename,))
 
-    def GetPDFData(self, canvas):
+    def GetPDFData(self, canvas, out=None):
+        """return the formatted PDF, or write it to the file object out and return None"""
         # realize delayed fonts
         for fnt in self.delayedFonts:
             fnt.addObjects(self)
@@ -266,7 +272,7 @@ class PDFDocument(PDFObject):
         self.Outlines.prepare(self, canvas)
         if self.Outlines.ready < 0:
             self.Catalog.Outlines = None
-        return self.format()
+        return self.format(out=out)
 
     def inPage(self):
         """specify the current object as a page (enables reference binding and other page features)"""
@@ -311,6 +317,23 @@ class PDFDocument(PDFObject):
         self.Pages.addPage(page)
         self.pageCounter += 1
         self.inObject = None
+        if (
+            rl_config.pageCompressionThreads > 0
+            and page.compression
+            and page.stream
+            and not page.Override_default_compilation
+        ):
+            # the page is finished; compress its content while layout continues
+            # (zlib releases the GIL) and let format pick up the result
+            page._zcontent = self._pageCompressionPool().submit(PDFZCompress.encode, page.stream)
+
+    def _pageCompressionPool(self):
+        pool = self.__dict__.get("_zpool")
+        if pool is None:
+            pool = self._zpool = ThreadPoolExecutor(
+                max_workers=rl_config.pageCompressionThreads, thread_name_prefix="pdfzlib"
+            )
+        return pool
 
     def addForm(self, name, form):
         """add a Form XObject."""
@@ -418,9 +441,13 @@ class PDFDocument(PDFObject):
         fontnames.sort()
         return fontnames
 
-    def format(self):
+    def format(self, out=None):
         # register the Catalog/INfo and then format the objects one by one until exhausted
         # (possible infinite loop if there is a bug that continually makes new objects/refs...)
+        # With out (a binary file object) each object is written as soon as it is formatted
+        # and only the xref offsets are kept, so memory is bounded by the largest object.
+        if out is not None and getattr(self, "_digiSigs", None):
+            raise ValueError("digital signatures need the whole file; cannot stream it")
         # Prepare encryption
         self.encrypt.prepare(self)
         cat = self.Catalog
@@ -441,7 +468,7 @@ class PDFDocument(PDFObject):
         idToOf = self.idToOffset
         ### note that new entries may be "appended" DURING FORMATTING
         # __accum__ allows objects to know where they are in the file etc etc
-        self.__accum__ = File = PDFFile(self._pdfVersion)  # output collector
+        self.__accum__ = File = PDFFile(self._pdfVersion, out=out)  # output collector
         while True:
             counter += 1  # do next object...
             if counter not in numbertoid:
@@ -483,6 +510,11 @@ class PDFDocument(PDFObject):
         )
         trailerf = trailer.format(self)
         File.add(trailerf)
+        pool = self.__dict__.pop("_zpool", None)
+        if pool is not None:
+            pool.shutdown()
+        if out is not None:
+            return None
         for ds in getattr(self, "_digiSigs", []):
             ds.sign(File)
         # return string format for pdf file
@@ -814,9 +846,11 @@ class PDFStreamFilterZCompress:
     pdfname = "FlateDecode"
 
     def encode(self, text):
+        if isinstance(text, Future):
+            return text.result()  # already compressed on PDFDocument's page compression pool
         if isUnicode(text):
             text = text.encode("utf8")
-        return zlib.compress(text)
+        return zlib.compress(text, rl_config.zlibCompressionLevel)
 
     def decode(self, encoded):
         return zlib.decompress(encoded)
@@ -968,10 +1002,14 @@ class PDFObjectReference(PDFObject):
 
 
 class PDFFile(PDFObject):
-    ### just accumulates strings: keeps track of current offset
-    def __init__(self, pdfVersion=PDF_VERSION_DEFAULT):
-        self.strings = []
-        self.write = self.strings.append
+    ### just accumulates strings (or writes them to out): keeps track of current offset
+    def __init__(self, pdfVersion=PDF_VERSION_DEFAULT, out=None):
+        if out is None:
+            self.strings = []
+            self.write = self.strings.append
+        else:
+            self.strings = None
+            self.write = out.write
         self.offset = 0
         ### chapter 5
         # Following Ken Lunde's advice and the PDF spec, this includes
@@ -998,6 +1036,8 @@ class PDFFile(PDFObject):
         return result
 
     def format(self, document):
+        if self.strings is None:
+            raise ValueError("PDFFile was streamed to its output; no data is kept")
         return b"".join(self.strings)
 
 
@@ -1229,6 +1269,7 @@ class PDFPage(PDFCatalog):
     stream = None
     hasImages = 0
     compression = 0
+    _zcontent = None  # Future of the compressed stream, see PDFDocument.addPage
     XObjects = None
     _colorsUsed = {}
     _shadingsUsed = {}
@@ -1279,7 +1320,8 @@ class PDFPage(PDFCatalog):
                 S = PDFStream()
                 if self.compression:
                     S.filters = rl_config.useA85 and [PDFBase85Encode, PDFZCompress] or [PDFZCompress]
-                S.content = stream
+                # PDFZCompress is applied first and resolves a pending compression
+                S.content = self._zcontent or stream
                 S.__Comment__ = "page stream"
                 self.Contents = S
         if not self.Resources:
@@ -23,17 +23,19 @@ import os
 import sys
 
 from reportlab.lib.logger import warnOnce
-from reportlab.lib.rl_accel import instanceStringWidthT1, unicode2T1
+from reportlab.lib.rl_accel import _c_funcs, instanceStringWidthT1, unicode2T1
 from reportlab.lib.utils import (
     findInPaths,
     isSeq,
     isStr,
+    isUnicode,
     open_and_read,
     open_and_readlines,
     rl_glob,
     rl_isdir,
     rl_isfile,
 )
+from reportlab import rl_config
 from reportlab.pdfbase import _fontdata, rl_codecs
 from reportlab.rl_config import T1SearchPath, defaultEncoding
 
@@ -362,6 +364,25 @@ class Encoding:
 standardT1SubstitutionFonts = []
 
 
+class _T1CharWidths(dict):
+    """Width in 1/1000 em of each character as a Type 1 font and its substitution fonts set it.
+
+    Missing characters are resolved once through unicode2T1, so summing a word through this
+    table gives exactly the integer instanceStringWidthT1 scales."""
+
+    __slots__ = ("fonts",)
+    warmChars = "".join(map(chr, range(32, 127)))
+
+    def __init__(self, font):
+        self.fonts = [font] + font.substitutionFonts
+        for c in self.warmChars:
+            self[c]
+
+    def __missing__(self, c):
+        w = self[c] = sum(sum(map(f.widths.__getitem__, t)) for f, t in unicode2T1(c, self.fonts))
+        return w
+
+
 class Font:
     """Represents a font (i.e combination of face and encoding).
 
@@ -374,6 +395,8 @@ class Font:
     _multiByte = 0  # do not want our own stringwidth
     _dynamicFont = 0  # do not want dynamic subsetting
     shapable = False
+    _charWidths = None  # _T1CharWidths, built on first measurement
+    _textWidths = None  # text -> width in 1/1000 em, built on first measurement, capped by stringWidthCacheSize
 
     def __init__(self, name, faceName, encName, substitutionFonts=None):
         self.fontName = name
@@ -390,6 +413,61 @@ class Font:
     def stringWidth(self, text, size, encoding="utf8"):
         return instanceStringWidthT1(self, text, size, encoding=encoding)
 
+    def stringWidths(self, words, size, encoding="utf8"):
+        """list of stringWidth(word, size, encoding) for each of words"""
+        return [instanceStringWidthT1(self, w, size, encoding=encoding) for w in words]
+
+    def _memoStringWidth(self, text, size, encoding="utf8"):
+        """stringWidth from the text memo and character table, for use without _rl_accel"""
+        if not isUnicode(text):
+            text = text.decode(encoding)
+        textWidths = self._textWidths
+        if textWidths is not None:
+            w = textWidths.get(text)
+            if w is not None:
+                return w * 0.001 * size
+        return self._textWidth(text) * 0.001 * size
+
+    def _memoStringWidths(self, words, size, encoding="utf8"):
+        """stringWidths from the text memo and character table, for use without _rl_accel"""
+        textWidths = self._textWidths
+        get = {}.get if textWidths is None else textWidths.get  # no memo yet: all miss
+        textWidth = self._textWidth
+        W = []
+        for w in words:
+            if not isUnicode(w):
+                w = w.decode(encoding)
+            n = get(w)
+            if n is None:
+                n = textWidth(w)
+            W.append(n * 0.001 * size)
+        return W
+
+    def _textWidth(self, text):
+        """width of text in 1/1000 em from the character table, memoized oldest-first"""
+        charWidths = self._charWidths
+        if charWidths is None:
+            charWidths = self._charWidths = _T1CharWidths(self)
+        w = sum(map(charWidths.__getitem__, text))
+        n = rl_config.stringWidthCacheSize
+        if n > 0:
+            cache = self._textWidths
+            if cache is None:
+                cache = self._textWidths = {}
+            elif len(cache) >= n:
+                try:
+                    del cache[next(iter(cache))]
+                except (KeyError, RuntimeError, StopIteration):
+                    pass  # another thread evicted first
+            cache[text] = w
+        return w
+
+    if "instanceStringWidthT1" not in _c_funcs:
+        # _rl_accel's instanceStringWidthT1 stays authoritative when it is installed;
+        # the pure Python one re-encodes every word on every call, so use the memo
+        stringWidth = _memoStringWidth
+        stringWidths = _memoStringWidths
+
     def __repr__(self):
         return "<%s %s>" % (self.__class__.__name__, self.face.name)
 
@@ -413,6 +491,8 @@ class Font:
                     else:
                         pass
         self.widths = w
+        self._charWidths = None
+        self._textWidths = None
 
     def _formatWidths(self):
         "returns a pretty block in PDF Array format to aid inspection"
@@ -795,6 +875,14 @@ def stringWidth(text, fontName, fontSize, encoding="utf8"):
     return getFont(fontName).stringWidth(text, fontSize, encoding=encoding)
 
 
+def stringWidths(words, fontName, fontSize, encoding="utf8"):
+    """Compute the width in points of each of words, looking the font up once"""
+    font = getFont(fontName)
+    if isinstance(font, Font):
+        return font.stringWidths(words, fontSize, encoding)
+    return [font.stringWidth(w, fontSize, encoding) for w in words]
+
+
 def dumpFontData():
     print("Registered Encodings:")
     keys = list(_encodings.keys())
@@ -857,6 +945,32 @@ def testStringWidthAlgorithms():
     test3widths(words)
 
 
+def benchmarkStringWidths(words=None, fontName="Helvetica", fontSize=10, number=20):
+    """time instanceStringWidthT1 against the character table, the memo and the batch call"""
+    from timeit import timeit
+
+    if words is None:
+        with open(__file__, encoding="utf8") as f:
+            words = f.read().split()
+    font = getFont(fontName)
+    charWidths = _T1CharWidths(font)
+    cases = [
+        ("instanceStringWidthT1", lambda: [instanceStringWidthT1(font, w, fontSize) for w in words]),
+        ("character table", lambda: [sum(map(charWidths.__getitem__, w)) * 0.001 * fontSize for w in words]),
+        ("memoized stringWidth", lambda: [font._memoStringWidth(w, fontSize) for w in words]),
+        ("memoized stringWidths", lambda: font._memoStringWidths(words, fontSize)),
+        ("Font.stringWidth", lambda: [font.stringWidth(w, fontSize) for w in words]),
+        ("batch stringWidths", lambda: stringWidths(words, fontName, fontSize)),
+    ]
+    print("instanceStringWidthT1 from %s" % ("_rl_accel" if "instanceStringWidthT1" in _c_funcs else "Python"))
+    expected = cases[0][1]()
+    print("%d words (%d distinct) in %s %s" % (len(words), len(set(words)), fontName, fontSize))
+    for name, case in cases:
+        assert case() == expected, "%s widths differ from instanceStringWidthT1" % name
+        t = timeit(case, number=number) / (number * len(words))
+        print("%-24s %8.0f ns/word" % (name, t * 1e9))
+
+
 def test():
     helv = TypeFace("Helvetica")
     registerTypeFace(helv)
@@ -891,5 +1005,8 @@ register_reset(_reset)
 del register_reset
 
 if __name__ == "__main__":
-    test()
-    testStringWidthAlgorithms()
+    if "--benchmark" in sys.argv:
+        benchmarkStringWidths()
+    else:
+        test()
+        testStringWidthAlgorithms()
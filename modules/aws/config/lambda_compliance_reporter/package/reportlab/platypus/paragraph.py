@@ -4,18 +4,22 @@
 __all__ = (
     "Paragraph",
     "cleanBlockQuotedText",
+    "clearParagraphWrapCache",
     "ParaLines",
     "FragLine",
 )
 __version__ = "3.5.20"
 __doc__ = """The standard paragraph implementation"""
 import re
+from collections import OrderedDict
 from copy import deepcopy
 from operator import truth
 from string import whitespace
+from threading import Lock
 from types import MethodType
 from unicodedata import category
 
+from reportlab import rl_config
 from reportlab.lib.abag import ABag
 from reportlab.lib.colors import Color
 from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT, TA_RIGHT
@@ -24,7 +28,7 @@ from reportlab.lib.rl_accel import sameFrag
 from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib.textsplit import ALL_CANNOT_START, wordSplit
 from reportlab.lib.utils import _className, isBytes, isStr
-from reportlab.pdfbase.pdfmetrics import getAscentDescent, getFont, stringWidth
+from reportlab.pdfbase.pdfmetrics import getAscentDescent, getFont, stringWidth, stringWidths
 from reportlab.pdfbase.ttfonts import shapeFragWord
 from reportlab.pdfgen.textobject import (
     BidiIndex,
@@ -2006,6 +2010,18 @@ def fragWordsVisualOrder(words, direction=None):
 sortBidiV = lambda _: _.__bidiV__  # for sorting by __bidiV__
 
 
+# bounded LRU of line-break results shared by all Paragraphs, see Paragraph._breakLinesCached
+_wrapCache = OrderedDict()
+_wrapCacheLock = Lock()
+# attributes breakLines leaves on the paragraph besides its result
+_wrapCacheAttrs = ("_width_max", "_splitLongWordCount", "_hyphenations")
+
+
+def clearParagraphWrapCache():
+    with _wrapCacheLock:
+        _wrapCache.clear()
+
+
 class Paragraph(Flowable):
     """Paragraph(text, style, bulletText=None, caseSensitive=1)
     text a string of stuff to go into the paragraph.
@@ -2109,6 +2125,14 @@ class Paragraph(Flowable):
             textTransformFrags(frags, style)
             if bulletTextFrags:
                 bulletText = bulletTextFrags
+            # parsed frags follow from the text, unless they carry callbacks or
+            # sequence numbers that differ between otherwise equal paragraphs
+            if "<seq" in text.lower() or any(hasattr(f, "cbDefn") for f in frags):
+                self._fragsKey = None
+            else:
+                self._fragsKey = (self.__class__, text, self.caseSensitive)
+        else:
+            self._fragsKey = None
 
         # AR hack
         self.text = text
@@ -2128,11 +2152,7 @@ class Paragraph(Flowable):
         first_line_width = availWidth - (leftIndent + style.firstLineIndent) - style.rightIndent
         later_widths = availWidth - leftIndent - style.rightIndent
         self._wrapWidths = [first_line_width, later_widths]
-        if style.wordWrap == "CJK":
-            # use Asian text wrap algorithm to break characters
-            blPara = self.breakLinesCJK(self._wrapWidths)
-        else:
-            blPara = self.breakLines(self._wrapWidths)
+        blPara = self._breakLinesCached(self._wrapWidths)
         self.blPara = blPara
         autoLeading = getattr(self, "autoLeading", getattr(style, "autoLeading", ""))
         leading = style.leading
@@ -2158,6 +2178,64 @@ class Paragraph(Flowable):
         self.height = height
         return self.width, height
 
+    def _wrapCacheKey(self, widths):
+        """key of this paragraph's line breaks in _wrapCache or None if they can't be shared"""
+        fragsKey = getattr(self, "_fragsKey", None)
+        if fragsKey is None or self.bulletText:
+            return None
+        style = self.style
+        generation = getattr(style, "_generation", None)
+        if generation is None:
+            return None  # not a PropertySet, changes can't be seen
+        wordWrap = style.wordWrap
+        if wordWrap and wordWrap.upper() in ("RTL", "LTR"):
+            return None  # drawing reorders the broken lines in place
+        return (
+            fragsKey,
+            id(style),
+            generation,
+            tuple(widths),
+            getattr(self, "autoLeading", None),
+            self.encoding,
+        )
+
+    def _breakLinesCached(self, widths):
+        """breakLines (or breakLinesCJK) memoized across paragraphs
+
+        Table wraps the same cells several times and reports repeat the same
+        short cells (statuses, types) many times; equal text in the same style
+        at the same widths breaks identically. Only single fragment (kind 0)
+        results are kept: drawing does not change them and split works on a
+        private copy. Changing a style gives it a new generation, so stale
+        entries are never hit; rl_config.paragraphWrapCacheSize bounds the LRU.
+        """
+        size = rl_config.paragraphWrapCacheSize
+        key = self._wrapCacheKey(widths) if size > 0 else None
+        self._blParaShared = False
+        if key is not None:
+            with _wrapCacheLock:
+                hit = _wrapCache.get(key)
+                if hit is not None:
+                    _wrapCache.move_to_end(key)
+            if hit is not None:
+                blPara, attrs = hit
+                self.__dict__.update(attrs)
+                self._blParaShared = True
+                return blPara
+        if self.style.wordWrap == "CJK":
+            # use Asian text wrap algorithm to break characters
+            blPara = self.breakLinesCJK(widths)
+        else:
+            blPara = self.breakLines(widths)
+        if key is not None and blPara.kind == 0:
+            attrs = {a: self.__dict__[a] for a in _wrapCacheAttrs if a in self.__dict__}
+            with _wrapCacheLock:
+                _wrapCache[key] = blPara, attrs
+                while len(_wrapCache) > size:
+                    _wrapCache.popitem(last=False)
+            self._blParaShared = True
+        return blPara
+
     def minWidth(self):
         "Attempt to determine a minimum sensible width"
         frags = self.frags
@@ -2168,7 +2246,7 @@ class Paragraph(Flowable):
             f = frags[0]
             fS = f.fontSize
             fN = f.fontName
-            return max(stringWidth(w, fN, fS) for w in (split(f.text, " ") if hasattr(f, "text") else f.words))
+            return max(stringWidths(split(f.text, " ") if hasattr(f, "text") else f.words, fN, fS))
         else:
             return max(w[0] for w in _getFragWords(frags))
 
@@ -2199,6 +2277,10 @@ class Paragraph(Flowable):
         # the split information is all inside self.blPara
         if not hasattr(self, "blPara"):
             self.wrap(availWidth, availHeight)
+        if getattr(self, "_blParaShared", False):
+            # the lines are shared through _wrapCache and splitting edits words in place
+            self.blPara = deepcopy(self.blPara)
+            self._blParaShared = False
         blPara = self.blPara
         style = self.style
         autoLeading = getattr(self, "autoLeading", getattr(style, "autoLeading", ""))
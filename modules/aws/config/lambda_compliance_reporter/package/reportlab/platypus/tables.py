@@ -716,8 +716,14 @@ class Table(Flowable):
             self._rowHeights = H
             spanCons = {}
             FUZZ = rl_config._FUZZ
-            while None in H:
-                i = H.index(None)
+            # one forward pass: fixed rows only add to the running height,
+            # auto (None) rows are sized in order
+            height = 0  # == sum(H[:i+1]) after row i
+            msr = -1  # last row of any span recorded in spanCons
+            for i in range(lim):
+                if H[i] is not None:
+                    height += H[i]
+                    continue
                 V = self._cellvalues[i]  # values for row i
                 S = self._cellStyles[i]  # styles for row i
                 h = 0
@@ -765,19 +771,20 @@ class Table(Flowable):
                             if r0 != r1:
                                 x = r0, r1
                                 spanCons[x] = max(spanCons.get(x, t), t)
+                                if r1 > msr:
+                                    msr = r1
                                 t = 0
                     if t > h:
                         h = t  # record a new maximum
                 # If a minimum height has been specified use that, otherwise allow the cell to grow
                 H[i] = max(minRowHeights[i], h) if minRowHeights else h
+                height += H[i]
                 # we can stop if we have filled up all available room
                 if longTable:
                     hmax = i + 1  # we computed H[i] so known len == i+1
-                    height = sum(H[:hmax])
                     if height > availHeight:
                         # we can terminate if all spans are complete in H[:hmax]
                         if spanCons:
-                            msr = max(x[1] for x in spanCons.keys())  # RS=[endrowspan,.....]
                             if hmax > msr:
                                 break
             if None not in H:
@@ -1276,7 +1283,7 @@ only rows may be strings with values in {_SPECIALROWS!r}"""
         return max(0, sc), min(self._ncols - 1, ec), max(0, sr), min(self._nrows - 1, er)
 
     def _addCommand(self, cmd):
-        if cmd[0] in ("BACKGROUND", "ROWBACKGROUNDS", "COLBACKGROUNDS"):
+        if cmd[0] in ("BACKGROUND", "ROWBACKGROUNDS", "COLBACKGROUNDS", "CELLBACKGROUNDS"):
             self._bkgrndcmds.append(cmd)
         elif cmd[0] == "SPAN":
             self._spanCmds.append(cmd)
@@ -2621,7 +2628,9 @@ only rows may be strings with values in {_SPECIALROWS!r}"""
             x1 = colpositions[min(ec + 1, ncols)]
             y1 = rowpositions[min(er + 1, nrows)]
             w, h = x1 - x0, y1 - y0
-            if hasattr(arg, "__call__"):
+            if cmd == "CELLBACKGROUNDS":
+                self._drawCellBackgrounds(sc, sr, ec, er, arg)
+            elif hasattr(arg, "__call__"):
                 arg(self, canv, x0, y0, w, h)
             elif cmd == "ROWBACKGROUNDS":
                 # Need a list of colors to cycle through.  The arguments
@@ -2747,6 +2756,56 @@ only rows may be strings with values in {_SPECIALROWS!r}"""
                         canv.setFillColor(color)
                         canv.rect(x0, y0, w, h, stroke=0, fill=1)
 
+    def _drawCellBackgrounds(self, sc, sr, ec, er, arg):
+        """fill each cell in the range with a colour chosen from its value
+
+        arg is either a mapping from cell value to colour or a callable taking
+        the cell value and returning a colour; None means leave the cell alone.
+        A cell holding a single flowable is passed as that flowable, and the
+        mapping looks it up by its text attribute (eg a Paragraph's markup).
+        This replaces a BACKGROUND command per cell with a single command
+        resolved in one pass over the range.
+        """
+        canv = self.canv
+        colpositions = self._colpositions
+        rowpositions = self._rowpositions
+        colWidths = self._colWidths
+        rowHeights = self._rowHeights
+        spanRects = getattr(self, "_spanRects", None)
+        if hasattr(arg, "__call__"):
+            pick = arg
+        else:
+
+            def pick(value):
+                try:
+                    return arg.get(getattr(value, "text", value))
+                except TypeError:  # unhashable cell value
+                    return None
+
+        curColor = None
+        for j in range(sr, er + 1):
+            row = self._cellvalues[j]
+            y0 = rowpositions[j + 1]
+            h = rowHeights[j]
+            for i in range(sc, ec + 1):
+                value = row[i]
+                if isinstance(value, (_ExpandedCellTuple, _ExpandedCellTupleEx)) and len(value) == 1:
+                    value = value[0]
+                color = colors.toColorOrNone(pick(value))
+                if not color:
+                    continue
+                if spanRects:
+                    xywh = spanRects.get((i, j))
+                    if xywh is None:
+                        continue  # covered by a spanning cell
+                    x0, y, w, hh = xywh
+                else:
+                    x0, y, w, hh = colpositions[i], y0, colWidths[i], h
+                if color is not curColor:
+                    canv.setFillColor(color)
+                    curColor = color
+                canv.rect(x0, y, w, hh, stroke=0, fill=1)
+
     def _drawCell(self, cellval, cellstyle, pos, size):
         colpos, rowpos = pos
         colwidth, rowheight = size
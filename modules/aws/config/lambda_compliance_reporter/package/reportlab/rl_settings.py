@@ -64,6 +64,11 @@ hyphenationLang
 uriWasteReduce
 embeddedHyphenation
 hyphenationMinWordLength
+paragraphWrapCacheSize
+pdfStreamingSave
+zlibCompressionLevel
+pageCompressionThreads
+stringWidthCacheSize
 reserveTTFNotdef
 documentLang
 encryptionStrength
@@ -154,6 +159,11 @@ uriWasteReduce = 0  # split URI if we would waste 0.3 of a line or if the URI#
 # is attempted. suggested value = 0.3
 embeddedHyphenation = 0  # if true attempt hypenation of words with embedded hyphens
 hyphenationMinWordLength = 5  # minimum length of words that can be hyphenated
+paragraphWrapCacheSize = 1024  # line-break results shared between equal Paragraphs; 0 disables
+pdfStreamingSave = 1  # if true saving writes each PDF object to the file as it is formatted
+zlibCompressionLevel = -1  # zlib level for FlateDecode streams: -1 zlib default, 1 fastest .. 9 smallest
+pageCompressionThreads = 0  # if > 0 compress finished pages' content streams on this many threads
+stringWidthCacheSize = 4096  # memoized Type 1 string widths kept per font; 0 disables
 reserveTTFNotdef = 1  # if true force subset element 0 to be zero(.notdef)
 # helps to fix bug in edge; this is now ignored in code
 # PDFUA forbids index 0(.notdef) in strings
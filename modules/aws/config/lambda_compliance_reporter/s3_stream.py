@@ -0,0 +1,125 @@
+"""
+Streaming S3 writer for report output.
+
+S3MultipartWriter is a write-only file object: bytes are buffered until a part
+fills, then sent with UploadPart, so peak memory is one part regardless of the
+size of the document being written. Output smaller than one part is sent with
+a single PutObject when the writer is closed.
+
+Environment variables (optional):
+- REPORT_UPLOAD_PART_SIZE_MB: multipart part size in MiB (default 8, minimum 5)
+"""
+
+import os
+
+# S3 rejects non-final multipart parts smaller than 5 MiB
+MIN_PART_SIZE = 5 * 1024 * 1024
+PART_SIZE = max(
+    MIN_PART_SIZE, int(os.environ.get("REPORT_UPLOAD_PART_SIZE_MB", "8")) * 1024 * 1024
+)
+
+
+class S3MultipartWriter:
+    """
+    File-like object that uploads everything written to s3://bucket/key.
+
+    Use it as a context manager: a clean exit completes the upload, an
+    exception aborts it so no partial object or orphaned parts are left.
+
+    Parameters:
+        s3: boto3 S3 client.
+        bucket (str): Destination bucket.
+        key (str): Destination object key.
+        content_type (str): Content-Type of the uploaded object.
+        part_size (int): Bytes per part; clamped to the S3 minimum.
+    """
+
+    def __init__(self, s3, bucket, key, content_type, part_size=PART_SIZE):
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.content_type = content_type
+        self.part_size = max(MIN_PART_SIZE, part_size)
+        self.bytes_written = 0
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._parts = []
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError("write to closed S3MultipartWriter")
+        if isinstance(data, str):
+            data = data.encode("latin1")
+        self._buffer += data
+        self.bytes_written += len(data)
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[: self.part_size]))
+            del self._buffer[: self.part_size]
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def _upload_part(self, body):
+        if self._upload_id is None:
+            response = self.s3.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key, ContentType=self.content_type
+            )
+            self._upload_id = response["UploadId"]
+        part_number = len(self._parts) + 1
+        response = self.s3.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+        self._parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+
+    def close(self):
+        """Flush buffered bytes and complete (or single-put) the upload."""
+        if self.closed:
+            return
+        if self._upload_id is None:
+            self.s3.put_object(
+                Bucket=self.bucket,
+                Key=self.key,
+                Body=bytes(self._buffer),
+                ContentType=self.content_type,
+            )
+        else:
+            if self._buffer:
+                self._upload_part(bytes(self._buffer))
+            self.s3.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self._upload_id,
+                MultipartUpload={"Parts": self._parts},
+            )
+        self._buffer = bytearray()
+        self.closed = True
+
+    def abort(self):
+        """Discard buffered bytes and abort any multipart upload in progress."""
+        if self.closed:
+            return
+        if self._upload_id is not None:
+            self.s3.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id
+            )
+        self._buffer = bytearray()
+        self.closed = True
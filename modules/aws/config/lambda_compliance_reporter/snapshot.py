@@ -0,0 +1,109 @@
+"""
+Compliance snapshots for incremental report runs.
+
+A snapshot is a gzipped JSON Lines object in the report bucket with one record
+per NON_COMPLIANT rule:
+
+    {"rule": ..., "fingerprint": ..., "resources": [...]}
+
+The fingerprint combines the rule's compliance type with its
+LastSuccessfulEvaluationTime. When both are unchanged since the previous run
+the rule's evaluation results cannot have changed either, so its cached
+resource rows are reused and get_compliance_details_by_config_rule is only
+called for rules whose fingerprint differs.
+"""
+
+import gzip
+import json
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+SNAPSHOT_CONTENT_TYPE = "application/gzip"
+
+
+def rule_fingerprint(compliance_type, last_evaluated):
+    """
+    Return the change fingerprint for a rule, or None when the rule has no
+    recorded evaluation time (such rules are always re-fetched).
+    """
+    if last_evaluated is None:
+        return None
+    return f"{compliance_type}|{last_evaluated.isoformat()}"
+
+
+def split_cached_rules(previous, fingerprints):
+    """
+    Decide which rules can reuse their cached rows.
+
+    A rule is reused only when it has a fingerprint and the previous snapshot
+    recorded the same one; rules without an evaluation time, new rules and
+    rules whose fingerprint changed are re-fetched.
+
+    Parameters:
+        previous (dict): rule name -> record, as returned by load_snapshot.
+        fingerprints (dict): rule name -> current rule_fingerprint, in report
+            order.
+
+    Returns:
+        tuple[dict, list]: (rule name -> cached resource rows, names of the
+        rules to re-fetch in fingerprints order).
+    """
+    cached = {
+        name: previous[name]["resources"]
+        for name, fingerprint in fingerprints.items()
+        if fingerprint is not None
+        and previous.get(name, {}).get("fingerprint") == fingerprint
+    }
+    stale = [name for name in fingerprints if name not in cached]
+    return cached, stale
+
+
+def load_snapshot(s3, bucket, key):
+    """
+    Read the previous snapshot from S3.
+
+    Returns:
+        dict: rule name -> record. Empty when no snapshot exists yet or the
+        object cannot be parsed, which simply forces a full fetch.
+    """
+    try:
+        body = s3.get_object(Bucket=bucket, Key=key)["Body"].read()
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404"):
+            print(f"ERROR: Failed to read compliance snapshot: {e}")
+        return {}
+    records = {}
+    try:
+        for line in gzip.decompress(body).splitlines():
+            if line.strip():
+                record = json.loads(line)
+                records[record["rule"]] = record
+    except (OSError, ValueError, KeyError) as e:
+        print(f"ERROR: Ignoring unreadable compliance snapshot: {e}")
+        return {}
+    return records
+
+
+def save_snapshot(s3, bucket, key, records):
+    """
+    Write snapshot records (an iterable of dicts) to S3 as gzipped JSON Lines.
+
+    Returns:
+        bool: Whether the snapshot was stored. A failed write is logged and
+        only costs the next run a full fetch, so the report carries on.
+    """
+    lines = "".join(
+        json.dumps(record, separators=(",", ":"), sort_keys=True) + "\n"
+        for record in records
+    )
+    try:
+        s3.put_object(
+            Bucket=bucket,
+            Key=key,
+            Body=gzip.compress(lines.encode("utf-8")),
+            ContentType=SNAPSHOT_CONTENT_TYPE,
+        )
+    except (ClientError, BotoCoreError) as e:
+        print(f"ERROR: Failed to write compliance snapshot: {e}")
+        return False
+    return True
@@ -0,0 +1,49 @@
+"""
+Offline test setup for the compliance reporter Lambda.
+
+Run from the repository root with:
+
+    python -m pytest modules/aws/config/lambda_compliance_reporter/tests
+
+The handler modules are importable as they are at the root of the deployment
+package. The vendored dependencies in package/ are built for the Lambda runtime
+(CPython 3.12 on x86_64), so locally installed copies take precedence over them.
+No test talks to AWS: clients are stubbed, but botocore still needs a region and
+credentials to build them.
+"""
+
+import io
+import os
+import sys
+
+import pytest
+from botocore.exceptions import ClientError
+
+LAMBDA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, LAMBDA_DIR)
+sys.path.append(os.path.join(LAMBDA_DIR, "package"))
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+
+class MemoryS3:
+    """S3 client stand-in keeping put_object bodies in a dict."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, ContentType):
+        self.objects[(Bucket, Key)] = Body
+
+    def get_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)])}
+
+
+@pytest.fixture
+def memory_s3():
+    return MemoryS3()
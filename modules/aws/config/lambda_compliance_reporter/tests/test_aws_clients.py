@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta, timezone
+
+import aws_clients
+import boto3
+import botocore.session
+import pytest
+from botocore.stub import Stubber
+
+ROLE_ARN = "arn:aws:iam::222222222222:role/ComplianceReport"
+
+
+@pytest.fixture
+def sts(monkeypatch):
+    """STS client handed to every AssumeRole fetcher, with stubbed responses."""
+    client = boto3.client("sts", region_name="us-east-1")
+    monkeypatch.setattr(
+        botocore.session.Session, "create_client", lambda self, *a, **kw: client
+    )
+    monkeypatch.setattr(aws_clients, "_role_sessions", {})
+    with Stubber(client) as stubber:
+        client.stubber = stubber
+        yield client
+        stubber.assert_no_pending_responses()
+
+
+def expect_assume_role(sts, key_id, expires_in):
+    sts.stubber.add_response(
+        "assume_role",
+        {
+            "Credentials": {
+                "AccessKeyId": key_id,
+                "SecretAccessKey": "secret",
+                "SessionToken": "token",
+                "Expiration": datetime.now(timezone.utc) + expires_in,
+            }
+        },
+        {"RoleArn": ROLE_ARN, "RoleSessionName": "report-lambda"},
+    )
+
+
+def test_role_session_assumes_the_role_on_first_use_only(sts):
+    session = aws_clients.get_role_session(ROLE_ARN)
+    expect_assume_role(sts, "ASIAFIRSTEXAMPLE", timedelta(hours=1))
+
+    credentials = session.get_credentials()
+    assert credentials.method == aws_clients.RoleCredentialProvider.METHOD
+    assert credentials.get_frozen_credentials().access_key == "ASIAFIRSTEXAMPLE"
+    # Still valid: no second AssumeRole call
+    assert credentials.get_frozen_credentials().access_key == "ASIAFIRSTEXAMPLE"
+    assert aws_clients.get_role_session(ROLE_ARN) is session
+
+
+def test_role_credentials_refresh_before_they_expire(sts):
+    credentials = aws_clients.get_role_session(ROLE_ARN).get_credentials()
+    expect_assume_role(sts, "ASIAEXPIRINGEXAMPLE", timedelta(minutes=5))
+    expect_assume_role(sts, "ASIAFRESHEXAMPLE", timedelta(hours=1))
+
+    assert credentials.get_frozen_credentials().access_key == "ASIAEXPIRINGEXAMPLE"
+    assert credentials.get_frozen_credentials().access_key == "ASIAFRESHEXAMPLE"
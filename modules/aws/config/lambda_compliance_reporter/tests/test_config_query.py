@@ -0,0 +1,185 @@
+import json
+
+import boto3
+import lambda_function
+import pytest
+from botocore.stub import ANY, Stubber
+from config_query import QUERY_PAGE_SIZE, aggregate_query
+
+USERS = lambda_function.IamUserDirectory(iam=object(), account_id="111111111111")
+ACCOUNT_ID = "222222222222"
+ROLE_ARN = f"arn:aws:iam::{ACCOUNT_ID}:role/ComplianceReport"
+AGGREGATOR = "organization"
+
+
+def resource_compliance_item(resource_type, resource_id, rules):
+    """
+    Build a ResourceCompliance query result.
+
+    rules maps rule name -> complianceType; a list means all NON_COMPLIANT.
+    """
+    if not isinstance(rules, dict):
+        rules = dict.fromkeys(rules, "NON_COMPLIANT")
+    return {
+        "configuration": {
+            "targetResourceId": resource_id,
+            "targetResourceType": resource_type,
+            "configRuleList": [
+                {"configRuleName": name, "complianceType": compliance}
+                for name, compliance in rules.items()
+            ],
+        }
+    }
+
+
+def select_resource_config_stub(config, pages, expression=ANY, aggregator_name=None):
+    """
+    Return a botocore Stubber queuing the given query result pages.
+
+    Parameters:
+        config: boto3 Config client to stub.
+        pages (list[list[dict]]): Items (see resource_compliance_item) per
+            response page; NextToken values chain the pages.
+        expression: Expected query Expression (ANY to skip the check).
+        aggregator_name (str | None): Stub select_aggregate_resource_config.
+    """
+    stubber = Stubber(config)
+    if aggregator_name:
+        operation = "select_aggregate_resource_config"
+    else:
+        operation = "select_resource_config"
+    for i, items in enumerate(pages):
+        response = {"Results": [json.dumps(item) for item in items]}
+        if i + 1 < len(pages):
+            response["NextToken"] = f"page-{i + 1}"
+        expected = {"Expression": expression, "Limit": QUERY_PAGE_SIZE}
+        if aggregator_name:
+            expected["ConfigurationAggregatorName"] = aggregator_name
+        if i:
+            expected["NextToken"] = f"page-{i}"
+        stubber.add_response(operation, response, expected)
+    return stubber
+
+
+@pytest.fixture
+def config(monkeypatch):
+    """Real Config client returned by lambda_function.get_client."""
+    client = boto3.client("config", region_name="eu-west-1")
+    client.requested = []
+
+    def get_client(service_name, role_arn=None):
+        assert service_name == "config"
+        client.requested.append(role_arn)
+        return client
+
+    monkeypatch.setattr(lambda_function, "get_client", get_client)
+    return client
+
+
+def volume(volume_id):
+    return {
+        "ResourceType": "AWS::EC2::Volume",
+        "ResourceId": volume_id,
+        "ResourceName": volume_id,
+        "ResourceArn": volume_id,
+    }
+
+
+def test_query_pages_are_grouped_by_rule_in_report_order(config):
+    pages = [
+        [
+            resource_compliance_item("AWS::EC2::Volume", "vol-b", ["encrypted"]),
+            resource_compliance_item(
+                "AWS::EC2::Volume", "vol-a", ["encrypted", "in-use"]
+            ),
+        ],
+        [
+            # Same resource again on a later page: reported once
+            resource_compliance_item("AWS::EC2::Volume", "vol-b", ["encrypted"]),
+            # Rules that are not reported, or not NON_COMPLIANT, are ignored
+            resource_compliance_item(
+                "AWS::EC2::Volume",
+                "vol-c",
+                {"unreported": "NON_COMPLIANT", "in-use": "COMPLIANT"},
+            ),
+        ],
+        [resource_compliance_item("AWS::EC2::EIP", "eipalloc-1", ["in-use"])],
+    ]
+
+    with select_resource_config_stub(config, pages) as stubber:
+        results = lambda_function.query_rule_resources(
+            ["in-use", "encrypted", "clean"], USERS, ACCOUNT_ID, role_arn=ROLE_ARN
+        )
+        stubber.assert_no_pending_responses()
+
+    assert config.requested == [ROLE_ARN]
+    assert results == [
+        (
+            "in-use",
+            [
+                {
+                    "ResourceType": "AWS::EC2::EIP",
+                    "ResourceId": "eipalloc-1",
+                    "ResourceName": "eipalloc-1",
+                    "ResourceArn": "eipalloc-1",
+                },
+                volume("vol-a"),
+            ],
+        ),
+        ("encrypted", [volume("vol-a"), volume("vol-b")]),
+        ("clean", []),
+    ]
+
+
+def test_aggregator_query_selects_the_account_and_region(config, monkeypatch):
+    monkeypatch.setattr(lambda_function, "CONFIG_AGGREGATOR_NAME", AGGREGATOR)
+    pages = [
+        [resource_compliance_item("AWS::EC2::Volume", "vol-1", ["encrypted"])],
+        [resource_compliance_item("AWS::EC2::Volume", "vol-2", ["encrypted"])],
+    ]
+
+    with select_resource_config_stub(
+        config,
+        pages,
+        expression=aggregate_query(ACCOUNT_ID, "eu-west-1"),
+        aggregator_name=AGGREGATOR,
+    ) as stubber:
+        results = lambda_function.query_rule_resources(
+            ["encrypted"], USERS, ACCOUNT_ID, role_arn=ROLE_ARN
+        )
+        stubber.assert_no_pending_responses()
+
+    # The aggregator lives in the reporter's account: no member role is used
+    assert config.requested == [None]
+    assert results == [("encrypted", [volume("vol-1"), volume("vol-2")])]
+    assert aggregate_query(ACCOUNT_ID, "eu-west-1").endswith(
+        "AND accountId = '222222222222' AND awsRegion = 'eu-west-1'"
+    )
+
+
+def test_no_rules_runs_no_query(config):
+    assert lambda_function.query_rule_resources([], USERS, ACCOUNT_ID) == []
+    assert config.requested == []
+
+
+@pytest.mark.parametrize(
+    "account_id, region",
+    [
+        ("22222222222", "eu-west-1"),
+        ("222222222222' OR accountId LIKE '%", "eu-west-1"),
+        ("222222222222\n", "eu-west-1"),
+        (222222222222, "eu-west-1"),
+        (None, "eu-west-1"),
+        (ACCOUNT_ID, "eu-west-1' OR awsRegion LIKE '%"),
+        (ACCOUNT_ID, "EU-WEST-1"),
+        (ACCOUNT_ID, None),
+    ],
+)
+def test_aggregator_query_rejects_malformed_account_or_region(account_id, region):
+    with pytest.raises(ValueError):
+        aggregate_query(account_id, region)
+
+
+def test_aggregator_query_accepts_partition_regions():
+    for region in ("us-east-1", "us-gov-west-1", "cn-northwest-1", "ap-southeast-4"):
+        assert aggregate_query(ACCOUNT_ID, region).endswith(f"awsRegion = '{region}'")
@@ -0,0 +1,359 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+import boto3
+import lambda_function
+import pytest
+from botocore.stub import Stubber
+from reportlab.lib import colors
+from reportlab.platypus import Paragraph
+from snapshot import load_snapshot, rule_fingerprint, save_snapshot
+
+# Volumes never need an IAM lookup, so the directory's client is never used
+USERS = lambda_function.IamUserDirectory(iam=object(), account_id="111111111111")
+
+
+class FakeConfig:
+    """
+    Config client stand-in serving get_compliance_details_by_config_rule pages.
+
+    Parameters:
+        pages (dict): rule name -> list of pages, each a list of resource IDs.
+        on_paginate (callable | None): Called with the rule name as each
+            worker starts paging, e.g. to block or record concurrency.
+    """
+
+    def __init__(self, pages, on_paginate=None):
+        self.pages = pages
+        self.on_paginate = on_paginate
+
+    def get_paginator(self, operation_name):
+        assert operation_name == "get_compliance_details_by_config_rule"
+        return self
+
+    def paginate(self, ConfigRuleName, ComplianceTypes):
+        assert ComplianceTypes == ["NON_COMPLIANT"]
+        if self.on_paginate:
+            self.on_paginate(ConfigRuleName)
+        for page in self.pages[ConfigRuleName]:
+            yield {
+                "EvaluationResults": [
+                    {
+                        "EvaluationResultIdentifier": {
+                            "EvaluationResultQualifier": {
+                                "ResourceType": "AWS::EC2::Volume",
+                                "ResourceId": resource_id,
+                            }
+                        }
+                    }
+                    for resource_id in page
+                ]
+            }
+
+
+@pytest.fixture
+def use_config(monkeypatch):
+    """Route lambda_function's Config clients to the given fake."""
+
+    def use(config):
+        clients = []
+
+        def get_client(service_name, role_arn=None):
+            assert service_name == "config"
+            clients.append(role_arn)
+            return config
+
+        monkeypatch.setattr(lambda_function, "get_client", get_client)
+        return clients
+
+    return use
+
+
+def resource_ids(fetched):
+    return [(name, [r["ResourceId"] for r in rows]) for name, rows in fetched]
+
+
+def test_fetch_returns_rules_in_request_order(use_config):
+    rules = [f"rule-{i}" for i in range(12)]
+    pages = {name: [[f"{name}-a", f"{name}-b"], [f"{name}-c"]] for name in rules}
+    jitter = random.Random(7)
+    use_config(FakeConfig(pages, lambda _: time.sleep(jitter.random() / 100)))
+
+    fetched = lambda_function.fetch_non_compliant_resources(
+        rules, users=USERS, max_workers=4
+    )
+
+    assert resource_ids(fetched) == [
+        (name, [f"{name}-a", f"{name}-b", f"{name}-c"]) for name in rules
+    ]
+
+
+def test_fetch_runs_rules_concurrently(use_config):
+    rules = ["a", "b", "c", "d"]
+    # Every worker must be in flight at once for the barrier to release
+    barrier = threading.Barrier(len(rules), timeout=5)
+    use_config(FakeConfig({name: [[name]] for name in rules}, lambda _: barrier.wait()))
+
+    fetched = lambda_function.fetch_non_compliant_resources(
+        rules, users=USERS, max_workers=len(rules)
+    )
+
+    assert resource_ids(fetched) == [(name, [name]) for name in rules]
+
+
+def test_fetch_bounds_concurrency_and_shares_one_client(use_config):
+    rules = [f"rule-{i}" for i in range(10)]
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def track(_):
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.01)
+        with lock:
+            running.pop()
+
+    clients = use_config(FakeConfig({name: [[]] for name in rules}, track))
+
+    lambda_function.fetch_non_compliant_resources(
+        rules, users=USERS, max_workers=3, role_arn="arn:aws:iam::111111111111:role/r"
+    )
+
+    assert max(peak) <= 3
+    assert clients == ["arn:aws:iam::111111111111:role/r"]
+
+
+def test_fetch_without_rules_creates_no_client(use_config):
+    clients = use_config(FakeConfig({}))
+
+    assert lambda_function.fetch_non_compliant_resources([], users=USERS) == []
+    assert clients == []
+
+
+def volume_row(resource_id):
+    return {
+        "ResourceType": "AWS::EC2::Volume",
+        "ResourceId": resource_id,
+        "ResourceName": resource_id,
+        "ResourceArn": f"arn:aws:ec2:us-east-1:111111111111:volume/{resource_id}",
+    }
+
+
+def test_incremental_report_refetches_only_changed_rules(monkeypatch, memory_s3):
+    evaluated = datetime(2025, 5, 1, tzinfo=timezone.utc)
+    later = datetime(2025, 5, 8, tzinfo=timezone.utc)
+    save_snapshot(
+        memory_s3,
+        "bucket",
+        "state/snapshot",
+        [
+            {
+                "rule": name,
+                "fingerprint": rule_fingerprint("NON_COMPLIANT", evaluated),
+                "resources": [volume_row(f"{name}-cached")],
+            }
+            for name in ("unchanged", "re-evaluated")
+        ],
+    )
+    rules = ["unchanged", "compliant", "re-evaluated", "new"]
+    fetched_rules = []
+
+    def fetch(rule_names, users, role_arn=None):
+        fetched_rules.append(list(rule_names))
+        return [(name, [volume_row(f"{name}-fetched")]) for name in rule_names]
+
+    monkeypatch.setattr(lambda_function, "COMPLIANCE_ENGINE", "api")
+    monkeypatch.setattr(lambda_function, "INCREMENTAL_SNAPSHOTS", True)
+    monkeypatch.setattr(lambda_function, "get_client", lambda *a, **k: object())
+    monkeypatch.setattr(
+        lambda_function,
+        "get_config_rules",
+        lambda role_arn=None: [{"ConfigRuleName": name} for name in rules],
+    )
+    monkeypatch.setattr(
+        lambda_function,
+        "get_compliance_status",
+        lambda role_arn=None: {
+            name: "COMPLIANT" if name == "compliant" else "NON_COMPLIANT"
+            for name in rules
+        },
+    )
+    monkeypatch.setattr(
+        lambda_function,
+        "get_rule_evaluation_times",
+        lambda rule_names, role_arn=None: {
+            "unchanged": evaluated,
+            "compliant": evaluated,
+            "re-evaluated": later,
+            "new": evaluated,
+        },
+    )
+    monkeypatch.setattr(lambda_function, "fetch_non_compliant_resources", fetch)
+    monkeypatch.setattr(
+        lambda_function, "get_resource_names_from_tags", lambda rows, role_arn: {}
+    )
+
+    report = lambda_function.collect_account_report(
+        "Account", "111111111111", memory_s3, "bucket", "state/snapshot"
+    )
+
+    assert fetched_rules == [["re-evaluated", "new"]]
+    assert [row[0] for row in report["non_compliant_section"]] == [
+        "Rule: unchanged",
+        volume_row("unchanged-cached")["ResourceArn"],
+        "Rule: re-evaluated",
+        volume_row("re-evaluated-fetched")["ResourceArn"],
+        "Rule: new",
+        volume_row("new-fetched")["ResourceArn"],
+    ]
+    snapshot = load_snapshot(memory_s3, "bucket", "state/snapshot")
+    assert {name: r["resources"][0]["ResourceId"] for name, r in snapshot.items()} == {
+        "unchanged": "unchanged-cached",
+        "re-evaluated": "re-evaluated-fetched",
+        "new": "new-fetched",
+    }
+    assert snapshot["re-evaluated"]["fingerprint"] == rule_fingerprint(
+        "NON_COMPLIANT", later
+    )
+
+
+STATUS_TABLE = [
+    [Paragraph("Rule"), Paragraph("Description"), Paragraph("Status")],
+    *(
+        [Paragraph(f"rule-{i}"), Paragraph(""), Paragraph(status)]
+        for i, status in enumerate(["NON_COMPLIANT", "UNKNOWN", "COMPLIANT", "N/A"])
+    ),
+]
+
+
+def test_status_backgrounds_use_one_command_with_cellbackgrounds():
+    # The vendored reportlab the tests run against supports it
+    assert lambda_function.CELLBACKGROUNDS_SUPPORTED
+
+    assert lambda_function.status_backgrounds(STATUS_TABLE, 2) == [
+        ("CELLBACKGROUNDS", (2, 1), (2, -1), lambda_function.STATUS_COLORS)
+    ]
+
+
+def test_status_backgrounds_fall_back_to_per_cell_commands(monkeypatch):
+    monkeypatch.setattr(lambda_function, "CELLBACKGROUNDS_SUPPORTED", False)
+
+    assert lambda_function.status_backgrounds(STATUS_TABLE, 2) == [
+        ("BACKGROUND", (2, 1), (2, 1), colors.lightpink),
+        ("BACKGROUND", (2, 3), (2, 3), colors.lightgreen),
+        ("BACKGROUND", (2, 4), (2, 4), colors.lightgrey),
+    ]
+
+
+def tag_mapping(arn, **tags):
+    return {
+        "ResourceARN": arn,
+        "Tags": [{"Key": key, "Value": value} for key, value in tags.items()],
+    }
+
+
+def test_name_tags_are_swept_once_per_resource_type(monkeypatch):
+    tagging = boto3.client("resourcegroupstaggingapi", region_name="us-east-1")
+    monkeypatch.setattr(lambda_function, "get_client", lambda *a, **k: tagging)
+    # Evaluation results carry only a type and an ID, never an ARN
+    rows = [
+        lambda_function.resource_row(
+            {"ResourceType": "AWS::EC2::Volume", "ResourceId": volume_id}, USERS
+        )
+        for volume_id in ("vol-1", "vol-2", "vol-untagged")
+    ]
+    rows.append(
+        lambda_function.resource_row(
+            {"ResourceType": "AWS::S3::Bucket", "ResourceId": "logs"}, USERS
+        )
+    )
+    volume_arn = "arn:aws:ec2:us-east-1:111111111111:volume/"
+
+    with Stubber(tagging) as stubber:
+        stubber.add_response(
+            "get_resources",
+            {
+                "ResourceTagMappingList": [
+                    tag_mapping(volume_arn + "vol-1", Name="data"),
+                    # Not in the report
+                    tag_mapping(volume_arn + "vol-other", Name="other"),
+                ],
+                "PaginationToken": "page-2",
+            },
+            {
+                "ResourceTypeFilters": ["ec2:volume"],
+                "TagFilters": [{"Key": "Name"}],
+                "ResourcesPerPage": 100,
+            },
+        )
+        stubber.add_response(
+            "get_resources",
+            {"ResourceTagMappingList": [tag_mapping(volume_arn + "vol-2", Name="db")]},
+            {
+                "ResourceTypeFilters": ["ec2:volume"],
+                "TagFilters": [{"Key": "Name"}],
+                "ResourcesPerPage": 100,
+                "PaginationToken": "page-2",
+            },
+        )
+        stubber.add_response(
+            "get_resources",
+            {
+                "ResourceTagMappingList": [
+                    tag_mapping("arn:aws:s3:::logs", Name="Access logs", env="prod")
+                ]
+            },
+            {
+                "ResourceTypeFilters": ["s3"],
+                "TagFilters": [{"Key": "Name"}],
+                "ResourcesPerPage": 100,
+            },
+        )
+        names = lambda_function.get_resource_names_from_tags(rows)
+        stubber.assert_no_pending_responses()
+
+    assert names == {
+        ("AWS::EC2::Volume", "vol-1"): "data",
+        ("AWS::EC2::Volume", "vol-2"): "db",
+        ("AWS::S3::Bucket", "logs"): "Access logs",
+    }
+
+
+def test_name_tags_without_resources_create_no_client(monkeypatch):
+    monkeypatch.setattr(lambda_function, "get_client", None)
+
+    assert lambda_function.get_resource_names_from_tags(iter([])) == {}
+
+
+def test_evaluation_times_are_requested_by_name_in_batches(monkeypatch):
+    config = boto3.client("config", region_name="us-east-1")
+    monkeypatch.setattr(lambda_function, "get_client", lambda *a, **k: config)
+    # Custom rules are only reported when named explicitly
+    names = [f"custom-{i}" for i in range(30)]
+    evaluated = datetime(2025, 5, 1, tzinfo=timezone.utc)
+
+    with Stubber(config) as stubber:
+        for batch in (names[:25], names[25:]):
+            stubber.add_response(
+                "describe_config_rule_evaluation_status",
+                {
+                    "ConfigRulesEvaluationStatus": [
+                        {
+                            "ConfigRuleName": name,
+                            "LastSuccessfulEvaluationTime": evaluated,
+                        }
+                        for name in batch
+                        if name != "custom-27"  # never evaluated
+                    ]
+                },
+                {"ConfigRuleNames": batch},
+            )
+        times = lambda_function.get_rule_evaluation_times(names)
+        stubber.assert_no_pending_responses()
+
+    assert times == {name: evaluated for name in names if name != "custom-27"}
+    assert lambda_function.get_rule_evaluation_times([]) == {}
@@ -0,0 +1,144 @@
+import boto3
+import pytest
+from botocore.stub import Stubber
+from s3_stream import MIN_PART_SIZE, S3MultipartWriter
+
+BUCKET = "reports"
+KEY = "compliance/report.pdf"
+UPLOAD_ID = "upload-1"
+PART = MIN_PART_SIZE
+
+
+@pytest.fixture
+def s3():
+    client = boto3.client("s3", region_name="us-east-1")
+    with Stubber(client) as stubber:
+        client.stubber = stubber
+        yield client
+        stubber.assert_no_pending_responses()
+
+
+def payload(size):
+    return bytes(i % 251 for i in range(size))
+
+
+def expect_multipart(s3, parts):
+    """Queue the calls of a multipart upload whose parts are the given bytes."""
+    s3.stubber.add_response(
+        "create_multipart_upload",
+        {"UploadId": UPLOAD_ID},
+        {"Bucket": BUCKET, "Key": KEY, "ContentType": "application/pdf"},
+    )
+    for number, body in enumerate(parts, 1):
+        s3.stubber.add_response(
+            "upload_part",
+            {"ETag": f'"etag-{number}"'},
+            {
+                "Bucket": BUCKET,
+                "Key": KEY,
+                "UploadId": UPLOAD_ID,
+                "PartNumber": number,
+                "Body": body,
+            },
+        )
+    s3.stubber.add_response(
+        "complete_multipart_upload",
+        {},
+        {
+            "Bucket": BUCKET,
+            "Key": KEY,
+            "UploadId": UPLOAD_ID,
+            "MultipartUpload": {
+                "Parts": [
+                    {"ETag": f'"etag-{number}"', "PartNumber": number}
+                    for number in range(1, len(parts) + 1)
+                ]
+            },
+        },
+    )
+
+
+def writer(s3):
+    return S3MultipartWriter(s3, BUCKET, KEY, "application/pdf", part_size=PART)
+
+
+def write_in_chunks(out, data, chunk_size):
+    for i in range(0, len(data), chunk_size):
+        out.write(data[i : i + chunk_size])
+
+
+def test_output_smaller_than_a_part_is_one_put_object(s3):
+    s3.stubber.add_response(
+        "put_object",
+        {},
+        {
+            "Bucket": BUCKET,
+            "Key": KEY,
+            "Body": b"%PDF-1.4 small",
+            "ContentType": "application/pdf",
+        },
+    )
+
+    with writer(s3) as out:
+        out.write(b"%PDF-1.4 ")
+        out.write("small")
+
+    assert out.closed
+    assert out.bytes_written == 14
+
+
+def test_writes_are_split_into_full_parts_plus_a_final_remainder(s3):
+    data = payload(2 * PART + 12345)
+    expect_multipart(s3, [data[:PART], data[PART : 2 * PART], data[2 * PART :]])
+
+    with writer(s3) as out:
+        # Chunks straddle the part boundaries
+        write_in_chunks(out, data, 700001)
+        # Full parts are uploaded as soon as they fill, not at close
+        assert len(out._parts) == 2
+        assert len(out._buffer) == 12345
+
+    assert out.bytes_written == len(data)
+
+
+def test_exact_multiple_of_the_part_size_sends_no_empty_part(s3):
+    data = payload(2 * PART)
+    expect_multipart(s3, [data[:PART], data[PART:]])
+
+    with writer(s3) as out:
+        out.write(data)
+
+
+def test_part_size_is_clamped_to_the_s3_minimum(s3):
+    small = S3MultipartWriter(s3, BUCKET, KEY, "application/pdf", part_size=1024)
+
+    assert small.part_size == MIN_PART_SIZE
+
+
+def test_error_aborts_the_multipart_upload(s3):
+    data = payload(PART + 10)
+    s3.stubber.add_response("create_multipart_upload", {"UploadId": UPLOAD_ID})
+    s3.stubber.add_response("upload_part", {"ETag": '"etag-1"'})
+    s3.stubber.add_response(
+        "abort_multipart_upload",
+        {},
+        {"Bucket": BUCKET, "Key": KEY, "UploadId": UPLOAD_ID},
+    )
+
+    with pytest.raises(RuntimeError):
+        with writer(s3) as out:
+            out.write(data)
+            raise RuntimeError("layout failed")
+
+    assert out.closed
+    with pytest.raises(ValueError):
+        out.write(b"more")
+
+
+def test_error_before_the_first_part_calls_nothing(s3):
+    with pytest.raises(RuntimeError):
+        with writer(s3) as out:
+            out.write(b"%PDF-1.4")
+            raise RuntimeError("layout failed")
+
+    assert out.closed
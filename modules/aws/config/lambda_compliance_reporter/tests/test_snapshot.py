@@ -0,0 +1,85 @@
+import gzip
+from datetime import datetime, timezone
+
+from botocore.exceptions import ClientError
+from snapshot import load_snapshot, rule_fingerprint, save_snapshot, split_cached_rules
+
+EVALUATED = datetime(2025, 5, 1, 12, 0, tzinfo=timezone.utc)
+LATER = datetime(2025, 5, 8, 12, 0, tzinfo=timezone.utc)
+
+
+def record(rule, fingerprint, *resource_ids):
+    return {
+        "rule": rule,
+        "fingerprint": fingerprint,
+        "resources": [{"ResourceId": r} for r in resource_ids],
+    }
+
+
+def test_fingerprint_changes_with_compliance_or_evaluation_time():
+    fingerprint = rule_fingerprint("NON_COMPLIANT", EVALUATED)
+
+    assert fingerprint == rule_fingerprint("NON_COMPLIANT", EVALUATED)
+    assert fingerprint != rule_fingerprint("COMPLIANT", EVALUATED)
+    assert fingerprint != rule_fingerprint("NON_COMPLIANT", LATER)
+    assert rule_fingerprint("NON_COMPLIANT", None) is None
+
+
+def test_unchanged_rules_reuse_rows_and_the_rest_are_refetched():
+    unchanged = rule_fingerprint("NON_COMPLIANT", EVALUATED)
+    previous = {
+        "same": record("same", unchanged, "vol-1"),
+        "re-evaluated": record("re-evaluated", unchanged, "vol-2"),
+        "never-evaluated": record("never-evaluated", None, "vol-3"),
+    }
+    fingerprints = {
+        "re-evaluated": rule_fingerprint("NON_COMPLIANT", LATER),
+        "same": unchanged,
+        "new": unchanged,
+        "never-evaluated": None,
+    }
+
+    cached, stale = split_cached_rules(previous, fingerprints)
+
+    assert cached == {"same": [{"ResourceId": "vol-1"}]}
+    # Re-fetched in report order; a None fingerprint never matches, even a
+    # stored None
+    assert stale == ["re-evaluated", "new", "never-evaluated"]
+
+
+def test_without_a_previous_snapshot_every_rule_is_refetched():
+    fingerprints = {"a": rule_fingerprint("NON_COMPLIANT", EVALUATED), "b": None}
+
+    assert split_cached_rules({}, fingerprints) == ({}, ["a", "b"])
+
+
+def test_snapshot_round_trips_through_s3(memory_s3):
+    records = [
+        record("a", rule_fingerprint("NON_COMPLIANT", EVALUATED), "vol-1", "vol-2"),
+        record("b", None),
+    ]
+
+    assert save_snapshot(memory_s3, "bucket", "state/snapshot.jsonl.gz", iter(records))
+
+    assert load_snapshot(memory_s3, "bucket", "state/snapshot.jsonl.gz") == {
+        r["rule"]: r for r in records
+    }
+
+
+def test_missing_or_unreadable_snapshot_forces_a_full_fetch(memory_s3):
+    memory_s3.objects[("bucket", "not-gzip")] = b"{}"
+    memory_s3.objects[("bucket", "no-rule")] = gzip.compress(b'{"fingerprint": 1}\n')
+
+    assert load_snapshot(memory_s3, "bucket", "missing") == {}
+    assert load_snapshot(memory_s3, "bucket", "not-gzip") == {}
+    assert load_snapshot(memory_s3, "bucket", "no-rule") == {}
+
+
+def test_failed_snapshot_write_is_logged_not_raised(memory_s3, monkeypatch, capsys):
+    def put_object(**kwargs):
+        raise ClientError({"Error": {"Code": "AccessDenied"}}, "PutObject")
+
+    monkeypatch.setattr(memory_s3, "put_object", put_object)
+
+    assert not save_snapshot(memory_s3, "bucket", "state", [record("a", None)])
+    assert "Failed to write compliance snapshot" in capsys.readouterr().out
@@ -4,6 +4,7 @@
 # Local variables
 # DO NOT REMOVE THIS LINE. Required for account_id references in locals and resources.
 data "aws_caller_identity" "current" {}
+data "aws_partition" "current" {}
 
 locals {
   customer_identifier  = var.customer_name != "" ? var.customer_name : "AWS Account ${data.aws_caller_identity.current.account_id}"
@@ -55,7 +56,8 @@ resource "aws_config_configuration_recorder" "config" {
       var.enable_ec2_volume_inuse_rule ? ["AWS::EC2::Volume"] : [],  # Volume type already potentially included
       var.enable_eip_attached_rule ? ["AWS::EC2::EIP"] : [],
       var.enable_rds_storage_encrypted_rule ? ["AWS::RDS::DBInstance"] : [],
-      var.enable_iam_user_access_key_age_rule ? ["AWS::IAM::User"] : [] # User type already potentially included
+      var.enable_iam_user_access_key_age_rule ? ["AWS::IAM::User"] : [], # User type already potentially included
+      var.reporter_compliance_engine == "query" ? ["AWS::Config::ResourceCompliance"] : [] # Read by the reporter's advanced query
     ))
   }
 
@@ -378,6 +380,7 @@ data "aws_iam_policy_document" "reporter_lambda_policy" {
   # - Write the PDF report to the Config S3 bucket
   # - Retrieve resource tags from various AWS services
   # - Get account name information
+  # - List Organization accounts and assume the member role (organization scope only)
   statement { # Basic CloudWatch Logging
     actions = [
       "logs:CreateLogGroup",
@@ -393,7 +396,10 @@ data "aws_iam_policy_document" "reporter_lambda_policy" {
       "config:GetComplianceDetailsByConfigRule",
       "config:GetResourceConfigHistory",
       "config:DescribeConfigRules",
-      "config:ListDiscoveredResources"
+      "config:DescribeConfigRuleEvaluationStatus",
+      "config:ListDiscoveredResources",
+      "config:SelectResourceConfig",
+      "config:SelectAggregateResourceConfig"
     ]
     resources = ["*"] # Config read actions often require *
     effect    = "Allow"
@@ -403,15 +409,25 @@ data "aws_iam_policy_document" "reporter_lambda_policy" {
     resources = ["*"]
     effect    = "Allow"
   }
-  statement { # S3 write access to the config bucket
+  statement { # S3 write access to the config bucket (multipart for streamed reports)
     actions = [
-      "s3:PutObject"
+      "s3:PutObject",
+      "s3:AbortMultipartUpload"
     ]
     resources = [
       "${aws_s3_bucket.config_bucket.arn}/${var.reporter_output_s3_prefix}*" # Restrict to the report prefix
     ]
     effect = "Allow"
   }
+  statement { # S3 read access to the previous compliance snapshot (incremental runs)
+    actions = [
+      "s3:GetObject"
+    ]
+    resources = [
+      "${aws_s3_bucket.config_bucket.arn}/${var.reporter_output_s3_prefix}state/*"
+    ]
+    effect = "Allow"
+  }
   statement { # EC2 resource tag access
     actions = [
       "ec2:DescribeInstances",
@@ -447,6 +463,13 @@ data "aws_iam_policy_document" "reporter_lambda_policy" {
     resources = ["*"] # Allow checking any IAM user
     effect    = "Allow"
   }
+  statement { # Bulk Name tag lookup via the Resource Groups Tagging API
+    actions = [
+      "tag:GetResources"
+    ]
+    resources = ["*"]
+    effect    = "Allow"
+  }
   statement { # Organizations account info access
     actions = [
       "organizations:DescribeAccount"
@@ -454,6 +477,26 @@ data "aws_iam_policy_document" "reporter_lambda_policy" {
     resources = ["*"]
     effect    = "Allow"
   }
+  dynamic "statement" { # Organization fan-out: list accounts and assume the member role
+    for_each = var.reporter_scope == "organization" ? [1] : []
+    content {
+      actions = [
+        "organizations:ListAccounts"
+      ]
+      resources = ["*"]
+      effect    = "Allow"
+    }
+  }
+  dynamic "statement" {
+    for_each = var.reporter_scope == "organization" ? [1] : []
+    content {
+      actions = [
+        "sts:AssumeRole"
+      ]
+      resources = ["arn:${data.aws_partition.current.partition}:iam::*:role/${var.reporter_org_member_role_name}"]
+      effect    = "Allow"
+    }
+  }
 }
 
 # Creates the IAM Role using the assume role policy document.
@@ -491,10 +534,22 @@ resource "aws_lambda_function" "compliance_reporter" {
 
   environment {
     variables = merge({
-      CONFIG_REPORT_BUCKET      = aws_s3_bucket.config_bucket.bucket
-      REPORTER_OUTPUT_S3_PREFIX = var.reporter_output_s3_prefix
-      CUSTOMER_IDENTIFIER       = local.customer_identifier
-      ACCOUNT_DISPLAY_NAME      = var.account_display_name
+      CONFIG_REPORT_BUCKET           = aws_s3_bucket.config_bucket.bucket
+      REPORTER_OUTPUT_S3_PREFIX      = var.reporter_output_s3_prefix
+      CUSTOMER_IDENTIFIER            = local.customer_identifier
+      ACCOUNT_DISPLAY_NAME           = var.account_display_name
+      RULE_FETCH_MAX_WORKERS         = tostring(var.reporter_rule_fetch_concurrency)
+      REPORT_OUTPUT_MODE             = var.reporter_output_mode
+      REPORTER_INCREMENTAL_SNAPSHOTS = tostring(var.reporter_enable_incremental_snapshots)
+      REPORT_SCOPE                   = var.reporter_scope
+      ORG_MEMBER_ROLE_NAME           = var.reporter_org_member_role_name
+      ORG_ACCOUNT_IDS                = join(",", var.reporter_org_account_ids)
+      ORG_MAX_CONCURRENT_ACCOUNTS    = tostring(var.reporter_org_max_concurrent_accounts)
+      ORG_REPORT_LAYOUT              = var.reporter_org_report_layout
+      COMPLIANCE_ENGINE              = var.reporter_compliance_engine
+      CONFIG_AGGREGATOR_NAME         = var.reporter_config_aggregator_name
+      RL_pageCompressionThreads      = tostring(var.reporter_pdf_compression_threads)
+      RL_zlibCompressionLevel        = tostring(var.reporter_pdf_compression_level)
     })
   }
 
@@ -220,3 +220,115 @@ variable "reporter_lambda_timeout" {
   type        = number
   default     = 120 # 2 minutes, PDF generation can take time
 }
+
+variable "reporter_rule_fetch_concurrency" {
+  description = "Maximum number of non-compliant rules whose evaluation results the compliance reporter fetches in parallel."
+  type        = number
+  default     = 8
+
+  validation {
+    condition     = var.reporter_rule_fetch_concurrency >= 1 && var.reporter_rule_fetch_concurrency <= 32
+    error_message = "The reporter_rule_fetch_concurrency must be between 1 and 32."
+  }
+}
+
+variable "reporter_pdf_compression_threads" {
+  description = "Threads that zlib-compress finished PDF pages while the compliance reporter lays out the rest (0 compresses serially when the PDF is written). Useful with reporter_lambda_memory_size large enough for several vCPUs."
+  type        = number
+  default     = 0
+
+  validation {
+    condition     = var.reporter_pdf_compression_threads >= 0 && var.reporter_pdf_compression_threads <= 16
+    error_message = "The reporter_pdf_compression_threads must be between 0 and 16."
+  }
+}
+
+variable "reporter_pdf_compression_level" {
+  description = "zlib level for the compliance report's compressed PDF streams: -1 uses zlib's default (6), 1 is fastest and 9 smallest."
+  type        = number
+  default     = -1
+
+  validation {
+    condition     = var.reporter_pdf_compression_level >= -1 && var.reporter_pdf_compression_level <= 9
+    error_message = "The reporter_pdf_compression_level must be between -1 and 9."
+  }
+}
+
+variable "reporter_output_mode" {
+  description = "How the compliance reporter writes the PDF: 'stream' uploads it to S3 via multipart upload as pages are written (flat memory), 'buffer' builds the whole document in memory first."
+  type        = string
+  default     = "stream"
+
+  validation {
+    condition     = contains(["stream", "buffer"], var.reporter_output_mode)
+    error_message = "The reporter_output_mode must be either 'stream' or 'buffer'."
+  }
+}
+
+variable "reporter_enable_incremental_snapshots" {
+  description = "Store a compliance snapshot under '<reporter_output_s3_prefix>state/' and, on later runs, only re-fetch evaluation results for rules whose compliance or last evaluation time changed."
+  type        = bool
+  default     = true
+}
+
+variable "reporter_scope" {
+  description = "'account' reports on the account the reporter runs in. 'organization' lists the Organization's active accounts and reports on each by assuming reporter_org_member_role_name (deploy in the management or a delegated administrator account)."
+  type        = string
+  default     = "account"
+
+  validation {
+    condition     = contains(["account", "organization"], var.reporter_scope)
+    error_message = "The reporter_scope must be either 'account' or 'organization'."
+  }
+}
+
+variable "reporter_org_member_role_name" {
+  description = "Name of the role assumed in each member account when reporter_scope is 'organization'. It needs the same Config, IAM and tag read permissions as the reporter role and must trust the reporter role."
+  type        = string
+  default     = "OrganizationAccountAccessRole"
+}
+
+variable "reporter_org_account_ids" {
+  description = "Optional allow-list of account IDs to report on when reporter_scope is 'organization' (empty = every active account)."
+  type        = list(string)
+  default     = []
+}
+
+variable "reporter_org_max_concurrent_accounts" {
+  description = "Maximum number of accounts collected in parallel when reporter_scope is 'organization'. Each account additionally uses up to reporter_rule_fetch_concurrency rule fetches."
+  type        = number
+  default     = 4
+
+  validation {
+    condition     = var.reporter_org_max_concurrent_accounts >= 1 && var.reporter_org_max_concurrent_accounts <= 16
+    error_message = "The reporter_org_max_concurrent_accounts must be between 1 and 16."
+  }
+}
+
+variable "reporter_org_report_layout" {
+  description = "When reporter_scope is 'organization': 'per_account' writes one PDF per account, 'combined' writes a single PDF with an Organization summary and a section per account."
+  type        = string
+  default     = "per_account"
+
+  validation {
+    condition     = contains(["per_account", "combined"], var.reporter_org_report_layout)
+    error_message = "The reporter_org_report_layout must be either 'per_account' or 'combined'."
+  }
+}
+
+variable "reporter_compliance_engine" {
+  description = "How the compliance reporter fetches non-compliant resources: 'api' calls GetComplianceDetailsByConfigRule once per non-compliant rule, 'query' reads them all with one AWS Config advanced query (SelectResourceConfig)."
+  type        = string
+  default     = "api"
+
+  validation {
+    condition     = contains(["api", "query"], var.reporter_compliance_engine)
+    error_message = "The reporter_compliance_engine must be either 'api' or 'query'."
+  }
+}
+
+variable "reporter_config_aggregator_name" {
+  description = "Optional AWS Config aggregator (in the reporter's account and region) that the 'query' engine queries with SelectAggregateResourceConfig instead of each account. Empty queries each account directly."
+  type        = string
+  default     = ""
+}
@@ -0,0 +1,37 @@
+"""
+Pooled boto3 clients for the network diagram Lambda.
+
+Discovery runs every describe stream of a region at once on that region's EC2
+client, and several regions in parallel. Clients are therefore cached per
+(service, region) for the life of the execution environment, so warm
+invocations reuse them. Each is built with a connection pool wide enough for
+the concurrent streams, adaptive retries for EC2 throttling and bounded
+timeouts. boto3 sessions are not thread-safe, so clients are built under a lock.
+"""
+
+import threading
+
+import boto3
+from botocore.config import Config
+
+DISCOVERY_CLIENT_CONFIG = Config(
+    max_pool_connections=16,  # >= describe streams run at once per region
+    retries={"max_attempts": 10, "mode": "adaptive"},
+    connect_timeout=5,
+    read_timeout=60,
+)
+
+_session = boto3.session.Session()
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_client(service_name, region_name=None):
+    """Return the shared client for service_name in region_name (None: default)."""
+    key = (service_name, region_name)
+    with _lock:
+        if key not in _clients:
+            _clients[key] = _session.client(
+                service_name, region_name=region_name, config=DISCOVERY_CLIENT_CONFIG
+            )
+        return _clients[key]
@@ -0,0 +1,261 @@
+"""
+Resource discovery for the network diagram generator.
+
+Every describe_* call goes through a boto3 paginator (so nothing past the first
+page is dropped) with MaxResults set via PageSize, filters are applied
+server-side, and the independent describe streams run concurrently.
+
+Environment variables (all optional):
+- DISCOVERY_PAGE_SIZE (int): MaxResults per describe page (default 1000)
+- INSTANCE_STATES (str): Comma-separated instance-state-name values to include
+  (default "pending,running,stopping,stopped")
+- VPC_IDS (str): Comma-separated VPC IDs to restrict discovery to
+- INSTANCE_TAG_FILTERS (str): JSON object of tag key -> list of values, e.g.
+  '{"Environment": ["prod"]}', applied to instances
+- REGION_MAX_WORKERS (int): Regions discovered concurrently (default 4)
+- DISCOVERY_LAYERS (str): Comma-separated optional layers to discover, any of
+  "eni", "route", "transit_gateway", "vpc_peering_connection", "eip", or
+  "all" (default none)
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from aws_clients import get_client
+from topology import LAYERS, Topology
+
+
+def _csv_env(name, default=""):
+    return [v.strip() for v in os.environ.get(name, default).split(",") if v.strip()]
+
+
+PAGE_SIZE = int(os.environ.get("DISCOVERY_PAGE_SIZE", "1000"))
+INSTANCE_STATES = _csv_env("INSTANCE_STATES", "pending,running,stopping,stopped")
+VPC_IDS = _csv_env("VPC_IDS")
+INSTANCE_TAG_FILTERS = json.loads(os.environ.get("INSTANCE_TAG_FILTERS") or "{}")
+REGION_MAX_WORKERS = int(os.environ.get("REGION_MAX_WORKERS", "4"))
+
+
+def parse_layers(names):
+    """Validate DISCOVERY_LAYERS names ("all" selects every layer).
+
+    Raises:
+        ValueError: On an unknown layer name.
+    """
+    if "all" in names:
+        return list(LAYERS)
+    unknown = sorted(set(names) - set(LAYERS))
+    if unknown:
+        raise ValueError(f"Unsupported DISCOVERY_LAYERS: {', '.join(unknown)}")
+    return list(dict.fromkeys(names))
+
+
+DISCOVERY_LAYERS = parse_layers(_csv_env("DISCOVERY_LAYERS"))
+
+# APIs whose MaxResults is capped below DISCOVERY_PAGE_SIZE's range
+MAX_PAGE_SIZE = {"describe_route_tables": 100}
+
+
+def paginate(ec2, operation, result_key, filters=None):
+    """Collect every item of a paginated EC2 describe call.
+
+    Parameters:
+        ec2: boto3 EC2 client configured for the target region.
+        operation (str): Paginator name, e.g. "describe_vpcs".
+        result_key (str): Key holding the items in each page, e.g. "Vpcs".
+        filters (list[dict] | None): Server-side EC2 Filters.
+
+    Returns:
+        list[dict]: Items from all pages, in API order.
+    """
+    page_size = min(PAGE_SIZE, MAX_PAGE_SIZE.get(operation, PAGE_SIZE))
+    kwargs = {"PaginationConfig": {"PageSize": page_size}}
+    if filters:
+        kwargs["Filters"] = filters
+    items = []
+    for page in ec2.get_paginator(operation).paginate(**kwargs):
+        items.extend(page.get(result_key, []))
+    return items
+
+
+def _vpc_filters():
+    return [{"Name": "vpc-id", "Values": VPC_IDS}] if VPC_IDS else []
+
+
+def get_vpcs(ec2):  # ec2: boto3 EC2 client
+    """Return all VPCs for the client's region (restricted to VPC_IDS if set).
+
+    Parameters:
+        ec2: boto3 EC2 client configured for the target region.
+
+    Returns:
+        list[dict]: Items from every describe_vpcs() page's "Vpcs".
+    """
+    return paginate(ec2, "describe_vpcs", "Vpcs", _vpc_filters())
+
+
+def get_subnets(ec2):  # ec2: boto3 EC2 client
+    """Return all subnets for the client's region (restricted to VPC_IDS if set).
+
+    Parameters:
+        ec2: boto3 EC2 client configured for the target region.
+
+    Returns:
+        list[dict]: Items from every describe_subnets() page's "Subnets".
+    """
+    return paginate(ec2, "describe_subnets", "Subnets", _vpc_filters())
+
+
+def get_instances(ec2):  # ec2: boto3 EC2 client
+    """Return EC2 instance reservations matching the instance filters.
+
+    Note: EC2's DescribeInstances API returns a list of Reservations, each
+    containing an "Instances" list. Instances are filtered server-side by
+    INSTANCE_STATES, VPC_IDS, and INSTANCE_TAG_FILTERS.
+
+    Parameters:
+        ec2: boto3 EC2 client configured for the target region.
+
+    Returns:
+        list[dict]: Items from every describe_instances() page's "Reservations".
+    """
+    filters = _vpc_filters()
+    if INSTANCE_STATES:
+        filters.append({"Name": "instance-state-name", "Values": INSTANCE_STATES})
+    for key, values in INSTANCE_TAG_FILTERS.items():
+        values = values if isinstance(values, list) else [values]
+        filters.append({"Name": f"tag:{key}", "Values": values})
+    return paginate(ec2, "describe_instances", "Reservations", filters)
+
+
+def get_enis(ec2):  # ec2: boto3 EC2 client
+    """Return network interfaces (restricted to VPC_IDS if set)."""
+    return paginate(
+        ec2, "describe_network_interfaces", "NetworkInterfaces", _vpc_filters()
+    )
+
+
+def get_route_tables(ec2):  # ec2: boto3 EC2 client
+    """Return route tables, with routes and associations (VPC_IDS if set)."""
+    return paginate(ec2, "describe_route_tables", "RouteTables", _vpc_filters())
+
+
+def get_transit_gateways(ec2):  # ec2: boto3 EC2 client
+    """Return the transit gateways visible to the account."""
+    return paginate(ec2, "describe_transit_gateways", "TransitGateways")
+
+
+def get_tgw_attachments(ec2):  # ec2: boto3 EC2 client
+    """Return transit gateway VPC attachments (to VPC_IDS if set)."""
+    filters = [{"Name": "resource-type", "Values": ["vpc"]}]
+    if VPC_IDS:
+        filters.append({"Name": "resource-id", "Values": VPC_IDS})
+    return paginate(
+        ec2,
+        "describe_transit_gateway_attachments",
+        "TransitGatewayAttachments",
+        filters,
+    )
+
+
+def get_peerings(ec2):  # ec2: boto3 EC2 client
+    """Return live VPC peering connections.
+
+    Filters on either side's VPC would be ANDed by EC2, so VPC_IDS is applied
+    by Topology.build instead.
+    """
+    states = ["active", "pending-acceptance", "provisioning"]
+    return paginate(
+        ec2,
+        "describe_vpc_peering_connections",
+        "VpcPeeringConnections",
+        [{"Name": "status-code", "Values": states}],
+    )
+
+
+def get_eips(ec2):  # ec2: boto3 EC2 client
+    """Return VPC Elastic IPs (DescribeAddresses is not paginated)."""
+    filters = [{"Name": "domain", "Values": ["vpc"]}]
+    return ec2.describe_addresses(Filters=filters).get("Addresses", [])
+
+
+# Topology.build() argument -> discovery function, always and per layer
+BASE_STREAMS = {
+    "vpcs": get_vpcs,
+    "subnets": get_subnets,
+    "reservations": get_instances,
+}
+LAYER_STREAMS = {
+    "eni": {"enis": get_enis},
+    "route": {"route_tables": get_route_tables},
+    "transit_gateway": {
+        "transit_gateways": get_transit_gateways,
+        "tgw_attachments": get_tgw_attachments,
+    },
+    "vpc_peering_connection": {"peerings": get_peerings},
+    "eip": {"eips": get_eips},
+}
+
+
+def discover(ec2, layers=None):
+    """Run the VPC, subnet, instance, and layer describe streams concurrently.
+
+    Parameters:
+        ec2: boto3 EC2 client configured for the target region (thread-safe).
+        layers (list[str] | None): Optional layers; defaults to
+            DISCOVERY_LAYERS.
+
+    Returns:
+        dict: Topology.build() keyword arguments (vpcs, subnets,
+        reservations, plus one entry per layer stream).
+    """
+    streams = dict(BASE_STREAMS)
+    for layer in DISCOVERY_LAYERS if layers is None else layers:
+        streams.update(LAYER_STREAMS[layer])
+    with ThreadPoolExecutor(max_workers=len(streams)) as pool:
+        futures = {name: pool.submit(fn, ec2) for name, fn in streams.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def resolve_regions(setting, default_region):
+    """Expand the REGIONS setting into a list of region names.
+
+    Parameters:
+        setting (str): "" (scan default_region only), "all" (every region
+            enabled for the account, via describe_regions), or a
+            comma-separated list of region names.
+        default_region (str): Region used when setting is empty, and for the
+            describe_regions call.
+
+    Returns:
+        list[str]: Region names, sorted for "all", otherwise as given.
+    """
+    setting = (setting or "").strip()
+    if not setting:
+        return [default_region]
+    if setting.lower() == "all":
+        ec2 = get_client("ec2", region_name=default_region)
+        regions = ec2.describe_regions(AllRegions=False)["Regions"]
+        return sorted(r["RegionName"] for r in regions)
+    return [r.strip() for r in setting.split(",") if r.strip()]
+
+
+def discover_topology(region):
+    """Discover one region and index it into a Topology."""
+    streams = discover(get_client("ec2", region_name=region))
+    return Topology.build(region=region, **streams)
+
+
+def discover_topologies(regions):
+    """Discover several regions concurrently (at most REGION_MAX_WORKERS at once).
+
+    Parameters:
+        regions (list[str]): Region names.
+
+    Returns:
+        list[Topology]: One topology per region, in the order given.
+    """
+    workers = max(1, min(REGION_MAX_WORKERS, len(regions)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(discover_topology, regions))
@@ -0,0 +1,275 @@
+"""
+Machine-readable topology export for the network diagram generator.
+
+Serializes the same Topology graphs a diagram is drawn from, so downstream
+tooling (diffing, search, dashboards) can read what was discovered without
+re-running discovery:
+
+- "json": one compact document,
+  {"regions": [{"region", "vpcs": [{..., "subnets": [{..., "instances":
+  [...]}]}], "unplaced_instances": [...]}]}
+- "jsonl": JSON Lines, one flat record per resource with a "type" of "vpc",
+  "subnet", or "instance" and its parent IDs, ready for line-oriented tools
+
+Discovered layers add "eni", "route_table", "transit_gateway",
+"transit_gateway_attachment", "vpc_peering_connection", and "eip" records
+(under "layers" in the JSON document) plus the topology's "edge" records.
+
+Resources are emitted sorted by ID with a fixed set of attributes, so an
+unchanged topology always serializes to identical bytes.
+"""
+
+import json
+
+from topology import route_destination
+
+EXPORT_FORMATS = ("json", "jsonl")
+
+
+def _name(item):  # Value of the "Name" tag, if any
+    for tag in item.get("Tags", []):
+        if tag.get("Key") == "Name":
+            return tag.get("Value")
+    return None
+
+
+def vpc_record(vpc):
+    """Exported attributes of a describe_vpcs item."""
+    return {
+        "id": vpc["VpcId"],
+        "name": _name(vpc),
+        "cidr": vpc.get("CidrBlock"),
+        "is_default": vpc.get("IsDefault", False),
+    }
+
+
+def subnet_record(subnet):
+    """Exported attributes of a describe_subnets item."""
+    return {
+        "id": subnet["SubnetId"],
+        "name": _name(subnet),
+        "vpc_id": subnet.get("VpcId"),
+        "cidr": subnet.get("CidrBlock"),
+        "availability_zone": subnet.get("AvailabilityZone"),
+    }
+
+
+def instance_record(inst):
+    """Exported attributes of a describe_instances instance item."""
+    return {
+        "id": inst["InstanceId"],
+        "name": _name(inst),
+        "vpc_id": inst.get("VpcId"),
+        "subnet_id": inst.get("SubnetId"),
+        "instance_type": inst.get("InstanceType"),
+        "state": inst.get("State", {}).get("Name"),
+        "private_ip": inst.get("PrivateIpAddress"),
+    }
+
+
+def eni_record(eni):
+    """Exported attributes of a describe_network_interfaces item."""
+    return {
+        "id": eni["NetworkInterfaceId"],
+        "vpc_id": eni.get("VpcId"),
+        "subnet_id": eni.get("SubnetId"),
+        "interface_type": eni.get("InterfaceType"),
+        "private_ip": eni.get("PrivateIpAddress"),
+        "instance_id": eni.get("Attachment", {}).get("InstanceId"),
+        "description": eni.get("Description"),
+    }
+
+
+# Route attributes naming the target, in the order they are checked
+_ROUTE_TARGET_KEYS = (
+    "GatewayId",
+    "NatGatewayId",
+    "TransitGatewayId",
+    "VpcPeeringConnectionId",
+    "NetworkInterfaceId",
+    "InstanceId",
+    "VpcEndpointId",
+    "EgressOnlyInternetGatewayId",
+    "LocalGatewayId",
+    "CarrierGatewayId",
+)
+
+
+def route_table_record(rtb):
+    """Exported attributes of a describe_route_tables item."""
+    associations = rtb.get("Associations", [])
+    routes = []
+    for route in rtb.get("Routes", []):
+        target = next((route[k] for k in _ROUTE_TARGET_KEYS if route.get(k)), None)
+        routes.append(
+            {
+                "destination": route_destination(route),
+                "target": target,
+                "state": route.get("State"),
+            }
+        )
+    return {
+        "id": rtb["RouteTableId"],
+        "name": _name(rtb),
+        "vpc_id": rtb.get("VpcId"),
+        "main": any(a.get("Main") for a in associations),
+        "subnet_ids": sorted(a["SubnetId"] for a in associations if a.get("SubnetId")),
+        "routes": routes,
+    }
+
+
+def transit_gateway_record(tgw):
+    """Exported attributes of a describe_transit_gateways item."""
+    return {
+        "id": tgw["TransitGatewayId"],
+        "name": _name(tgw),
+        "owner_id": tgw.get("OwnerId"),
+        "state": tgw.get("State"),
+    }
+
+
+def tgw_attachment_record(attachment):
+    """Exported attributes of a describe_transit_gateway_attachments item."""
+    return {
+        "id": attachment["TransitGatewayAttachmentId"],
+        "transit_gateway_id": attachment.get("TransitGatewayId"),
+        "vpc_id": attachment.get("ResourceId"),
+        "state": attachment.get("State"),
+    }
+
+
+def peering_record(pcx):
+    """Exported attributes of a describe_vpc_peering_connections item."""
+    requester = pcx.get("RequesterVpcInfo", {})
+    accepter = pcx.get("AccepterVpcInfo", {})
+    return {
+        "id": pcx["VpcPeeringConnectionId"],
+        "requester_vpc_id": requester.get("VpcId"),
+        "requester_owner_id": requester.get("OwnerId"),
+        "requester_region": requester.get("Region"),
+        "accepter_vpc_id": accepter.get("VpcId"),
+        "accepter_owner_id": accepter.get("OwnerId"),
+        "accepter_region": accepter.get("Region"),
+        "status": pcx.get("Status", {}).get("Code"),
+    }
+
+
+def eip_record(eip_id, eip):
+    """Exported attributes of a describe_addresses item."""
+    return {
+        "id": eip_id,
+        "public_ip": eip.get("PublicIp"),
+        "instance_id": eip.get("InstanceId"),
+        "network_interface_id": eip.get("NetworkInterfaceId"),
+        "private_ip": eip.get("PrivateIpAddress"),
+    }
+
+
+def layer_records(topology):
+    """Return {record type: [record, ...]} for the topology's discovered layers.
+
+    Each list is sorted by ID; types with no items are omitted.
+    """
+    layers = {
+        "eni": [eni_record(topology.enis[k]) for k in sorted(topology.enis)],
+        "route_table": [
+            route_table_record(topology.route_tables[k])
+            for k in sorted(topology.route_tables)
+        ],
+        "transit_gateway": [
+            transit_gateway_record(topology.transit_gateways[k])
+            for k in sorted(topology.transit_gateways)
+        ],
+        "transit_gateway_attachment": [
+            tgw_attachment_record(topology.tgw_attachments[k])
+            for k in sorted(topology.tgw_attachments)
+        ],
+        "vpc_peering_connection": [
+            peering_record(topology.peerings[k]) for k in sorted(topology.peerings)
+        ],
+        "eip": [eip_record(k, topology.eips[k]) for k in sorted(topology.eips)],
+    }
+    return {kind: records for kind, records in layers.items() if records}
+
+
+def edge_record(edge):
+    source, target, label = edge
+    return {"source": source, "target": target, "label": label}
+
+
+def _by_id(items, id_key):
+    return sorted(items, key=lambda item: item[id_key])
+
+
+def topology_document(topology):
+    """Return the nested VPC -> Subnet -> Instance document for one region."""
+    vpcs = []
+    for vpc_id in sorted(topology.vpcs):
+        subnets = []
+        for subnet in _by_id(topology.vpc_subnets(vpc_id), "SubnetId"):
+            instances = topology.subnet_instances(subnet["SubnetId"])
+            record = subnet_record(subnet)
+            record["instances"] = [
+                instance_record(i) for i in _by_id(instances, "InstanceId")
+            ]
+            subnets.append(record)
+        record = vpc_record(topology.vpcs[vpc_id])
+        record["subnets"] = subnets
+        vpcs.append(record)
+    unplaced = [
+        instance_record(i) for i in _by_id(topology.unplaced_instances, "InstanceId")
+    ]
+    document = {
+        "region": topology.region,
+        "vpcs": vpcs,
+        "unplaced_instances": unplaced,
+    }
+    layers = layer_records(topology)
+    if layers:
+        document["layers"] = layers
+        document["edges"] = [edge_record(edge) for edge in topology.edges()]
+    return document
+
+
+def topology_records(topology):
+    """Yield one flat record per resource (and edge) of a region."""
+    region = topology.region
+    for vpc_id in sorted(topology.vpcs):
+        yield {"type": "vpc", "region": region, **vpc_record(topology.vpcs[vpc_id])}
+        for subnet in _by_id(topology.vpc_subnets(vpc_id), "SubnetId"):
+            yield {"type": "subnet", "region": region, **subnet_record(subnet)}
+            instances = topology.subnet_instances(subnet["SubnetId"])
+            for inst in _by_id(instances, "InstanceId"):
+                yield {"type": "instance", "region": region, **instance_record(inst)}
+    for inst in _by_id(topology.unplaced_instances, "InstanceId"):
+        yield {"type": "instance", "region": region, **instance_record(inst)}
+    layers = layer_records(topology)
+    for kind, records in layers.items():
+        for record in records:
+            yield {"type": kind, "region": region, **record}
+    if layers:
+        for edge in topology.edges():
+            yield {"type": "edge", "region": region, **edge_record(edge)}
+
+
+def serialize(fmt, topologies):
+    """Serialize topologies in an EXPORT_FORMATS format.
+
+    Parameters:
+        fmt (str): "json" or "jsonl".
+        topologies (list[Topology]): Graphs to export, one per region.
+
+    Returns:
+        bytes: UTF-8 encoded compact JSON / JSON Lines.
+    """
+    if fmt == "json":
+        document = {"regions": [topology_document(t) for t in topologies]}
+        return json.dumps(document, separators=(",", ":")).encode("utf-8")
+    if fmt == "jsonl":
+        lines = (
+            json.dumps(record, separators=(",", ":"))
+            for t in topologies
+            for record in topology_records(t)
+        )
+        return "".join(f"{line}\n" for line in lines).encode("utf-8")
+    raise ValueError(f"Unsupported export format: {fmt}")
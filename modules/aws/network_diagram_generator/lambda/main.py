@@ -3,9 +3,14 @@ AWS Network Diagram Generator (AWS Lambda)
 
 Renders a simple AWS network diagram using the `diagrams` library (Graphviz under
 the hood):
-- Discovers VPCs, Subnets, and EC2 instances in a single region
-- Draws a VPC -> Subnet -> EC2 hierarchy
-- Uploads the generated PNG to S3
+- Discovers VPCs, Subnets, and EC2 instances in one or more regions using
+  paginated, server-side filtered describe calls run concurrently
+  (see discovery.py)
+- Indexes them into a topology graph (see topology.py) in one linear pass
+- Draws a VPC -> Subnet -> EC2 hierarchy, plus any optional layers (ENIs,
+  route tables, transit gateways, VPC peering, Elastic IPs) and their edges
+- Uploads the generated PNG/SVG diagram(s) and optional JSON/JSON Lines
+  topology export(s) to S3
 
 Requirements:
 - `diagrams` Python library available in the Lambda package
@@ -14,106 +19,461 @@ Requirements:
 Environment variables:
 - S3_BUCKET (str, required): S3 bucket to upload the diagram to
 - AWS_REGION (str, optional): Region to scan; defaults to "us-east-1"
+- REGIONS (str, optional): Comma-separated regions, or "all" for every enabled
+  region; defaults to AWS_REGION only
+- REGION_LAYOUT (str, optional): "combined" (default) draws one diagram with a
+  cluster per region; "per_region" uploads network_diagram-<region>.png per region
+- RENDER_MODE (str, optional): "single" (default) lays out each diagram above as
+  one Graphviz graph. "sharded" renders each VPC (or group of SHARD_SIZE VPCs)
+  as its own graph under network_diagram/<region>/, plus a VPC-level
+  network_diagram/overview.png and a network_diagram/index.html linking them,
+  so layout time scales with the largest VPC rather than the whole account
+- SHARD_SIZE (int, optional): VPCs per sharded diagram (default 1)
+- SHARD_MAX_WORKERS (int, optional): Diagrams laid out concurrently, each by its
+  own Graphviz process (default 4)
+- OUTPUT_FORMATS (str, optional): Comma-separated outputs to write per diagram,
+  any of "png", "svg" (rendered from the same graph), "json", "jsonl" (the
+  discovered topology; see export.py); defaults to "png"
+
+Change detection:
+- Each uploaded diagram carries the SHA-256 of its canonical topology as the
+  S3 object metadata "topology-sha256". When a later run discovers the same
+  topology the Graphviz layout, render, and upload are skipped. Invoke with
+  {"force": true} to re-render regardless.
+- DISCOVERY_PAGE_SIZE, INSTANCE_STATES, VPC_IDS, INSTANCE_TAG_FILTERS
+  (optional): Discovery paging and filters; see discovery.py
+- DISCOVERY_LAYERS (optional): Extra layers to discover and draw (ENIs, route
+  tables, transit gateway attachments, VPC peering, Elastic IPs); see
+  discovery.py
 
 IAM permissions (exec role):
 - s3:PutObject to the target bucket/key
+- s3:GetObject on the target key (HeadObject, for change detection)
 """
 
+import hashlib
+import html
+import json
 import logging
 import os
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
-import boto3
 import botocore
-from diagrams import Cluster, Diagram
-from diagrams.aws.compute import EC2
+from aws_clients import get_client
+from diagrams import Cluster, Diagram, Edge
+from diagrams.aws.compute import EC2, EC2ElasticIpAddress
+from diagrams.aws.network import (
+    VPC,
+    RouteTable,
+    TransitGateway,
+    VPCElasticNetworkInterface,
+    VPCPeering,
+    VPCRouter,
+)
+from discovery import discover_topologies, resolve_regions
+from export import EXPORT_FORMATS, serialize
+
+
+def route_table_label(rtb):  # "rtb-... (main)" or "rtb-... (N subnets)"
+    associations = rtb.get("Associations", [])
+    if any(a.get("Main") for a in associations):
+        return f"{rtb['RouteTableId']}\n(main)"
+    subnets = sum(1 for a in associations if a.get("SubnetId"))
+    return f"{rtb['RouteTableId']}\n({subnets} subnets)"
+
+
+def peering_label(pcx):  # "pcx-...\nvpc-a <-> vpc-b"
+    requester = pcx.get("RequesterVpcInfo", {}).get("VpcId")
+    accepter = pcx.get("AccepterVpcInfo", {}).get("VpcId")
+    return f"{pcx['VpcPeeringConnectionId']}\n{requester} <-> {accepter}"
+
 
+def draw_layer_nodes(topology, nodes):  # Region-level layer nodes
+    """Add transit gateway, peering, and Elastic IP nodes to nodes (id -> node)."""
+    for tgw_id in topology.transit_gateways:
+        nodes[tgw_id] = TransitGateway(tgw_id)
+    for pcx_id, pcx in topology.peerings.items():
+        nodes[pcx_id] = VPCPeering(peering_label(pcx))
+    for eip_id, eip in topology.eips.items():
+        nodes[eip_id] = EC2ElasticIpAddress(eip.get("PublicIp") or eip_id)
 
-def get_vpcs(ec2):  # ec2: boto3 EC2 client
-    """Return all VPCs for the client's region.
+
+def draw_edges(edges, nodes):  # Only edges whose endpoints were drawn
+    for source, target, label in edges:
+        if source in nodes and target in nodes:
+            nodes[source] >> Edge(label=label) >> nodes[target]
+
+
+def render_topology(topology):  # Must run inside an active Diagram context
+    """Draw a topology's VPC -> Subnet -> EC2 hierarchy into the current Diagram.
+
+    Each VPC, subnet, and instance is visited exactly once via the topology's
+    indexes. Instances without a (discovered) subnet are grouped separately.
+    Discovered layers add route tables (per VPC), ENIs (per subnet), and
+    transit gateways, peering connections, and Elastic IPs (per region),
+    connected by the topology's precomputed edges.
 
     Parameters:
-        ec2: boto3 EC2 client configured for the target region.
+        topology (Topology): Indexed graph to render.
+    """
+    edges = topology.edges()
+    # Clusters cannot be edge endpoints: VPCs on an edge get a router node
+    anchored = {end for edge in edges for end in edge[:2] if end in topology.vpcs}
+    nodes = {}  # Resource ID -> rendered node, for drawing edges
+    for vpc_id in topology.vpcs:  # Iterate discovered VPCs
+        with Cluster(f"VPC {vpc_id}"):  # Visual grouping for the VPC
+            if vpc_id in anchored:
+                nodes[vpc_id] = VPCRouter(vpc_id)
+            for rtb in topology.vpc_route_tables(vpc_id):
+                nodes[rtb["RouteTableId"]] = RouteTable(route_table_label(rtb))
+            for subnet in topology.vpc_subnets(vpc_id):  # Indexed lookup
+                subnet_id = subnet["SubnetId"]
+                with Cluster(f"Subnet {subnet_id}"):  # Visual grouping
+                    for inst in topology.subnet_instances(subnet_id):
+                        nodes[inst["InstanceId"]] = EC2(inst["InstanceId"])
+                    for eni in topology.subnet_enis(subnet_id):
+                        eni_id = eni["NetworkInterfaceId"]
+                        nodes[eni_id] = VPCElasticNetworkInterface(eni_id)
+    if topology.unplaced_instances:  # EC2-Classic / terminated / unknown subnet
+        with Cluster("Instances without subnet"):
+            for inst in topology.unplaced_instances:
+                nodes[inst["InstanceId"]] = EC2(inst["InstanceId"])
+    draw_layer_nodes(topology, nodes)
+    draw_edges(edges, nodes)
 
-    Returns:
-        list[dict]: Items from describe_vpcs()["Vpcs"].
+
+def draw_topologies(topologies):  # Must run inside an active Diagram context
+    """Draw topologies: a single one directly, several as one cluster per region."""
+    if len(topologies) == 1:
+        render_topology(topologies[0])
+    else:
+        for topology in topologies:  # One cluster per region
+            with Cluster(f"Region {topology.region}"):
+                render_topology(topology)
+
+
+def draw_overview(topologies):  # Must run inside an active Diagram context
+    """Draw one node per VPC, labelled with its subnet and instance counts.
+
+    Used as the sharded-mode overview: only VPC-level nodes (plus transit
+    gateways and peering connections, when discovered) are laid out, so its
+    cost does not grow with the size of each VPC.
     """
-    return ec2.describe_vpcs()["Vpcs"]
+    for topology in topologies:
+        with Cluster(f"Region {topology.region}"):
+            nodes = {}
+            for vpc_id in topology.vpcs:
+                subnets = topology.vpc_subnets(vpc_id)
+                instances = sum(
+                    len(topology.subnet_instances(s["SubnetId"])) for s in subnets
+                )
+                nodes[vpc_id] = VPC(
+                    f"{vpc_id}\n{len(subnets)} subnets, {instances} instances"
+                )
+            if topology.unplaced_instances:
+                EC2(f"{len(topology.unplaced_instances)} instances without subnet")
+            for tgw_id in topology.transit_gateways:
+                nodes[tgw_id] = TransitGateway(tgw_id)
+            for pcx_id, pcx in topology.peerings.items():
+                nodes[pcx_id] = VPCPeering(peering_label(pcx))
+            draw_edges(topology.edges(), nodes)
 
 
-def get_subnets(ec2):  # ec2: boto3 EC2 client
-    """Return all subnets for the client's region.
+# S3 user metadata key holding the digest of the rendered topology
+DIGEST_METADATA_KEY = "topology-sha256"
 
-    Parameters:
-        ec2: boto3 EC2 client configured for the target region.
+# "single" lays out each diagram as one graph; "sharded" renders each VPC (or
+# group of SHARD_SIZE VPCs) as its own graph plus an overview and index page.
+RENDER_MODE = os.environ.get("RENDER_MODE", "single").lower()
+SHARD_SIZE = max(1, int(os.environ.get("SHARD_SIZE", "1")))
+SHARD_MAX_WORKERS = max(1, int(os.environ.get("SHARD_MAX_WORKERS", "4")))
+SHARD_PREFIX = "network_diagram/"  # Key prefix for sharded output
+
+# Content-Type per output format; png/svg come from Graphviz, json/jsonl from
+# export.py
+DIAGRAM_FORMATS = ("png", "svg")
+CONTENT_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+    "json": "application/json",
+    "jsonl": "application/x-ndjson",
+}
+
+
+def parse_output_formats(setting):
+    """Parse OUTPUT_FORMATS ("png,svg,json,jsonl" in any combination).
+
+    Raises:
+        ValueError: On an unsupported format.
+    """
+    formats = [f.strip().lower() for f in (setting or "").split(",") if f.strip()]
+    unknown = sorted(set(formats) - set(CONTENT_TYPES))
+    if unknown:
+        raise ValueError(f"Unsupported OUTPUT_FORMATS: {', '.join(unknown)}")
+    return list(dict.fromkeys(formats)) or ["png"]
+
+
+OUTPUT_FORMATS = parse_output_formats(os.environ.get("OUTPUT_FORMATS", "png"))
+
+
+def render_diagram(
+    diagram_base, title, topologies, draw=draw_topologies, outformat="png"
+):
+    """Render topologies into "<diagram_base>.<format>" (Graphviz layout + render).
+
+    outformat may be a list (e.g. ["png", "svg"]): the graph is laid out
+    once per format from the same diagram. Each call drives its own Graphviz
+    `dot` subprocess, so calls made from different threads lay out in
+    parallel.
+    """
+    # Build the diagram; show=False avoids opening window in headless Lambda.
+    with Diagram(title, filename=diagram_base, show=False, outformat=outformat):
+        draw(topologies)
+
+
+def shard_jobs(topologies, shard_size=SHARD_SIZE):
+    """Split topologies into one diagram job per VPC (or group of VPCs).
+
+    VPCs are sorted by ID and chunked shard_size at a time; instances without
+    a subnet get their own shard per region. An overview job (VPC nodes only)
+    is appended last.
 
     Returns:
-        list[dict]: Items from describe_subnets()["Subnets"].
+        list[tuple]: (S3 key without extension, title, topologies, draw).
     """
-    return ec2.describe_subnets()["Subnets"]
+    jobs = []
+    for topology in topologies:
+        region = topology.region
+        vpc_ids = sorted(topology.vpcs)
+        for i in range(0, len(vpc_ids), shard_size):
+            group = vpc_ids[i : i + shard_size]
+            if len(group) == 1:
+                name, title = group[0], f"VPC {group[0]} ({region})"
+            else:
+                name = f"{group[0]}-{group[-1]}"
+                title = f"VPCs {group[0]} .. {group[-1]} ({region})"
+            jobs.append(
+                (
+                    f"{SHARD_PREFIX}{region}/{name}",
+                    title,
+                    [topology.subset(group)],
+                    draw_topologies,
+                )
+            )
+        if topology.unplaced_instances:
+            jobs.append(
+                (
+                    f"{SHARD_PREFIX}{region}/unplaced",
+                    f"Instances without subnet ({region})",
+                    [topology.subset([], include_unplaced=True)],
+                    draw_topologies,
+                )
+            )
+    jobs.append(
+        (
+            f"{SHARD_PREFIX}overview",
+            "AWS Network Overview",
+            topologies,
+            draw_overview,
+        )
+    )
+    return jobs
 
 
-def get_instances(ec2):  # ec2: boto3 EC2 client
-    """Return EC2 instance reservations for the client's region.
+def build_index(jobs, fmt="png"):  # Sharded-mode landing page
+    """Return an HTML page linking every shard's fmt output.
 
-    Note: EC2's DescribeInstances API returns a list of Reservations, each
-    containing an "Instances" list.
+    The overview is embedded when fmt is a diagram format.
+    """
+    links = "\n".join(
+        f'<li><a href="{html.escape(base[len(SHARD_PREFIX):])}.{fmt}">'
+        f"{html.escape(title)}</a></li>"
+        for base, title, _, _ in jobs
+    )
+    overview = (
+        f'<img src="overview.{fmt}" alt="Overview">\n' if fmt in DIAGRAM_FORMATS else ""
+    )
+    return (
+        '<!DOCTYPE html>\n<html><head><meta charset="utf-8">'
+        "<title>AWS Network Diagram</title></head><body>\n"
+        f"<h1>AWS Network Diagram</h1>\n{overview}"
+        f"<ul>\n{links}\n</ul>\n</body></html>\n"
+    )
 
-    Parameters:
-        ec2: boto3 EC2 client configured for the target region.
+
+def topology_digest(title, topologies):  # Hash of what the diagram would show
+    """Return the SHA-256 hex digest of the canonical diagram content."""
+    payload = {"title": title, "topologies": [t.canonical() for t in topologies]}
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def stored_digest(s3, bucket, key):  # Digest recorded on the existing object
+    """Return the topology digest stored on s3://bucket/key, or None."""
+    try:
+        head = s3.head_object(Bucket=bucket, Key=key)
+    except botocore.exceptions.ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return None  # First run: nothing uploaded yet
+        raise
+    return head.get("Metadata", {}).get(DIGEST_METADATA_KEY)
+
+
+def upload_file(s3, path, bucket, key, digest=None, content_type=None):
+    """Upload a local file to S3 (tagged with the topology digest), logging
+    and re-raising failures."""
+    extra_args = {}
+    if digest:
+        extra_args["Metadata"] = {DIGEST_METADATA_KEY: digest}
+    if content_type:
+        extra_args["ContentType"] = content_type
+    try:
+        s3.upload_file(path, bucket, key, ExtraArgs=extra_args or None)
+    except botocore.exceptions.ClientError as e:
+        logging.error(e)  # Log the error to CloudWatch Logs
+        raise e  # Re-raise to fail the invocation for visibility
+
+
+def put_if_changed(s3, bucket, key, body, content_type, force=False):
+    """Upload bytes unless the stored object carries the same SHA-256 digest.
+
+    Returns:
+        bool: True when the object was uploaded.
+    """
+    digest = hashlib.sha256(body).hexdigest()
+    if not force and stored_digest(s3, bucket, key) == digest:
+        return False
+    s3.put_object(
+        Bucket=bucket,
+        Key=key,
+        Body=body,
+        ContentType=content_type,
+        Metadata={DIGEST_METADATA_KEY: digest},
+    )
+    return True
+
+
+def process_job(s3, bucket, tmpdir, job, formats, force=False):  # Worker thread
+    """Write one job's requested outputs, skipping those that are unchanged.
+
+    Diagram formats are rendered together (one Graphviz pass per format from
+    a single diagram) only when some stored diagram lacks the current
+    topology digest. Export formats are serialized from the same topologies
+    and compared by content digest.
 
     Returns:
-        list[dict]: Items from describe_instances()["Reservations"].
+        tuple[list, list]: (uploaded keys, unchanged keys).
     """
-    return ec2.describe_instances()["Reservations"]
+    base, title, job_topologies, draw = job
+    uploaded, unchanged = [], []
+    diagram_formats = [f for f in formats if f in DIAGRAM_FORMATS]
+    if diagram_formats:
+        digest = topology_digest(title, job_topologies)
+        keys = [f"{base}.{fmt}" for fmt in diagram_formats]
+        if not force and all(stored_digest(s3, bucket, k) == digest for k in keys):
+            unchanged.extend(keys)  # Same topology: skip layout/render/upload
+        else:
+            # diagrams appends ".<format>" to the filename; keep /tmp flat
+            diagram_base = os.path.join(tmpdir, base.replace("/", "__"))
+            render_diagram(diagram_base, title, job_topologies, draw, diagram_formats)
+            for fmt, key in zip(diagram_formats, keys):
+                path = f"{diagram_base}.{fmt}"
+                upload_file(s3, path, bucket, key, digest, CONTENT_TYPES[fmt])
+            uploaded.extend(keys)
+    for fmt in formats:
+        if fmt not in EXPORT_FORMATS:
+            continue
+        key = f"{base}.{fmt}"
+        body = serialize(fmt, job_topologies)
+        if put_if_changed(s3, bucket, key, body, CONTENT_TYPES[fmt], force):
+            uploaded.append(key)
+        else:
+            unchanged.append(key)
+    return uploaded, unchanged
 
 
 def lambda_handler(event, context):  # AWS Lambda entry point
     """Render and upload an AWS network diagram.
 
     Steps:
-      1. Read region and S3 bucket from environment
-      2. Discover VPCs, Subnets, and EC2 Instances
-      3. Render a PNG diagram into the Lambda /tmp space using diagrams/Graphviz
-      4. Upload the PNG to S3 as "network_diagram.png"
+      1. Read regions, layout, and S3 bucket from environment
+      2. Discover VPCs, Subnets, and EC2 Instances (paginated, concurrent,
+         one region per worker)
+      3. Index each region into a Topology (vpc_id -> subnets,
+         subnet_id -> instances)
+      4. Hash each diagram's canonical topology and skip diagrams whose
+         S3 object already carries the same digest
+      5. Render changed PNG diagram(s) into the Lambda /tmp space using
+         diagrams/Graphviz, up to SHARD_MAX_WORKERS at a time
+      6. Upload "network_diagram.png" (combined),
+         "network_diagram-<region>.png" (per_region), or
+         "network_diagram/<region>/<vpc>.png" shards plus overview.png and
+         index.html (RENDER_MODE=sharded) to S3 with the digest, in each
+         OUTPUT_FORMATS format (png/svg diagrams, json/jsonl topology export)
 
     Environment:
       - S3_BUCKET: Destination S3 bucket (required)
-      - AWS_REGION: Region to scan (optional; default "us-east-1")
+      - AWS_REGION: Default region to scan (optional; default "us-east-1")
+      - REGIONS: Regions to scan, or "all" (optional; default AWS_REGION)
+      - REGION_LAYOUT: "combined" or "per_region" (optional; default "combined")
+      - RENDER_MODE: "single" or "sharded" (optional; default "single")
+      - SHARD_SIZE: VPCs per sharded diagram (optional; default 1)
+      - SHARD_MAX_WORKERS: Diagrams rendered concurrently (optional; default 4)
+      - OUTPUT_FORMATS: Any of "png,svg,json,jsonl" (optional; default "png")
+
+    Event:
+      - force (bool, optional): Re-render even if the topology is unchanged
 
     Returns:
-      dict: Status message indicating success.
+      dict: Status message plus uploaded and unchanged S3 keys.
     """
     region = os.environ.get("AWS_REGION", "us-east-1")  # Default to us-east-1
     s3_bucket = os.environ["S3_BUCKET"]  # Required: destination bucket
-    ec2 = boto3.client("ec2", region_name=region)  # EC2 client scoped to region
+    layout = os.environ.get("REGION_LAYOUT", "combined").lower()
+    regions = resolve_regions(os.environ.get("REGIONS", ""), region)
+    force = bool((event or {}).get("force"))
+
+    # Discover every region concurrently, then index each into a Topology
+    topologies = discover_topologies(regions)
 
-    vpcs = get_vpcs(ec2)  # Discover VPCs
-    subnets = get_subnets(ec2)  # Discover Subnets
-    instances = get_instances(ec2)  # Discover EC2 instances (via Reservations)
+    # Diagrams to produce as (S3 key without extension, title, topologies, draw)
+    if RENDER_MODE == "sharded":  # One graph per VPC (group) + overview
+        jobs = shard_jobs(topologies)
+    elif layout == "per_region":  # One diagram per region, in this invocation
+        jobs = [
+            (
+                f"network_diagram-{t.region}",
+                f"AWS Network Diagram ({t.region})",
+                [t],
+                draw_topologies,
+            )
+            for t in topologies
+        ]
+    else:
+        jobs = [("network_diagram", "AWS Network Diagram", topologies, draw_topologies)]
 
+    s3 = get_client("s3")  # Pooled S3 client for uploading the outputs
+    workers = max(1, min(SHARD_MAX_WORKERS, len(jobs)))
     with tempfile.TemporaryDirectory() as tmpdir:  # Ephemeral workspace (/tmp)
-        diagram_path = os.path.join(tmpdir, "network_diagram.png")  # Local path
-        # Build the diagram; show=False avoids opening window in headless Lambda.
-        with Diagram("AWS Network Diagram", filename=diagram_path, show=False):
-            # For each VPC, nest its subnets and then EC2 instances within those subnets
-            for vpc in vpcs:  # Iterate discovered VPCs
-                vpc_id = vpc["VpcId"]
-                with Cluster(f"VPC {vpc_id}"):  # Visual grouping for the VPC
-                    # Filter subnets that belong to the current VPC
-                    for subnet in [s for s in subnets if s["VpcId"] == vpc_id]:
-                        subnet_id = subnet["SubnetId"]
-                        with Cluster(f"Subnet {subnet_id}"):  # Visual grouping
-                            # Instances returned in Reservations; traverse to individual
-                            for r in instances:
-                                for inst in r["Instances"]:
-                                    if inst["SubnetId"] == subnet_id:  # Place in subnet
-                                        EC2(inst["InstanceId"])  # Render EC2 node
-        # Upload to S3
-        s3 = boto3.client("s3")  # S3 client for uploading the generated PNG
-        try:
-            s3.upload_file(diagram_path, s3_bucket, "network_diagram.png")  # key
-        except botocore.exceptions.ClientError as e:
-            logging.error(e)  # Log the error to CloudWatch Logs
-            raise e  # Re-raise to fail the invocation for visibility
-    return {"status": "diagram generated and uploaded"}  # Simple success message
+        # Each worker thread runs its own Graphviz subprocess, so layouts
+        # proceed in parallel and total time tracks the largest shard.
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(
+                pool.map(
+                    lambda job: process_job(
+                        s3, s3_bucket, tmpdir, job, OUTPUT_FORMATS, force
+                    ),
+                    jobs,
+                )
+            )
+    uploaded = [key for done, _ in results for key in done]
+    unchanged = [key for _, same in results for key in same]
+    if RENDER_MODE == "sharded":
+        index_key = f"{SHARD_PREFIX}index.html"
+        fmt = next((f for f in OUTPUT_FORMATS if f in DIAGRAM_FORMATS), None)
+        body = build_index(jobs, fmt or OUTPUT_FORMATS[0]).encode("utf-8")
+        if put_if_changed(s3, s3_bucket, index_key, body, "text/html", force):
+            uploaded.append(index_key)
+    status = "diagram generated and uploaded" if uploaded else "topology unchanged"
+    return {"status": status, "uploaded": uploaded, "unchanged": unchanged}
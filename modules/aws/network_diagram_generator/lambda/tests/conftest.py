@@ -0,0 +1,24 @@
+"""
+Offline test setup for the network diagram Lambda.
+
+Run from the repository root with:
+
+    python -m pytest modules/aws/network_diagram_generator/lambda/tests
+
+The handler modules are importable as they are at the root of the deployment
+package; tests of main.py need the diagrams library installed locally (no
+Graphviz binary is required, nothing is rendered). No test talks to AWS:
+clients are stubbed, but botocore still needs a region and credentials to
+build them.
+"""
+
+import os
+import sys
+
+LAMBDA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, LAMBDA_DIR)
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
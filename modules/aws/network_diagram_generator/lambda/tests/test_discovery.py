@@ -0,0 +1,166 @@
+import threading
+
+import boto3
+import discovery
+import pytest
+from botocore.stub import Stubber
+
+
+@pytest.fixture
+def ec2():
+    client = boto3.client("ec2", region_name="eu-west-1")
+    with Stubber(client) as stubber:
+        client.stubber = stubber
+        yield client
+        stubber.assert_no_pending_responses()
+
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch):
+    monkeypatch.setattr(discovery, "PAGE_SIZE", 1000)
+    monkeypatch.setattr(discovery, "VPC_IDS", [])
+    monkeypatch.setattr(discovery, "INSTANCE_STATES", ["running"])
+    monkeypatch.setattr(discovery, "INSTANCE_TAG_FILTERS", {})
+
+
+def test_every_page_is_collected(ec2):
+    ec2.stubber.add_response(
+        "describe_vpcs",
+        {"Vpcs": [{"VpcId": "vpc-1"}, {"VpcId": "vpc-2"}], "NextToken": "t2"},
+        {"MaxResults": 1000},
+    )
+    ec2.stubber.add_response(
+        "describe_vpcs",
+        {"Vpcs": [{"VpcId": "vpc-3"}]},
+        {"MaxResults": 1000, "NextToken": "t2"},
+    )
+
+    vpcs = discovery.get_vpcs(ec2)
+
+    assert [v["VpcId"] for v in vpcs] == ["vpc-1", "vpc-2", "vpc-3"]
+
+
+def test_vpc_ids_restrict_vpcs_and_subnets_server_side(ec2, monkeypatch):
+    monkeypatch.setattr(discovery, "VPC_IDS", ["vpc-1"])
+    expected = {
+        "Filters": [{"Name": "vpc-id", "Values": ["vpc-1"]}],
+        "MaxResults": 1000,
+    }
+    ec2.stubber.add_response("describe_vpcs", {"Vpcs": []}, expected)
+    ec2.stubber.add_response("describe_subnets", {"Subnets": []}, expected)
+
+    assert discovery.get_vpcs(ec2) == []
+    assert discovery.get_subnets(ec2) == []
+
+
+def test_instance_filters_combine_vpc_state_and_tags(ec2, monkeypatch):
+    monkeypatch.setattr(discovery, "VPC_IDS", ["vpc-1"])
+    monkeypatch.setattr(discovery, "INSTANCE_STATES", ["running", "stopped"])
+    monkeypatch.setattr(
+        discovery, "INSTANCE_TAG_FILTERS", {"Environment": ["prod"], "Team": "net"}
+    )
+    ec2.stubber.add_response(
+        "describe_instances",
+        {"Reservations": [{"Instances": [{"InstanceId": "i-1"}]}]},
+        {
+            "Filters": [
+                {"Name": "vpc-id", "Values": ["vpc-1"]},
+                {"Name": "instance-state-name", "Values": ["running", "stopped"]},
+                {"Name": "tag:Environment", "Values": ["prod"]},
+                {"Name": "tag:Team", "Values": ["net"]},
+            ],
+            "MaxResults": 1000,
+        },
+    )
+
+    reservations = discovery.get_instances(ec2)
+
+    assert reservations == [{"Instances": [{"InstanceId": "i-1"}]}]
+
+
+def test_page_size_is_capped_per_api(ec2):
+    ec2.stubber.add_response(
+        "describe_route_tables", {"RouteTables": []}, {"MaxResults": 100}
+    )
+
+    assert discovery.get_route_tables(ec2) == []
+
+
+def test_describe_streams_run_concurrently(monkeypatch):
+    barrier = threading.Barrier(3, timeout=5)
+
+    def stream(name):
+        def fetch(ec2):
+            barrier.wait()  # All three streams must be in flight at once
+            return [name]
+
+        return fetch
+
+    monkeypatch.setattr(
+        discovery,
+        "BASE_STREAMS",
+        {name: stream(name) for name in ("vpcs", "subnets", "reservations")},
+    )
+
+    assert discovery.discover(object(), layers=[]) == {
+        "vpcs": ["vpcs"],
+        "subnets": ["subnets"],
+        "reservations": ["reservations"],
+    }
+
+
+def test_regions_default_to_the_lambda_region_or_follow_the_setting():
+    assert discovery.resolve_regions("", "eu-west-1") == ["eu-west-1"]
+    assert discovery.resolve_regions(" us-east-1, eu-west-2 ,", "eu-west-1") == [
+        "us-east-1",
+        "eu-west-2",
+    ]
+
+
+def test_all_regions_are_the_enabled_ones_sorted(ec2, monkeypatch):
+    monkeypatch.setattr(discovery, "get_client", lambda service, region_name: ec2)
+    ec2.stubber.add_response(
+        "describe_regions",
+        {"Regions": [{"RegionName": "us-east-1"}, {"RegionName": "eu-west-1"}]},
+        {"AllRegions": False},
+    )
+
+    assert discovery.resolve_regions("ALL", "eu-west-1") == ["eu-west-1", "us-east-1"]
+
+
+def test_regions_are_discovered_concurrently_in_order(monkeypatch):
+    regions = ["us-east-1", "eu-west-1", "ap-southeast-2"]
+    barrier = threading.Barrier(len(regions), timeout=5)
+
+    def discover_topology(region):
+        barrier.wait()  # Every region must be in flight at once
+        return region
+
+    monkeypatch.setattr(discovery, "REGION_MAX_WORKERS", len(regions))
+    monkeypatch.setattr(discovery, "discover_topology", discover_topology)
+
+    assert discovery.discover_topologies(regions) == regions
+
+
+def test_layers_add_their_streams(monkeypatch):
+    called = []
+    monkeypatch.setattr(
+        discovery,
+        "BASE_STREAMS",
+        {"vpcs": lambda ec2: called.append("vpcs") or []},
+    )
+    monkeypatch.setattr(
+        discovery,
+        "LAYER_STREAMS",
+        {"eni": {"enis": lambda ec2: called.append("enis") or []}},
+    )
+
+    assert discovery.discover(object(), layers=["eni"]) == {"vpcs": [], "enis": []}
+    assert sorted(called) == ["enis", "vpcs"]
+
+
+def test_unknown_layers_are_rejected():
+    assert discovery.parse_layers(["all"]) == list(discovery.LAYERS)
+    assert discovery.parse_layers(["eip", "eni", "eip"]) == ["eip", "eni"]
+    with pytest.raises(ValueError):
+        discovery.parse_layers(["eni", "nat_gateway"])
@@ -0,0 +1,269 @@
+import hashlib
+
+import main
+import pytest
+from botocore.exceptions import ClientError
+from topology import Topology
+
+
+def region_topology(region, *vpc_ids):
+    return Topology.build(
+        vpcs=[{"VpcId": vpc_id} for vpc_id in vpc_ids],
+        subnets=[],
+        reservations=[],
+        region=region,
+    )
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    """Run lambda_handler on the given topologies, recording each job."""
+
+    def run(topologies, event=None, changed=True, **env):
+        jobs = []
+
+        def process_job(s3, bucket, tmpdir, job, formats, force=False):
+            jobs.append(job)
+            keys = [f"{job[0]}.png"]
+            return (keys, []) if changed or force else ([], keys)
+
+        monkeypatch.setenv("S3_BUCKET", "diagrams")
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        monkeypatch.setattr(main, "discover_topologies", lambda regions: topologies)
+        monkeypatch.setattr(main, "get_client", lambda service: object())
+        monkeypatch.setattr(main, "process_job", process_job)
+        return main.lambda_handler(event or {}, None), jobs
+
+    return run
+
+
+def test_regions_are_combined_into_one_diagram_by_default(handler):
+    topologies = [region_topology("us-east-1"), region_topology("eu-west-1")]
+
+    result, jobs = handler(topologies, REGIONS="us-east-1,eu-west-1")
+
+    assert [(base, topos) for base, _, topos, _ in jobs] == [
+        ("network_diagram", topologies)
+    ]
+    assert result["uploaded"] == ["network_diagram.png"]
+
+
+def test_per_region_layout_renders_one_diagram_per_region(handler):
+    topologies = [region_topology("us-east-1"), region_topology("eu-west-1")]
+
+    result, jobs = handler(
+        topologies, REGIONS="us-east-1,eu-west-1", REGION_LAYOUT="per_region"
+    )
+
+    assert [(base, title, topos) for base, title, topos, _ in jobs] == [
+        (
+            "network_diagram-us-east-1",
+            "AWS Network Diagram (us-east-1)",
+            topologies[:1],
+        ),
+        (
+            "network_diagram-eu-west-1",
+            "AWS Network Diagram (eu-west-1)",
+            topologies[1:],
+        ),
+    ]
+    assert result["status"] == "diagram generated and uploaded"
+
+
+class FakeS3:
+    """S3 client stand-in keeping object metadata and recording uploads."""
+
+    def __init__(self):
+        self.metadata = {}
+        self.bodies = {}
+        self.uploads = []
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.metadata:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return {"Metadata": self.metadata[Key]}
+
+    def put_object(self, Bucket, Key, Body, ContentType, Metadata):
+        self.uploads.append(Key)
+        self.bodies[Key] = Body
+        self.metadata[Key] = Metadata
+
+    def upload_file(self, path, bucket, key, ExtraArgs=None):
+        with open(path, "rb") as f:
+            self.bodies[key] = f.read()
+        self.uploads.append(key)
+        self.metadata[key] = (ExtraArgs or {}).get("Metadata", {})
+
+
+def network(instances, vpc_state="available"):
+    return Topology.build(
+        vpcs=[{"VpcId": "vpc-1", "State": vpc_state}],
+        subnets=[{"SubnetId": "subnet-1", "VpcId": "vpc-1"}],
+        reservations=[
+            {"Instances": [{"InstanceId": i, "SubnetId": "subnet-1"}]}
+            for i in instances
+        ],
+        region="us-east-1",
+    )
+
+
+def test_digest_ignores_discovery_order_and_unrendered_attributes():
+    digest = main.topology_digest("Diagram", [network(["i-1", "i-2"])])
+
+    assert digest == main.topology_digest("Diagram", [network(["i-2", "i-1"])])
+    assert digest == main.topology_digest(
+        "Diagram", [network(["i-1", "i-2"], vpc_state="pending")]
+    )
+    assert digest != main.topology_digest("Diagram", [network(["i-1"])])
+    assert digest != main.topology_digest("Other", [network(["i-1", "i-2"])])
+
+
+def test_missing_object_has_no_digest_and_other_errors_raise():
+    s3 = FakeS3()
+
+    assert main.stored_digest(s3, "diagrams", "network_diagram.png") is None
+
+    def head_object(Bucket, Key):
+        raise ClientError({"Error": {"Code": "403"}}, "HeadObject")
+
+    s3.head_object = head_object
+    with pytest.raises(ClientError):
+        main.stored_digest(s3, "diagrams", "network_diagram.png")
+
+
+def test_put_if_changed_skips_identical_bodies():
+    s3 = FakeS3()
+
+    assert main.put_if_changed(s3, "diagrams", "index.html", b"v1", "text/html")
+    assert not main.put_if_changed(s3, "diagrams", "index.html", b"v1", "text/html")
+    assert main.put_if_changed(
+        s3, "diagrams", "index.html", b"v1", "text/html", force=True
+    )
+    assert main.put_if_changed(s3, "diagrams", "index.html", b"v2", "text/html")
+    assert s3.uploads == ["index.html"] * 3
+    assert s3.metadata["index.html"] == {
+        main.DIGEST_METADATA_KEY: hashlib.sha256(b"v2").hexdigest()
+    }
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    """Record render_diagram calls, writing a placeholder file per format."""
+    calls = []
+
+    def render_diagram(diagram_base, title, topologies, draw, outformat):
+        calls.append((title, list(outformat)))
+        for fmt in outformat:
+            with open(f"{diagram_base}.{fmt}", "wb") as f:
+                f.write(fmt.encode())
+
+    monkeypatch.setattr(main, "render_diagram", render_diagram)
+    return calls
+
+
+def test_unchanged_topology_skips_layout_render_and_upload(renders, tmp_path):
+    s3 = FakeS3()
+    job = ("network_diagram", "Diagram", [network(["i-1"])], main.draw_topologies)
+    formats = ["png", "svg"]
+
+    first = main.process_job(s3, "diagrams", str(tmp_path), job, formats)
+    second = main.process_job(s3, "diagrams", str(tmp_path), job, formats)
+
+    assert first == (["network_diagram.png", "network_diagram.svg"], [])
+    assert second == ([], ["network_diagram.png", "network_diagram.svg"])
+    assert renders == [("Diagram", formats)]  # Laid out once, for both formats
+    assert s3.uploads == ["network_diagram.png", "network_diagram.svg"]
+
+
+def test_changed_or_forced_topology_is_rendered_again(renders, tmp_path):
+    s3 = FakeS3()
+    job = ("network_diagram", "Diagram", [network(["i-1"])], main.draw_topologies)
+    changed = ("network_diagram", "Diagram", [network(["i-1", "i-2"])], job[3])
+
+    main.process_job(s3, "diagrams", str(tmp_path), job, ["png"])
+    main.process_job(s3, "diagrams", str(tmp_path), job, ["png"], force=True)
+    main.process_job(s3, "diagrams", str(tmp_path), changed, ["png"])
+
+    assert len(renders) == 3
+    assert s3.metadata["network_diagram.png"] == {
+        main.DIGEST_METADATA_KEY: main.topology_digest("Diagram", changed[2])
+    }
+
+
+def test_a_missing_format_re_renders_the_diagram(renders, tmp_path):
+    s3 = FakeS3()
+    job = ("network_diagram", "Diagram", [network(["i-1"])], main.draw_topologies)
+
+    main.process_job(s3, "diagrams", str(tmp_path), job, ["png"])
+    uploaded, unchanged = main.process_job(
+        s3, "diagrams", str(tmp_path), job, ["png", "svg"]
+    )
+
+    assert uploaded == ["network_diagram.png", "network_diagram.svg"]
+    assert unchanged == []
+
+
+def test_handler_reports_an_unchanged_topology_unless_forced(handler):
+    result, _ = handler([network(["i-1"])], changed=False)
+
+    assert result == {
+        "status": "topology unchanged",
+        "uploaded": [],
+        "unchanged": ["network_diagram.png"],
+    }
+    result, _ = handler([network(["i-1"])], event={"force": True}, changed=False)
+    assert result["uploaded"] == ["network_diagram.png"]
+
+
+def test_shards_group_sorted_vpcs_and_end_with_the_overview():
+    east = region_topology("us-east-1", "vpc-c", "vpc-a", "vpc-b")
+    west = Topology.build(
+        vpcs=[{"VpcId": "vpc-w"}],
+        subnets=[],
+        reservations=[{"Instances": [{"InstanceId": "i-classic"}]}],
+        region="eu-west-1",
+    )
+
+    jobs = main.shard_jobs([east, west], shard_size=2)
+
+    assert [(base, title) for base, title, _, _ in jobs] == [
+        ("network_diagram/us-east-1/vpc-a-vpc-b", "VPCs vpc-a .. vpc-b (us-east-1)"),
+        ("network_diagram/us-east-1/vpc-c", "VPC vpc-c (us-east-1)"),
+        ("network_diagram/eu-west-1/vpc-w", "VPC vpc-w (eu-west-1)"),
+        ("network_diagram/eu-west-1/unplaced", "Instances without subnet (eu-west-1)"),
+        ("network_diagram/overview", "AWS Network Overview"),
+    ]
+    assert [list(t.vpcs) for _, _, (t,), _ in jobs[:4]] == [
+        ["vpc-a", "vpc-b"],
+        ["vpc-c"],
+        ["vpc-w"],
+        [],
+    ]
+    assert list(jobs[3][2][0].instances) == ["i-classic"]
+    assert jobs[-1][2:] == ([east, west], main.draw_overview)
+
+
+def test_index_links_every_shard_and_embeds_the_overview():
+    jobs = main.shard_jobs([region_topology("us-east-1", "vpc-<a>")])
+
+    page = main.build_index(jobs, "svg")
+
+    assert '<a href="us-east-1/vpc-&lt;a&gt;.svg">' in page
+    assert '<a href="overview.svg">AWS Network Overview</a>' in page
+    assert '<img src="overview.svg" alt="Overview">' in page
+    assert "<img" not in main.build_index(jobs, "json")
+
+
+def test_sharded_mode_renders_every_shard_and_writes_the_index(handler, monkeypatch):
+    monkeypatch.setattr(main, "RENDER_MODE", "sharded")
+    monkeypatch.setattr(main, "put_if_changed", lambda *args: True)
+
+    result, jobs = handler([region_topology("us-east-1", "vpc-1", "vpc-2")])
+
+    assert [job[0] for job in jobs] == [
+        "network_diagram/us-east-1/vpc-1",
+        "network_diagram/us-east-1/vpc-2",
+        "network_diagram/overview",
+    ]
+    assert result["uploaded"][-1] == "network_diagram/index.html"
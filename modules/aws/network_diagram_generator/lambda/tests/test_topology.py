@@ -0,0 +1,197 @@
+from topology import Topology
+
+
+def vpc(vpc_id):
+    return {"VpcId": vpc_id}
+
+
+def subnet(subnet_id, vpc_id):
+    return {"SubnetId": subnet_id, "VpcId": vpc_id}
+
+
+def instance(instance_id, subnet_id=None):
+    inst = {"InstanceId": instance_id}
+    if subnet_id:
+        inst["SubnetId"] = subnet_id
+    return inst
+
+
+def build(**layers):
+    return Topology.build(
+        vpcs=[vpc("vpc-a"), vpc("vpc-b")],
+        subnets=[
+            subnet("subnet-a1", "vpc-a"),
+            subnet("subnet-b1", "vpc-b"),
+            subnet("subnet-a2", "vpc-a"),
+        ],
+        reservations=[
+            {"Instances": [instance("i-1", "subnet-a1"), instance("i-2", "subnet-a1")]},
+            {"Instances": [instance("i-3", "subnet-b1"), instance("i-classic")]},
+            {"Instances": [instance("i-lost", "subnet-undiscovered")]},
+        ],
+        region="eu-west-1",
+        **layers,
+    )
+
+
+def ids(items, key):
+    return [item[key] for item in items]
+
+
+def test_build_indexes_the_vpc_subnet_instance_hierarchy():
+    topology = build()
+
+    assert topology.region == "eu-west-1"
+    assert list(topology.vpcs) == ["vpc-a", "vpc-b"]
+    assert ids(topology.vpc_subnets("vpc-a"), "SubnetId") == ["subnet-a1", "subnet-a2"]
+    assert ids(topology.vpc_subnets("vpc-b"), "SubnetId") == ["subnet-b1"]
+    assert ids(topology.subnet_instances("subnet-a1"), "InstanceId") == ["i-1", "i-2"]
+    assert ids(topology.subnet_instances("subnet-b1"), "InstanceId") == ["i-3"]
+    assert list(topology.instances) == ["i-1", "i-2", "i-3", "i-classic", "i-lost"]
+
+
+def test_instances_without_a_discovered_subnet_are_unplaced():
+    topology = build()
+
+    assert ids(topology.unplaced_instances, "InstanceId") == ["i-classic", "i-lost"]
+    assert topology.subnet_instances("subnet-undiscovered") == []
+
+
+def test_lookups_for_empty_or_unknown_ids_do_not_grow_the_indexes():
+    topology = build()
+
+    assert topology.vpc_subnets("vpc-unknown") == []
+    assert topology.subnet_instances("subnet-a2") == []
+    assert "vpc-unknown" not in topology.subnets_by_vpc
+    assert "subnet-a2" not in topology.instances_by_subnet
+
+
+def test_reservations_without_instances_are_ignored():
+    topology = Topology.build(vpcs=[], subnets=[], reservations=[{}])
+
+    assert topology.instances == {}
+    assert topology.unplaced_instances == []
+
+
+def test_subset_keeps_only_the_given_vpcs_and_their_contents():
+    shard = build().subset(["vpc-a"])
+
+    assert shard.region == "eu-west-1"
+    assert list(shard.vpcs) == ["vpc-a"]
+    assert list(shard.subnets) == ["subnet-a1", "subnet-a2"]
+    assert list(shard.instances) == ["i-1", "i-2"]
+    assert shard.unplaced_instances == []
+
+
+def test_unplaced_instances_can_form_their_own_subset():
+    shard = build().subset([], include_unplaced=True)
+
+    assert shard.vpcs == {}
+    assert ids(shard.unplaced_instances, "InstanceId") == ["i-classic", "i-lost"]
+
+
+def layered():
+    return build(
+        enis=[
+            {
+                "NetworkInterfaceId": "eni-1",
+                "SubnetId": "subnet-a1",
+                "Attachment": {"InstanceId": "i-1"},
+            },
+            {"NetworkInterfaceId": "eni-free", "SubnetId": "subnet-b1"},
+            {"NetworkInterfaceId": "eni-gone", "SubnetId": "subnet-undiscovered"},
+        ],
+        route_tables=[
+            {
+                "RouteTableId": "rtb-a",
+                "VpcId": "vpc-a",
+                "Routes": [
+                    {"DestinationCidrBlock": "10.0.0.0/16", "GatewayId": "local"},
+                    {
+                        "DestinationCidrBlock": "0.0.0.0/0",
+                        "TransitGatewayId": "tgw-1",
+                    },
+                    {
+                        "DestinationIpv6CidrBlock": "::/0",
+                        "NetworkInterfaceId": "eni-free",
+                    },
+                    {
+                        "DestinationPrefixListId": "pl-1",
+                        "VpcPeeringConnectionId": "pcx-ab",
+                    },
+                    {"InstanceId": "i-3"},
+                    {"DestinationCidrBlock": "10.9.0.0/16", "InstanceId": "i-other"},
+                ],
+            },
+            {"RouteTableId": "rtb-x", "VpcId": "vpc-undiscovered"},
+        ],
+        transit_gateways=[{"TransitGatewayId": "tgw-1"}],
+        tgw_attachments=[
+            {
+                "TransitGatewayAttachmentId": "tgw-attach-b",
+                "TransitGatewayId": "tgw-shared",
+                "ResourceType": "vpc",
+                "ResourceId": "vpc-b",
+            },
+            {
+                "TransitGatewayAttachmentId": "tgw-attach-vpn",
+                "TransitGatewayId": "tgw-1",
+                "ResourceType": "vpn",
+                "ResourceId": "vpn-1",
+            },
+        ],
+        peerings=[
+            {
+                "VpcPeeringConnectionId": "pcx-ab",
+                "RequesterVpcInfo": {"VpcId": "vpc-a"},
+                "AccepterVpcInfo": {"VpcId": "vpc-b"},
+            },
+            {
+                "VpcPeeringConnectionId": "pcx-out",
+                "RequesterVpcInfo": {"VpcId": "vpc-b"},
+                "AccepterVpcInfo": {"VpcId": "vpc-other-account"},
+            },
+        ],
+        eips=[
+            {
+                "AllocationId": "eipalloc-1",
+                "PublicIp": "203.0.113.1",
+                "NetworkInterfaceId": "eni-1",
+                "InstanceId": "i-1",
+            },
+            {"PublicIp": "203.0.113.2", "InstanceId": "i-3"},
+            {"AllocationId": "eipalloc-idle", "PublicIp": "203.0.113.3"},
+        ],
+    )
+
+
+def test_layers_keep_only_items_attached_to_discovered_resources():
+    topology = layered()
+
+    assert list(topology.enis) == ["eni-1", "eni-free"]
+    assert ids(topology.subnet_enis("subnet-a1"), "NetworkInterfaceId") == ["eni-1"]
+    assert list(topology.route_tables) == ["rtb-a"]
+    assert list(topology.tgw_attachments) == ["tgw-attach-b"]
+    assert topology.transit_gateways["tgw-shared"] == {"TransitGatewayId": "tgw-shared"}
+    assert list(topology.peerings) == ["pcx-ab", "pcx-out"]
+    assert list(topology.eips) == ["eipalloc-1", "203.0.113.2"]
+
+
+def test_edges_resolve_every_discovered_endpoint():
+    assert layered().edges() == [
+        ("203.0.113.2", "i-3", "203.0.113.2"),
+        ("eipalloc-1", "eni-1", "203.0.113.1"),
+        ("i-1", "eni-1", "eni"),
+        ("pcx-ab", "vpc-b", "accepter"),
+        ("rtb-a", "eni-free", "::/0"),
+        ("rtb-a", "i-3", "route"),
+        ("rtb-a", "pcx-ab", "pl-1"),
+        ("rtb-a", "tgw-1", "0.0.0.0/0"),
+        ("vpc-a", "pcx-ab", "requester"),
+        ("vpc-b", "pcx-out", "requester"),
+        ("vpc-b", "tgw-shared", "tgw"),
+    ]
+
+
+def test_base_topology_has_no_edges():
+    assert build().edges() == []
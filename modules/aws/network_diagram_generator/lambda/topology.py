@@ -0,0 +1,310 @@
+"""
+Indexed network topology for the diagram generator.
+
+Discovery results are joined once into dict indexes (vpc_id -> subnets,
+subnet_id -> instances) so the renderer walks the VPC -> Subnet -> EC2
+hierarchy in time linear in the number of resources, instead of filtering
+every subnet per VPC and scanning every reservation per subnet.
+
+Optional layers (see LAYERS) add ENIs, route tables, transit gateway
+attachments, VPC peering connections, and Elastic IPs. Their relationships
+are resolved by hash joins against the same id -> item dicts, so enabling
+every layer keeps building and edge computation linear.
+"""
+
+from collections import defaultdict
+
+# Optional discovery layers, named after the modules that provision them
+LAYERS = ("eni", "route", "transit_gateway", "vpc_peering_connection", "eip")
+
+# Route target attribute -> Topology attribute holding the target nodes
+ROUTE_TARGETS = (
+    ("TransitGatewayId", "transit_gateways"),
+    ("VpcPeeringConnectionId", "peerings"),
+    ("NetworkInterfaceId", "enis"),
+    ("InstanceId", "instances"),
+)
+
+
+class Topology:
+    """VPC -> Subnet -> EC2 graph for one region.
+
+    Attributes:
+        region (str | None): Region the resources were discovered in.
+        vpcs (dict): vpc_id -> VPC item, in discovery order.
+        subnets (dict): subnet_id -> Subnet item, in discovery order.
+        instances (dict): instance_id -> Instance item, in discovery order.
+        subnets_by_vpc (dict): vpc_id -> [Subnet item, ...].
+        instances_by_subnet (dict): subnet_id -> [Instance item, ...].
+        unplaced_instances (list): Instances with no SubnetId (EC2-Classic,
+            terminated) or whose subnet was not discovered.
+
+    Optional layers (empty unless discovered):
+        enis (dict): eni_id -> NetworkInterface item in a discovered subnet.
+        enis_by_subnet (dict): subnet_id -> [NetworkInterface item, ...].
+        route_tables (dict): rtb_id -> RouteTable item in a discovered VPC.
+        route_tables_by_vpc (dict): vpc_id -> [RouteTable item, ...].
+        transit_gateways (dict): tgw_id -> TransitGateway item.
+        tgw_attachments (dict): attachment_id -> VPC attachment item.
+        peerings (dict): pcx_id -> VpcPeeringConnection item touching a
+            discovered VPC.
+        eips (dict): allocation_id (or public IP) -> Address item.
+    """
+
+    def __init__(self, region=None):
+        self.region = region
+        self.vpcs = {}
+        self.subnets = {}
+        self.instances = {}
+        self.subnets_by_vpc = defaultdict(list)
+        self.instances_by_subnet = defaultdict(list)
+        self.unplaced_instances = []
+        self.enis = {}
+        self.enis_by_subnet = defaultdict(list)
+        self.route_tables = {}
+        self.route_tables_by_vpc = defaultdict(list)
+        self.transit_gateways = {}
+        self.tgw_attachments = {}
+        self.peerings = {}
+        self.eips = {}
+
+    @classmethod
+    def build(
+        cls,
+        vpcs,
+        subnets,
+        reservations,
+        region=None,
+        enis=(),
+        route_tables=(),
+        transit_gateways=(),
+        tgw_attachments=(),
+        peerings=(),
+        eips=(),
+    ):
+        """Index raw describe_* results into a Topology.
+
+        Parameters:
+            vpcs (list[dict]): Items from describe_vpcs()["Vpcs"].
+            subnets (list[dict]): Items from describe_subnets()["Subnets"].
+            reservations (list[dict]): Items from
+                describe_instances()["Reservations"].
+            region (str | None): Region label for the graph.
+            enis, route_tables, transit_gateways, tgw_attachments, peerings,
+            eips (list[dict]): Optional layer items from
+                describe_network_interfaces, describe_route_tables,
+                describe_transit_gateways,
+                describe_transit_gateway_attachments,
+                describe_vpc_peering_connections, and describe_addresses.
+
+        Returns:
+            Topology: The indexed graph.
+        """
+        topology = cls(region)
+        for vpc in vpcs:
+            topology.vpcs[vpc["VpcId"]] = vpc
+        for subnet in subnets:
+            topology.subnets[subnet["SubnetId"]] = subnet
+            topology.subnets_by_vpc[subnet["VpcId"]].append(subnet)
+        for reservation in reservations:
+            for inst in reservation.get("Instances", []):
+                topology.instances[inst["InstanceId"]] = inst
+                subnet_id = inst.get("SubnetId")
+                if subnet_id and subnet_id in topology.subnets:
+                    topology.instances_by_subnet[subnet_id].append(inst)
+                else:
+                    topology.unplaced_instances.append(inst)
+        for eni in enis:
+            if eni.get("SubnetId") in topology.subnets:
+                topology._add_eni(eni)
+        for rtb in route_tables:
+            if rtb.get("VpcId") in topology.vpcs:
+                topology._add_route_table(rtb)
+        for tgw in transit_gateways:
+            topology.transit_gateways[tgw["TransitGatewayId"]] = tgw
+        for attachment in tgw_attachments:
+            if (
+                attachment.get("ResourceType") == "vpc"
+                and attachment.get("ResourceId") in topology.vpcs
+            ):
+                topology._add_tgw_attachment(attachment)
+        for pcx in peerings:
+            if any(vpc_id in topology.vpcs for vpc_id in _peering_vpcs(pcx)):
+                topology.peerings[pcx["VpcPeeringConnectionId"]] = pcx
+        for eip in eips:
+            if eip.get("InstanceId") in topology.instances or (
+                eip.get("NetworkInterfaceId") in topology.enis
+            ):
+                topology.eips[_eip_id(eip)] = eip
+        return topology
+
+    def _add_eni(self, eni):
+        self.enis[eni["NetworkInterfaceId"]] = eni
+        self.enis_by_subnet[eni["SubnetId"]].append(eni)
+
+    def _add_route_table(self, rtb):
+        self.route_tables[rtb["RouteTableId"]] = rtb
+        self.route_tables_by_vpc[rtb["VpcId"]].append(rtb)
+
+    def _add_tgw_attachment(self, attachment):
+        self.tgw_attachments[attachment["TransitGatewayAttachmentId"]] = attachment
+        tgw_id = attachment["TransitGatewayId"]
+        if tgw_id not in self.transit_gateways:  # TGW shared from another account
+            self.transit_gateways[tgw_id] = {"TransitGatewayId": tgw_id}
+
+    def vpc_subnets(self, vpc_id):
+        """Return the subnets of a VPC (empty list when it has none)."""
+        return self.subnets_by_vpc.get(vpc_id, [])
+
+    def subnet_instances(self, subnet_id):
+        """Return the instances in a subnet (empty list when it has none)."""
+        return self.instances_by_subnet.get(subnet_id, [])
+
+    def subnet_enis(self, subnet_id):
+        """Return the ENIs in a subnet (empty list when it has none)."""
+        return self.enis_by_subnet.get(subnet_id, [])
+
+    def vpc_route_tables(self, vpc_id):
+        """Return the route tables of a VPC (empty list when it has none)."""
+        return self.route_tables_by_vpc.get(vpc_id, [])
+
+    def edges(self):
+        """Return the relationships between rendered resources.
+
+        Every endpoint is resolved by a dict lookup on the id -> item indexes,
+        so the cost is linear in the number of layer items and routes.
+        Endpoints that were not discovered (filtered out, other account or
+        region) are dropped. A VPC endpoint is referenced by its VPC ID.
+
+        Returns:
+            list[tuple[str, str, str]]: (source id, target id, label), sorted.
+        """
+        edges = set()
+        for eni_id, eni in self.enis.items():
+            instance_id = eni.get("Attachment", {}).get("InstanceId")
+            if instance_id in self.instances:
+                edges.add((instance_id, eni_id, "eni"))
+        for rtb_id, rtb in self.route_tables.items():
+            for route in rtb.get("Routes", []):
+                for attribute, index in ROUTE_TARGETS:
+                    target = route.get(attribute)
+                    if target in getattr(self, index):
+                        edges.add((rtb_id, target, route_destination(route)))
+        for attachment in self.tgw_attachments.values():
+            edges.add((attachment["ResourceId"], attachment["TransitGatewayId"], "tgw"))
+        for pcx_id, pcx in self.peerings.items():
+            requester, accepter = _peering_vpcs(pcx)
+            if requester in self.vpcs:
+                edges.add((requester, pcx_id, "requester"))
+            if accepter in self.vpcs:
+                edges.add((pcx_id, accepter, "accepter"))
+        for eip_id, eip in self.eips.items():
+            target = eip.get("NetworkInterfaceId")
+            if target not in self.enis:
+                target = eip.get("InstanceId")
+            if target in self.instances or target in self.enis:
+                edges.add((eip_id, target, eip.get("PublicIp") or "eip"))
+        return sorted(edges)
+
+    def subset(self, vpc_ids, include_unplaced=False):
+        """Return a new Topology holding only the given VPCs and their contents.
+
+        Used to shard rendering: each subset is laid out as its own graph.
+
+        Parameters:
+            vpc_ids (list[str]): VPCs to keep, in the order given.
+            include_unplaced (bool): Also carry over unplaced instances.
+        """
+        shard = Topology(self.region)
+        for vpc_id in vpc_ids:
+            shard.vpcs[vpc_id] = self.vpcs[vpc_id]
+            for subnet in self.vpc_subnets(vpc_id):
+                subnet_id = subnet["SubnetId"]
+                shard.subnets[subnet_id] = subnet
+                shard.subnets_by_vpc[vpc_id].append(subnet)
+                for inst in self.subnet_instances(subnet_id):
+                    shard.instances[inst["InstanceId"]] = inst
+                    shard.instances_by_subnet[subnet_id].append(inst)
+        if include_unplaced:
+            for inst in self.unplaced_instances:
+                shard.instances[inst["InstanceId"]] = inst
+                shard.unplaced_instances.append(inst)
+        for subnet_id in shard.subnets:
+            for eni in self.subnet_enis(subnet_id):
+                shard._add_eni(eni)
+        for vpc_id in vpc_ids:
+            for rtb in self.vpc_route_tables(vpc_id):
+                shard._add_route_table(rtb)
+                for route in rtb.get("Routes", []):  # Keep routed-to TGWs
+                    tgw_id = route.get("TransitGatewayId")
+                    if tgw_id in self.transit_gateways:
+                        shard.transit_gateways[tgw_id] = self.transit_gateways[tgw_id]
+        for attachment in self.tgw_attachments.values():
+            if attachment["ResourceId"] in shard.vpcs:
+                tgw_id = attachment["TransitGatewayId"]
+                shard.transit_gateways[tgw_id] = self.transit_gateways[tgw_id]
+                shard._add_tgw_attachment(attachment)
+        for pcx_id, pcx in self.peerings.items():
+            if any(vpc_id in shard.vpcs for vpc_id in _peering_vpcs(pcx)):
+                shard.peerings[pcx_id] = pcx
+        for eip_id, eip in self.eips.items():
+            if eip.get("InstanceId") in shard.instances or (
+                eip.get("NetworkInterfaceId") in shard.enis
+            ):
+                shard.eips[eip_id] = eip
+        return shard
+
+    def canonical(self):
+        """Return a canonical, JSON-serializable form of what the diagram shows.
+
+        Only rendered identifiers and relationships are included, sorted so
+        that discovery order and unrelated attribute changes (state, launch
+        time, tags) do not alter the result.
+        """
+        vpcs = []
+        for vpc_id in sorted(self.vpcs):
+            subnets = []
+            for subnet_id in sorted(s["SubnetId"] for s in self.vpc_subnets(vpc_id)):
+                instances = sorted(
+                    i["InstanceId"] for i in self.subnet_instances(subnet_id)
+                )
+                subnets.append({"id": subnet_id, "instances": instances})
+            vpcs.append({"id": vpc_id, "subnets": subnets})
+        unplaced = sorted(i["InstanceId"] for i in self.unplaced_instances)
+        canonical = {
+            "region": self.region,
+            "vpcs": vpcs,
+            "unplaced_instances": unplaced,
+        }
+        layers = {
+            "enis": sorted(self.enis),
+            "route_tables": sorted(self.route_tables),
+            "transit_gateways": sorted(self.transit_gateways),
+            "peerings": sorted(self.peerings),
+            "eips": sorted(self.eips),
+        }
+        if any(layers.values()):  # Keep layer-less digests unchanged
+            canonical["layers"] = layers
+            canonical["edges"] = [list(edge) for edge in self.edges()]
+        return canonical
+
+
+def route_destination(route):
+    """Return a route's destination (IPv4/IPv6 CIDR or prefix list)."""
+    return (
+        route.get("DestinationCidrBlock")
+        or route.get("DestinationIpv6CidrBlock")
+        or route.get("DestinationPrefixListId")
+        or "route"
+    )
+
+
+def _peering_vpcs(pcx):  # (requester VPC ID, accepter VPC ID)
+    return (
+        pcx.get("RequesterVpcInfo", {}).get("VpcId"),
+        pcx.get("AccepterVpcInfo", {}).get("VpcId"),
+    )
+
+
+def _eip_id(eip):  # VPC addresses have an AllocationId; fall back to the IP
+    return eip.get("AllocationId") or eip["PublicIp"]
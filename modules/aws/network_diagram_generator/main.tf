@@ -60,7 +60,7 @@ data "aws_iam_policy_document" "lambda_policy" {
     actions = [
       "ec2:Describe*", # Discover VPCs/Subnets/Instances
       "s3:PutObject",  # Upload generated diagram to S3
-      "s3:GetObject",  # (Optional) Read from S3 if needed
+      "s3:GetObject",  # HeadObject for topology change detection
       "s3:ListBucket"  # List target bucket
     ]
     resources = ["*"] # Read/list across region; restrict in production if desired
@@ -82,7 +82,17 @@ resource "aws_lambda_function" "diagram" {
   source_code_hash = data.archive_file.lambda_package.output_base64sha256 # Force update on code changes
   environment {
     variables = {
-      S3_BUCKET = var.s3_bucket_name != null ? var.s3_bucket_name : aws_s3_bucket.diagram[0].bucket # Bucket to upload diagram
+      S3_BUCKET            = var.s3_bucket_name != null ? var.s3_bucket_name : aws_s3_bucket.diagram[0].bucket # Bucket to upload diagram
+      INSTANCE_STATES      = join(",", var.instance_states)                                                    # Server-side instance-state-name filter
+      VPC_IDS              = join(",", var.vpc_ids)                                                            # Optional VPC restriction
+      INSTANCE_TAG_FILTERS = jsonencode(var.instance_tag_filters)                                              # Optional instance tag filters
+      REGIONS              = join(",", var.regions)                                                            # Regions to scan ("all" for every enabled region)
+      REGION_LAYOUT        = var.region_layout                                                                 # combined or per_region
+      RENDER_MODE          = var.render_mode                                                                   # single or sharded
+      SHARD_SIZE           = tostring(var.shard_size)                                                          # VPCs per sharded diagram
+      SHARD_MAX_WORKERS    = tostring(var.shard_max_workers)                                                   # Concurrent Graphviz layouts
+      OUTPUT_FORMATS       = join(",", var.output_formats)                                                     # png, svg, json, jsonl
+      DISCOVERY_LAYERS     = join(",", var.discovery_layers)                                                   # Optional ENI/route/TGW/peering/EIP layers
     }
   }
 }
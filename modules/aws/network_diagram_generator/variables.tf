@@ -20,3 +20,93 @@ variable "schedule" {
   type        = string
   default     = "cron(0 2 ? * SUN *)" # Weekly on Sunday at 02:00 UTC
 }
+
+variable "instance_states" {
+  description = "EC2 instance states to include in the diagram (server-side instance-state-name filter)."
+  type        = list(string)
+  default     = ["pending", "running", "stopping", "stopped"] # Excludes terminated instances
+}
+
+variable "vpc_ids" {
+  description = "Restrict discovery to these VPC IDs. Empty means all VPCs."
+  type        = list(string)
+  default     = [] # All VPCs
+}
+
+variable "instance_tag_filters" {
+  description = "Only include instances whose tags match, as a map of tag key to allowed values (e.g. { Environment = [\"prod\"] })."
+  type        = map(list(string))
+  default     = {} # No tag filtering
+}
+
+variable "regions" {
+  description = "Regions to scan. Empty scans only the Lambda's own region; [\"all\"] scans every region enabled for the account."
+  type        = list(string)
+  default     = [] # Lambda's own region
+}
+
+variable "region_layout" {
+  description = "How multi-region scans are rendered: 'combined' (one diagram, one cluster per region) or 'per_region' (one diagram per region)."
+  type        = string
+  default     = "combined"
+
+  validation {
+    condition     = contains(["combined", "per_region"], var.region_layout)
+    error_message = "The region_layout must be either 'combined' or 'per_region'."
+  }
+}
+
+variable "render_mode" {
+  description = "'single' lays out each diagram as one Graphviz graph; 'sharded' renders each VPC (or group of shard_size VPCs) as its own graph, in parallel, plus an overview and index.html under network_diagram/."
+  type        = string
+  default     = "single"
+
+  validation {
+    condition     = contains(["single", "sharded"], var.render_mode)
+    error_message = "The render_mode must be either 'single' or 'sharded'."
+  }
+}
+
+variable "shard_size" {
+  description = "Number of VPCs per diagram when render_mode is 'sharded'."
+  type        = number
+  default     = 1
+
+  validation {
+    condition     = var.shard_size >= 1
+    error_message = "The shard_size must be at least 1."
+  }
+}
+
+variable "shard_max_workers" {
+  description = "Maximum number of diagrams laid out concurrently (each by its own Graphviz process)."
+  type        = number
+  default     = 4
+
+  validation {
+    condition     = var.shard_max_workers >= 1 && var.shard_max_workers <= 16
+    error_message = "The shard_max_workers must be between 1 and 16."
+  }
+}
+
+variable "output_formats" {
+  description = "Outputs to write per diagram: 'png' and/or 'svg' (rendered from the same graph), 'json' and/or 'jsonl' (machine-readable topology export). Only the listed formats are produced."
+  type        = list(string)
+  default     = ["png"]
+
+  validation {
+    condition     = length(var.output_formats) > 0 && alltrue([for f in var.output_formats : contains(["png", "svg", "json", "jsonl"], f)])
+    error_message = "The output_formats must be a non-empty list of 'png', 'svg', 'json', or 'jsonl'."
+  }
+}
+
+variable "discovery_layers" {
+  description = "Optional resource layers to discover and draw in addition to VPCs, subnets and instances: 'eni', 'route', 'transit_gateway', 'vpc_peering_connection', 'eip', or ['all']."
+  type        = list(string)
+  default     = []
+
+  validation {
+    condition     = alltrue([for l in var.discovery_layers : contains(["eni", "route", "transit_gateway", "vpc_peering_connection", "eip", "all"], l)])
+    error_message = "The discovery_layers entries must be 'eni', 'route', 'transit_gateway', 'vpc_peering_connection', 'eip', or 'all'."
+  }
+}